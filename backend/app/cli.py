@@ -0,0 +1,84 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app import db
+
+segments_cli = AppGroup('segments', help='RFM member segmentation.')
+
+# In-flight `segments refresh` child per merchant, started by this process
+_refreshes = {}
+_refreshes_lock = threading.Lock()
+
+
+@segments_cli.command('refresh')
+@click.option('--merchant-id', help='Refresh one merchant only (default: all merchants).')
+@click.option('--loop', is_flag=True,
+              help='Keep running, refreshing every RFM_REFRESH_INTERVAL seconds (for a separate worker process).')
+def refresh_segments(merchant_id, loop):
+    """
+    Recompute member_segments (NumPy scoring), outside the web worker.
+
+    Run it from cron, or as its own process with --loop (see the Procfile `segments` entry).
+    """
+    # NumPy-backed: only imported by this command, never by the web worker
+    from app.services.segment_service import SegmentService
+
+    while True:
+        try:
+            if merchant_id:
+                results = {merchant_id: SegmentService.refresh(merchant_id)}
+            else:
+                results = SegmentService.refresh_all()
+            for merchant, result in results.items():
+                click.echo(f"Segments refreshed for merchant {merchant}: {result}")
+        except Exception as e:
+            db.session.rollback()
+            if not loop:
+                raise
+            current_app.logger.error(f"Segment refresh failed: {e}")
+        finally:
+            db.session.remove()
+
+        if not loop:
+            return
+        time.sleep(current_app.config['RFM_REFRESH_INTERVAL'])
+
+
+def start_segment_refresh(merchant_id):
+    """
+    Run `flask segments refresh --merchant-id` in a child process, so the NumPy work and its
+    writes stay out of the web worker. At most one child runs per merchant: while it is alive
+    no other is started (runs from other processes still queue on the SegmentRun row lock).
+
+    Returns:
+        The new Popen, or None if a refresh for the merchant is already running
+    """
+    from app.services.socket_service import socketio
+
+    with _refreshes_lock:
+        running = _refreshes.get(merchant_id)
+        if running is not None and running.poll() is None:
+            return None
+
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'flask', '--app', 'app:create_app', 'segments', 'refresh', '--merchant-id', merchant_id],
+            cwd=backend_dir, stdout=subprocess.DEVNULL
+        )
+        _refreshes[merchant_id] = process
+
+    # Reap the child when it exits, and forget it
+    socketio.start_background_task(_reap_refresh, merchant_id, process)
+    return process
+
+
+def _reap_refresh(merchant_id, process):
+    process.wait()
+    with _refreshes_lock:
+        if _refreshes.get(merchant_id) is process:
+            del _refreshes[merchant_id]
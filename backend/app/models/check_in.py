@@ -4,6 +4,10 @@ import uuid6
 
 class DailyCheckIn(db.Model):
     __tablename__ = 'daily_check_ins'
+    __table_args__ = (
+        # One check-in per user per day; CheckInService inserts with ON CONFLICT DO NOTHING
+        db.UniqueConstraint('user_id', 'check_in_date', name='uq_daily_check_ins_user_date'),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid6.uuid7()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
@@ -17,3 +21,37 @@ class DailyCheckIn(db.Model):
 
     def __repr__(self):
         return f'<DailyCheckIn user={self.user_id} date={self.check_in_date} streak={self.streak_day_count} points={self.points_earned}>'
+
+
+class CheckInCalendar(db.Model):
+    """
+    Compact check-in history: one row per user per month, bit (day - 1) set for each
+    day checked in. A year of history is 12 small rows instead of ~365 DailyCheckIns.
+    Maintained by CheckInService.record().
+    """
+    __tablename__ = 'check_in_calendars'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'year', 'month', name='uq_check_in_calendars_user_month'),
+    )
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid6.uuid7()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False) # 1 to 12
+    days = db.Column(db.Integer, nullable=False, default=0) # Bit 0 = day 1 ... bit 30 = day 31
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def day_list(self):
+        return [day + 1 for day in range(31) if self.days >> day & 1]
+
+    def to_dict(self):
+        return {
+            'year': self.year,
+            'month': self.month,
+            'days': self.day_list(),
+            'bitmap': self.days,
+            'count': bin(self.days).count('1')
+        }
+
+    def __repr__(self):
+        return f'<CheckInCalendar user={self.user_id} {self.year}-{self.month:02d} days={self.days:#x}>'
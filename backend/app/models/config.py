@@ -1,6 +1,15 @@
 from app import db
 from datetime import datetime
 
+# Keys every client expects from /config/version. Missing rows fall back to these.
+DEFAULT_CONFIG = {
+    'min_version_ios': '1.0.0',
+    'min_version_android': '1.0.0',
+    'store_url_ios': 'https://apps.apple.com/app/id123456789', # Replace with real ID
+    'store_url_android': 'https://play.google.com/store/apps/details?id=com.lakeviewhaus.biz',
+    'maintenance_mode': 'false'
+}
+
 class AppConfig(db.Model):
     __tablename__ = 'app_config'
 
@@ -1,6 +1,7 @@
 from app import db
 from datetime import datetime
 import uuid6
+from app.utils.fields import FieldSelection
 
 
 class LuckyDraw(db.Model):
@@ -40,26 +41,29 @@ class LuckyDraw(db.Model):
                             cascade='all, delete-orphan', lazy='dynamic')
     history = db.relationship('LuckyDrawHistory', backref='lucky_draw', lazy='dynamic')
 
-    def to_dict(self, include_prizes=False):
-        data = {
-            'id': self.id,
-            'merchant_id': self.merchant_id,
-            'name': self.name,
-            'description': self.description,
-            'image_url': self.image_url,
-            'points_cost': self.points_cost,
-            'is_active': self.is_active,
-            'is_day7_draw': self.is_day7_draw,
-            'max_daily_spins_per_user': self.max_daily_spins_per_user,
-            'total_available_spins': self.total_available_spins,
-            'remaining_spins': self.remaining_spins,
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-        }
-
-        if include_prizes:
+    # Serializable columns
+    COLUMNS = ('id', 'merchant_id', 'name', 'description', 'image_url', 'points_cost', 'is_active', 'is_day7_draw',
+               'max_daily_spins_per_user', 'total_available_spins', 'remaining_spins', 'start_date', 'end_date',
+               'created_at', 'updated_at')
+
+    @classmethod
+    def load_options(cls, fields):
+        """Query options loading only the columns to_dict(fields=fields) serializes (prizes load on demand)"""
+        return fields.load_only(cls, cls.COLUMNS)
+
+    def to_dict(self, include_prizes=False, fields=None):
+        """fields (a FieldSelection) replaces include_prizes: prizes are embedded when it expands them"""
+        if fields is None:
+            fields = FieldSelection(expand=('prizes',) if include_prizes else ())
+        data = fields.pick(self, ('id', 'merchant_id', 'name', 'description', 'image_url', 'points_cost',
+                                  'is_active', 'is_day7_draw', 'max_daily_spins_per_user',
+                                  'total_available_spins', 'remaining_spins'))
+        for name in ('start_date', 'end_date', 'created_at', 'updated_at'):
+            if name in fields:
+                value = getattr(self, name)
+                data[name] = value.isoformat() if value else None
+
+        if fields.expands('prizes'):
             data['prizes'] = [p.to_dict() for p in self.prizes.all()]
 
         return data
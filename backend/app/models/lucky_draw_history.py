@@ -6,6 +6,12 @@ import uuid6
 
 class LuckyDrawHistory(db.Model):
     __tablename__ = 'lucky_draw_history'
+    __table_args__ = (
+        # Per-user "spins today" counts filter on user_id + created_at range
+        db.Index('ix_lucky_draw_history_user_created', 'user_id', 'created_at'),
+        # Spin exports walk (created_at, id) keyset batches per draw
+        db.Index('ix_lucky_draw_history_draw_created', 'lucky_draw_id', 'created_at', 'id'),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid6.uuid7()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
@@ -57,8 +57,8 @@ class LuckyDrawPrize(db.Model):
             if include_reward and self.reward:
                 data['reward'] = self.reward.to_dict()
         elif self.prize_type == 'voucher':
-            data['voucher_discount_percent'] = float(self.voucher_discount_percent) if self.voucher_discount_percent else None
-            data['voucher_discount_amount'] = float(self.voucher_discount_amount) if self.voucher_discount_amount else None
+            data['voucher_discount_percent'] = float(self.voucher_discount_percent) if self.voucher_discount_percent is not None else None
+            data['voucher_discount_amount'] = float(self.voucher_discount_amount) if self.voucher_discount_amount is not None else None
             data['voucher_description'] = self.voucher_description
             data['voucher_max_usage'] = self.voucher_max_usage
             data['voucher_expiry_days'] = self.voucher_expiry_days
@@ -1,6 +1,7 @@
 from app import db
 from datetime import datetime
 import uuid6
+from app.utils.images import variants_for_url
 
 class HomeBanner(db.Model):
     __tablename__ = 'home_banners'
@@ -17,6 +18,7 @@ class HomeBanner(db.Model):
         return {
             'id': self.id,
             'image_url': self.image_url,
+            'image_variants': variants_for_url(self.image_url),
             'title': self.title,
             'sort_order': self.sort_order,
             'is_active': self.is_active
@@ -1,6 +1,9 @@
 from app import db
 from datetime import datetime
 import uuid6
+from sqlalchemy.orm import lazyload, selectinload
+from app.utils.images import variants_for_url
+from app.utils.fields import FieldSelection
 
 class MenuCategory(db.Model):
     __tablename__ = 'menu_categories'
@@ -21,6 +24,7 @@ class MenuCategory(db.Model):
             'branch_id': self.branch_id,
             'name': self.name,
             'image_url': self.image_url,
+            'image_variants': variants_for_url(self.image_url),
             'sort_order': self.sort_order
         }
 
@@ -45,21 +49,32 @@ class Product(db.Model):
     # Relationships
     # Many-to-Many relationship with ProductOptionGroup
     option_groups = db.relationship('ProductOptionGroup', secondary='product_options_association', backref='products', lazy='subquery')
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'branch_id': self.branch_id,
-            'category_id': self.category_id,
-            'name': self.name,
-            'description': self.description,
-            'price': self.price,
-            'image_url': self.image_url,
-            'is_active': self.is_active,
-            'is_recommended': self.is_recommended,
-            'is_new': self.is_new,
-            'options': [g.to_dict() for g in self.option_groups]
-        }
+
+    # Serializable columns, and the relations embedded when no ?expand= is given
+    COLUMNS = ('id', 'branch_id', 'category_id', 'name', 'description', 'price', 'image_url',
+               'is_active', 'is_recommended', 'is_new')
+    DEFAULT_EXPAND = ('options',)
+
+    @classmethod
+    def load_options(cls, fields):
+        """Query options loading only what to_dict(fields) serializes"""
+        options = fields.load_only(cls, cls.COLUMNS, image_variants='image_url')
+        if fields.expands('options'):
+            options.append(selectinload(cls.option_groups).selectinload(ProductOptionGroup.options))
+        else:
+            options.append(lazyload(cls.option_groups))
+        return options
+
+    def to_dict(self, fields=None):
+        if fields is None:
+            fields = FieldSelection(expand=self.DEFAULT_EXPAND)
+        data = fields.pick(self, ('id', 'branch_id', 'category_id', 'name', 'description', 'price', 'image_url'))
+        if 'image_variants' in fields:
+            data['image_variants'] = variants_for_url(self.image_url)
+        data.update(fields.pick(self, ('is_active', 'is_recommended', 'is_new')))
+        if fields.expands('options'):
+            data['options'] = [g.to_dict() for g in self.option_groups]
+        return data
 
 # Association Table for Many-to-Many
 product_options_association = db.Table('product_options_association',
@@ -141,3 +156,23 @@ class CollectionItem(db.Model):
     sort_order = db.Column(db.Integer, default=0)
 
     product = db.relationship('Product') # Fetch product details easily
+
+class MenuChange(db.Model):
+    """
+    Change log of a branch's menu (products, categories, option groups, collections) for delta sync.
+    Written by the session hooks in app/services/menu_changes.py; 'delete' rows are the tombstones.
+    """
+    __tablename__ = 'menu_changes'
+    __table_args__ = (
+        # /customer/menu/changes walks one branch's log in id (= time) order
+        db.Index('ix_menu_changes_branch_id', 'branch_id', 'id'),
+    )
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid6.uuid7()))
+    branch_id = db.Column(db.String(36), db.ForeignKey('branches.id'), nullable=True) # Null = merchant-wide (global collection)
+    merchant_id = db.Column(db.String(36), db.ForeignKey('merchants.id'), nullable=True) # Set for merchant-wide rows
+
+    entity = db.Column(db.String(20), nullable=False) # 'product', 'category', 'option_group', 'collection'
+    entity_id = db.Column(db.String(36), nullable=False)
+    action = db.Column(db.String(10), nullable=False) # 'upsert' or 'delete'
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -26,3 +26,57 @@ class Notification(db.Model):
             'is_read': self.is_read,
             'created_at': self.created_at.isoformat()
         }
+
+
+class Broadcast(db.Model):
+    """
+    A notification sent to a whole audience (see BroadcastService).
+
+    Recipients are processed in user id order; `cursor` is the last user id whose
+    notification is committed, so an interrupted broadcast resumes where it stopped.
+    """
+    __tablename__ = 'broadcasts'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid6.uuid7()))
+    merchant_id = db.Column(db.String(36), db.ForeignKey('merchants.id'), nullable=False)
+    created_by_branch_id = db.Column(db.String(36), db.ForeignKey('branches.id'), nullable=True)
+
+    # Message (copied into every Notification)
+    title = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    type = db.Column(db.String(50), nullable=False, default='promotion')
+    data = db.Column(db.JSON, nullable=True)
+
+    # Audience: 'all', 'rank' (bronze/silver/...), 'branch' (branch id), 'segment' (RFM segment)
+    audience = db.Column(db.String(20), nullable=False)
+    audience_value = db.Column(db.String(36), nullable=True)
+
+    # Progress
+    status = db.Column(db.String(20), nullable=False, default='queued') # queued/running/completed/failed
+    total_recipients = db.Column(db.Integer, nullable=True)
+    sent_count = db.Column(db.Integer, nullable=False, default=0)
+    cursor = db.Column(db.String(36), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'body': self.body,
+            'type': self.type,
+            'data': self.data,
+            'audience': self.audience,
+            'audience_value': self.audience_value,
+            'status': self.status,
+            'total_recipients': self.total_recipients,
+            'sent_count': self.sent_count,
+            'progress': round(self.sent_count / self.total_recipients, 4) if self.total_recipients else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
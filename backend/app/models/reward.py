@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 import secrets
 import string
 import uuid6
+from app.utils.fields import FieldSelection
 
 class Reward(db.Model):
     __tablename__ = 'rewards'
@@ -47,10 +48,24 @@ class Reward(db.Model):
     merchant = db.relationship('Merchant', backref='rewards', foreign_keys=[merchant_id])
     redemptions = db.relationship('UserReward', backref='reward', lazy='dynamic')
 
-    def to_dict(self):
+    # Serializable columns; target_name and branch_name are looked up, so only when selected
+    COLUMNS = ('id', 'merchant_id', 'branch_id', 'title', 'description', 'image_url', 'category', 'is_custom',
+               'reward_type', 'target_scope', 'target_id', 'discount_value', 'points_cost', 'min_rank_required',
+               'is_active', 'stock_quantity', 'available_stock', 'validity_days', 'redemption_limit_per_user',
+               'terms_and_conditions', 'sort_order', 'created_at', 'updated_at')
+
+    @classmethod
+    def load_options(cls, fields):
+        """Query options loading only the columns to_dict(fields) serializes"""
+        return fields.load_only(cls, cls.COLUMNS, target_name=('target_scope', 'target_id'), branch_name='branch_id')
+
+    def to_dict(self, fields=None):
+        if fields is None:
+            fields = FieldSelection()
+
         # Resolve target name dynamically
         target_name = None
-        if self.target_id:
+        if 'target_name' in fields and self.target_id:
             try:
                 if self.target_scope == 'product':
                     from app.models.menu import Product
@@ -67,7 +82,7 @@ class Reward(db.Model):
 
         # Resolve branch name if specific
         branch_name = None
-        if self.branch_id:
+        if 'branch_name' in fields and self.branch_id:
             try:
                 from app.models.merchant import Branch
                 branch = Branch.query.get(self.branch_id)
@@ -75,33 +90,21 @@ class Reward(db.Model):
                     branch_name = branch.name
             except Exception: pass
 
-        return {
-            'id': self.id,
-            'merchant_id': self.merchant_id,
-            'branch_id': self.branch_id,
-            'branch_name': branch_name, # New Field
-            'title': self.title,
-            'description': self.description,
-            'image_url': self.image_url,
-            'category': self.category,
-            'is_custom': self.is_custom,
-            'reward_type': self.reward_type,
-            'target_scope': self.target_scope,
-            'target_id': self.target_id,
-            'target_name': target_name,
-            'discount_value': self.discount_value,
-            'points_cost': self.points_cost,
-            'min_rank_required': self.min_rank_required,
-            'is_active': self.is_active,
-            'stock_quantity': self.stock_quantity,
-            'available_stock': self.available_stock,
-            'validity_days': self.validity_days,
-            'redemption_limit_per_user': self.redemption_limit_per_user,
-            'terms_and_conditions': self.terms_and_conditions,
-            'sort_order': self.sort_order,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        data = fields.pick(self, ('id', 'merchant_id', 'branch_id'))
+        if 'branch_name' in fields:
+            data['branch_name'] = branch_name
+        data.update(fields.pick(self, ('title', 'description', 'image_url', 'category', 'is_custom',
+                                       'reward_type', 'target_scope', 'target_id')))
+        if 'target_name' in fields:
+            data['target_name'] = target_name
+        data.update(fields.pick(self, ('discount_value', 'points_cost', 'min_rank_required', 'is_active',
+                                       'stock_quantity', 'available_stock', 'validity_days',
+                                       'redemption_limit_per_user', 'terms_and_conditions', 'sort_order')))
+        if 'created_at' in fields:
+            data['created_at'] = self.created_at.isoformat() if self.created_at else None
+        if 'updated_at' in fields:
+            data['updated_at'] = self.updated_at.isoformat() if self.updated_at else None
+        return data
 
     def __repr__(self):
         return f'<Reward {self.title}>'
@@ -109,6 +112,14 @@ class Reward(db.Model):
 
 class UserReward(db.Model):
     __tablename__ = 'user_rewards'
+    __table_args__ = (
+        # Expiry sweeper scans active rows in expires_at order
+        db.Index('ix_user_rewards_status_expires_at', 'status', 'expires_at'),
+        # Per-user redemption counts by reward (catalog eligibility) and per-user listings
+        db.Index('ix_user_rewards_user_reward', 'user_id', 'reward_id'),
+        # Merchant redemption exports walk (redeemed_at, id) keyset batches
+        db.Index('ix_user_rewards_merchant_redeemed', 'merchant_id', 'redeemed_at', 'id'),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid6.uuid7()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
@@ -166,7 +177,7 @@ class UserReward(db.Model):
             'merchant_id': self.merchant_id,
             'points_spent': self.points_spent,
             'redemption_code': self.redemption_code,
-            'status': self.status,
+            'status': self.effective_status,
             'redeemed_at': self.redeemed_at.isoformat() if self.redeemed_at else None,
             'expires_at': self.expires_at.isoformat() if self.expires_at else None,
             'used_at': self.used_at.isoformat() if self.used_at else None,
@@ -189,6 +200,27 @@ class UserReward(db.Model):
             return True
         return False
 
+    @property
+    def effective_status(self):
+        """Status as seen by clients: active rows past expiry read as 'expired' before the sweeper flips them"""
+        if self.status == 'active' and self.is_expired():
+            return 'expired'
+        return self.status
+
+    @classmethod
+    def status_filter(cls, status, now=None):
+        """SQL filter matching effective_status, so reads never need to persist expiry"""
+        now = now or datetime.utcnow()
+        not_expired = db.or_(cls.expires_at.is_(None), cls.expires_at >= now)
+        if status == 'active':
+            return db.and_(cls.status == 'active', not_expired)
+        if status == 'expired':
+            return db.or_(
+                cls.status == 'expired',
+                db.and_(cls.status == 'active', cls.expires_at < now)
+            )
+        return cls.status == status
+
     def __repr__(self):
         return f'<UserReward {self.redemption_code}>'
 
@@ -0,0 +1,78 @@
+from app import db
+from datetime import datetime
+import uuid6
+
+# RFM segment names, best to worst
+SEGMENTS = ('champions', 'loyal', 'promising', 'new', 'need_attention', 'at_risk', 'hibernating')
+
+
+class MemberSegment(db.Model):
+    """
+    A member's recency/frequency/monetary profile at one merchant.
+
+    frequency/monetary/points_earned/last_transaction_at are running totals over all of the
+    member's transactions, updated incrementally by SegmentService.refresh(); the 1-5 scores
+    and the segment are re-derived from the whole merchant population on every run.
+    """
+    __tablename__ = 'member_segments'
+    __table_args__ = (
+        db.UniqueConstraint('merchant_id', 'user_id', name='uq_member_segments_merchant_user'),
+        # Segment listings page through one segment ordered by spend
+        db.Index('ix_member_segments_merchant_segment', 'merchant_id', 'segment', 'monetary'),
+    )
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid6.uuid7()))
+    merchant_id = db.Column(db.String(36), db.ForeignKey('merchants.id'), nullable=False)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+
+    # Running totals
+    frequency = db.Column(db.Integer, nullable=False, default=0) # Transactions
+    monetary = db.Column(db.Float, nullable=False, default=0.0) # Sum of amount_spent
+    points_earned = db.Column(db.Float, nullable=False, default=0.0)
+    last_transaction_at = db.Column(db.DateTime, nullable=False)
+
+    # Scores (1 = bottom quintile, 5 = top) and derived segment
+    recency_days = db.Column(db.Integer, nullable=False, default=0)
+    r_score = db.Column(db.Integer, nullable=False, default=1)
+    f_score = db.Column(db.Integer, nullable=False, default=1)
+    m_score = db.Column(db.Integer, nullable=False, default=1)
+    segment = db.Column(db.String(20), nullable=False)
+
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    user = db.relationship('User')
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'username': self.user.username if self.user else None,
+            'segment': self.segment,
+            'rfm': f'{self.r_score}{self.f_score}{self.m_score}',
+            'r_score': self.r_score,
+            'f_score': self.f_score,
+            'm_score': self.m_score,
+            'recency_days': self.recency_days,
+            'frequency': self.frequency,
+            'monetary': round(self.monetary, 2),
+            'points_earned': self.points_earned,
+            'last_transaction_at': self.last_transaction_at.isoformat() if self.last_transaction_at else None,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+
+    def __repr__(self):
+        return f'<MemberSegment merchant={self.merchant_id} user={self.user_id} {self.segment}>'
+
+
+class SegmentRun(db.Model):
+    """Per-merchant progress of the RFM pipeline: transactions before `watermark` are already in the totals."""
+    __tablename__ = 'segment_runs'
+
+    merchant_id = db.Column(db.String(36), db.ForeignKey('merchants.id'), primary_key=True)
+    watermark = db.Column(db.DateTime, nullable=False)
+    members = db.Column(db.Integer, nullable=False, default=0)
+    transactions_processed = db.Column(db.Integer, nullable=False, default=0) # In the last run
+    thresholds_json = db.Column(db.Text) # Quintile edges used for the scores
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SegmentRun merchant={self.merchant_id} watermark={self.watermark}>'
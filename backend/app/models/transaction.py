@@ -4,7 +4,11 @@ import uuid6
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
-    
+    __table_args__ = (
+        # Per-branch date-range scans (stats, exports)
+        db.Index('ix_transactions_branch_timestamp', 'branch_id', 'timestamp'),
+    )
+
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid6.uuid7()))
     branch_id = db.Column(db.String(36), db.ForeignKey('branches.id'), nullable=False)
     member_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
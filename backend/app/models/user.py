@@ -24,7 +24,7 @@ class User(db.Model):
 
     # Gamification - Dual Points System
     points_balance = db.Column(db.Float, default=0.0)      # Spendable points (for rewards)
-    points_lifetime = db.Column(db.Float, default=0.0)     # Total earned (for rank, never decreases)
+    points_lifetime = db.Column(db.Float, default=0.0, index=True) # Total earned (for rank, never decreases; indexed for the leaderboard)
     current_points = db.Column(db.Float, default=0.0)      # DEPRECATED: Keep for migration compatibility
 
     total_streak = db.Column(db.Integer, default=0)
@@ -59,6 +59,21 @@ class User(db.Model):
         else:
             return 'bronze'
 
+    @classmethod
+    def rank_filter(cls, rank):
+        """SQL filter matching the rank property, or None for an unknown rank"""
+        thresholds = {'bronze': (None, 500), 'silver': (500, 2000), 'gold': (2000, 5000), 'platinum': (5000, None)}
+        if rank not in thresholds:
+            return None
+        low, high = thresholds[rank]
+        points = db.func.coalesce(cls.points_lifetime, 0.0)
+        conditions = []
+        if low is not None:
+            conditions.append(points >= low)
+        if high is not None:
+            conditions.append(points < high)
+        return db.and_(*conditions)
+
     def add_points(self, amount):
         """Add points to both balance and lifetime, and sync legacy current_points"""
         amount = round(float(amount), 2)
@@ -9,6 +9,7 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
 from flask_mail import Message
 from app.services.notification_service import NotificationService
+from app.utils.read_only import read_only
 import random
 import datetime
 
@@ -129,13 +130,6 @@ def process_referral_rewards(user):
              db.session.add(tx)
 
 
-def ensure_referral_code(user):
-    if not user.referral_code:
-        code = User.generate_referral_code()
-        while User.query.filter_by(referral_code=code).first():
-            code = User.generate_referral_code()
-        user.referral_code = code
-        db.session.commit()
 
 # --- MEMBER AUTH ---
 @bp.route('/register', methods=['POST'])
@@ -314,6 +308,7 @@ def resend_otp():
 
 
 @bp.route('/login', methods=['POST'])
+@read_only(replica=False)
 def login():
     data = request.get_json()
     identifier = data.get('identifier') or data.get('email') # Support both
@@ -339,8 +334,6 @@ def login():
             'email': user.email
         }), 403
 
-    ensure_referral_code(user)
-
     access_token = create_access_token(identity=str(user.id))
     refresh_token = create_refresh_token(identity=str(user.id))
 
@@ -430,6 +423,7 @@ def referral_info():
 
 @bp.route('/me', methods=['GET'])
 @jwt_required()
+@read_only
 def me():
     current_identity = get_jwt_identity()
 
@@ -462,8 +456,6 @@ def me():
     else:
         user = User.query.get(current_identity)
         if user:
-            ensure_referral_code(user)
-            
             # Get Orders Count
             orders_count = Transaction.query.filter_by(member_id=user.id).count()
             
@@ -1,42 +1,47 @@
-from flask import Blueprint, jsonify
-from app.models.config import AppConfig
-from app import db
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from app.routes.merchant import get_current_branch
+from app.services.config_service import ConfigService, InvalidConfig, VERSION_KEY
+from app.utils.read_only import read_only
 
 config_bp = Blueprint('config', __name__)
 
-DEFAULTS = {
-    'min_version_ios': '1.0.0',
-    'min_version_android': '1.0.0',
-    'store_url_ios': 'https://apps.apple.com/app/id123456789', # Replace with real ID
-    'store_url_android': 'https://play.google.com/store/apps/details?id=com.lakeviewhaus.biz',
-    'maintenance_mode': 'false' 
-}
-
 @config_bp.route('/version', methods=['GET'])
+@read_only
 def get_version_config():
     """
-    Get app version configuration. 
-    If keys don't exist in DB, returns defaults (and optionally seeds them).
+    Get app version configuration.
+    Served pre-encoded from the in-process ConfigService cache; keys missing from the DB fall back to DEFAULT_CONFIG.
+    """
+    return jsonify(ConfigService.version_config_json()), 200
+
+@config_bp.route('', methods=['PUT'])
+@jwt_required()
+def update_config():
+    """
+    Update config values (main branch only). Bumps the config version so every process reloads.
+    Only DEFAULT_CONFIG keys are writable, each checked against its type (ConfigService.normalize).
     """
-    configs = AppConfig.query.all()
-    config_dict = {c.key: c.value for c in configs}
-    
-    # Merge with defaults, ensuring all keys are present
-    final_config = {}
-    for key, default_val in DEFAULTS.items():
-        if key in config_dict:
-            final_config[key] = config_dict[key]
-        else:
-            # Auto-seed to DB so admin can edit it later
-            final_config[key] = default_val
-            new_conf = AppConfig(key=key, value=default_val, description=f"Auto-seeded {key}")
-            db.session.add(new_conf)
-            
-    # Commit any new seeds
+    current_branch = get_current_branch()
+    if not current_branch or not current_branch.is_main:
+        return jsonify({'error': 'Permission denied'}), 403
+
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict) or not data:
+        return jsonify({'error': 'No config values provided'}), 400
+
+    if VERSION_KEY in data:
+        return jsonify({'error': f'{VERSION_KEY} is managed by the server'}), 400
+
     try:
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error seeding config: {e}")
+        updates = {key: ConfigService.normalize(key, value) for key, value in data.items()}
+    except InvalidConfig as e:
+        return jsonify({'error': str(e)}), 400
+
+    ConfigService.set_many(updates)
 
-    return jsonify(final_config), 200
+    return jsonify({
+        'message': 'Config updated',
+        'config_version': ConfigService.version(),
+        'config': ConfigService.version_config()
+    }), 200
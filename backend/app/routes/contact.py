@@ -1,6 +1,5 @@
 from flask import Blueprint, request, jsonify, current_app
 from app import limiter
-import resend
 import os
 
 bp = Blueprint('contact', __name__, url_prefix='/api/contact')
@@ -24,7 +23,8 @@ def send_contact_email():
         if not name or not email or not message:
             return jsonify({'error': 'All fields are required.'}), 400
 
-        # Configure Resend
+        # Configure Resend (imported here: only this endpoint needs the provider SDK)
+        import resend
         resend.api_key = os.environ.get('RESEND_API_KEY')
 
         # Send Email
@@ -3,12 +3,17 @@ from app import db
 from app.models.merchant import Branch
 from app.models.menu import MenuCategory, Product
 from app.models.marketing import HomeBanner, HomeTopPick
+from app.services.menu_cache import MenuCache
+from app.services.menu_changes import MenuChangeLog, InvalidChangeToken
+from app.utils.fields import requested_fields
+from app.utils.read_only import read_only
 
 bp = Blueprint('customer', __name__, url_prefix='/customer')
 
 # --- BRANCHES ---
 
 @bp.route('/branches', methods=['GET'])
+@read_only
 def get_public_branches():
     # Helper to just return all active branches for now
     branches = Branch.query.filter_by(is_active=True).all()
@@ -25,32 +30,68 @@ def get_public_branches():
 # --- MENU ---
 
 @bp.route('/menu/categories', methods=['GET'])
+@read_only
 def get_public_categories():
     branch_id = request.args.get('branch_id')
     if not branch_id:
         return jsonify({'error': 'branch_id required'}), 400
     
-    cats = MenuCategory.query.filter_by(branch_id=branch_id).order_by(MenuCategory.sort_order).all()
-    return jsonify([c.to_dict() for c in cats]), 200
+    def build():
+        cats = MenuCategory.query.filter_by(branch_id=branch_id).order_by(MenuCategory.sort_order).all()
+        return [c.to_dict() for c in cats]
+
+    return jsonify(MenuCache.get(('categories', branch_id), build)), 200
 
 @bp.route('/menu/products', methods=['GET'])
+@read_only
 def get_public_products():
     branch_id = request.args.get('branch_id')
     if not branch_id:
         return jsonify({'error': 'branch_id required'}), 400
 
-    query = Product.query.filter_by(branch_id=branch_id)
-    
     category_id = request.args.get('category_id')
-    if category_id:
-        query = query.filter_by(category_id=category_id)
-        
-    products = query.order_by(Product.is_active.desc(), Product.name).all()
-    return jsonify([p.to_dict() for p in products]), 200
+    # ?fields=id,name,price,image_url&expand=options (default: everything, with options)
+    fields = requested_fields(Product.DEFAULT_EXPAND)
+
+    def build():
+        query = Product.query.filter_by(branch_id=branch_id).options(*Product.load_options(fields))
+        if category_id:
+            query = query.filter_by(category_id=category_id)
+        products = query.order_by(Product.is_active.desc(), Product.name).all()
+        return [p.to_dict(fields) for p in products]
+
+    return jsonify(MenuCache.get(('products', branch_id, category_id, fields.key), build)), 200
+
+@bp.route('/menu/changes', methods=['GET'])
+@read_only(replica=False)
+def get_menu_changes():
+    """
+    Delta sync of a branch's menu: categories, products, option groups and collections changed
+    since ?since=<token>, plus the ids deleted since then. Without since (or when reset is true)
+    the whole menu is returned and the local copy should be replaced. Keep the returned token
+    for the next call. Products take the same ?fields=/?expand= as /menu/products.
+
+    Served by the primary: a lagging replica could hand out a token past changes it has not seen yet.
+    """
+    branch_id = request.args.get('branch_id')
+    if not branch_id:
+        return jsonify({'error': 'branch_id required'}), 400
+
+    branch = Branch.query.get(branch_id)
+    if not branch:
+        return jsonify({'error': 'Branch not found'}), 404
+
+    try:
+        changes = MenuChangeLog.changes(branch, request.args.get('since'), requested_fields(Product.DEFAULT_EXPAND))
+    except InvalidChangeToken as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify(changes), 200
 
 # --- MARKETING ---
 
 @bp.route('/marketing/banners', methods=['GET'])
+@read_only
 def get_public_banners():
     # Only support single merchant for now, or require merchant_id param
     # Assuming single merchant system for now or fetch all active
@@ -62,6 +103,7 @@ def get_public_banners():
     } for b in banners]), 200
 
 @bp.route('/marketing/top-picks', methods=['GET'])
+@read_only
 def get_public_top_picks():
     picks = HomeTopPick.query.order_by(HomeTopPick.sort_order).all()
     return jsonify([{
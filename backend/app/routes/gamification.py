@@ -1,12 +1,14 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.user import User
-from app.models.check_in import DailyCheckIn
-from app.models.lucky_draw import LuckyDraw
 from app.models.lucky_draw_history import LuckyDrawHistory
 from app.models.reward import UserReward, Reward
-from datetime import datetime, timedelta
+from app.services.lucky_draw_registry import LuckyDrawRegistry
+from app.services.check_in_service import CheckInService
+from app.services.leaderboard_service import LeaderboardService
+from app.utils.read_only import read_only
+from datetime import date, datetime, timedelta
 import random
 import json
 
@@ -66,6 +68,72 @@ def check_in_status():
         'points_lifetime': user.points_lifetime or 0.0
     }), 200
 
+@bp.route('/calendar', methods=['GET'])
+@jwt_required()
+@read_only
+def check_in_calendar():
+    """
+    Check-in history as monthly day lists plus streak statistics.
+    ?year=YYYY for a calendar year, otherwise the last ?months=N months (default 12, max 36).
+    """
+    user_id = get_jwt_identity()
+
+    if user_id.startswith('m_'):
+        return jsonify({'error': 'Gamification not available for this user type'}), 403
+
+    today = datetime.utcnow().date()
+
+    if request.args.get('year'):
+        year = request.args.get('year', type=int)
+        if not year or not 2000 <= year <= today.year:
+            return jsonify({'error': 'Invalid year'}), 400
+        first_month, last_month = date(year, 1, 1), date(year, 12, 1)
+    else:
+        months = request.args.get('months', 12, type=int)
+        if not 1 <= months <= 36:
+            return jsonify({'error': 'months must be between 1 and 36'}), 400
+        first_index = today.year * 12 + today.month - months
+        first_month = date(first_index // 12, first_index % 12 + 1, 1)
+        last_month = today.replace(day=1)
+
+    return jsonify(CheckInService.calendar(user_id, first_month, last_month)), 200
+
+@bp.route('/leaderboard', methods=['GET'])
+@jwt_required()
+@read_only
+def leaderboard():
+    """Top members by lifetime points plus the caller's own position (?limit=N, default 20)"""
+    user_id = get_jwt_identity()
+
+    if user_id.startswith('m_'):
+        return jsonify({'error': 'Gamification not available for this user type'}), 403
+
+    user = User.query.get(user_id)
+
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    max_limit = current_app.config['LEADERBOARD_SIZE']
+    limit = request.args.get('limit', 20, type=int)
+    if not 1 <= limit <= max_limit:
+        return jsonify({'error': f'limit must be between 1 and {max_limit}'}), 400
+
+    # Member ids stay server-side; the caller's own row is flagged instead
+    entries = []
+    for entry in LeaderboardService.top(limit):
+        entry = dict(entry)
+        entry['is_me'] = entry.pop('user_id') == user.id
+        entries.append(entry)
+
+    updated_at = LeaderboardService.updated_at()
+
+    return jsonify({
+        'entries': entries,
+        'me': LeaderboardService.standing(user),
+        'rank_distribution': LeaderboardService.rank_counts(),
+        'updated_at': updated_at.isoformat() if updated_at else None
+    }), 200
+
 @bp.route('/check-in', methods=['POST'])
 @jwt_required()
 def check_in():
@@ -84,13 +152,10 @@ def check_in():
     if user.last_check_in_date == today:
         return jsonify({'error': 'Already checked in today', 'can_check_in': False}), 400
         
-    # Calculate Streak
-    if user.last_check_in_date == (today - timedelta(days=1)):
-        user.total_streak = (user.total_streak or 0) + 1
-    else:
-        user.total_streak = 1
-        
-    user.last_check_in_date = today
+    # Claim today and calculate the streak in one conditional UPDATE (concurrent taps get None)
+    if CheckInService.advance_streak(user, today) is None:
+        db.session.rollback()
+        return jsonify({'error': 'Already checked in today', 'can_check_in': False}), 400
     
     # Calculate Cycle Day (1-7)
     cycle_day = (user.total_streak - 1) % 7 + 1
@@ -112,44 +177,19 @@ def check_in():
     elif cycle_day == 6:
         points_to_add = 7
     elif cycle_day == 7:
-        # Check if Day 7 Lucky Draw is configured
-        day7_draw = None
-        # Check if Day 7 Lucky Draw is configured
-        day7_draw = LuckyDraw.query.filter_by(
-            is_day7_draw=True,
-            is_active=True
-        ).first()
-
-        # If Day 7 draw exists and is available, user should spin it instead
-        # If Day 7 draw exists and is available, execute the spin immediately
-        if day7_draw and day7_draw.is_available():
-            # 1. Fetch available prizes
-            available_prizes = [
-                p for p in day7_draw.prizes.all() 
-                if p.is_available()
-            ]
-
-            if not available_prizes:
+        # Day 7 Lucky Draw comes from the in-memory registry (no draw-table reads)
+        day7_draw = LuckyDrawRegistry.day7_draw()
+
+        # If Day 7 draw exists and is available (and a spin is left), execute the spin immediately
+        if day7_draw and LuckyDrawRegistry.reserve_spin(day7_draw):
+            # 1 & 2. Weighted random selection among in-stock prizes (limited stock is reserved atomically)
+            selected_prize = LuckyDrawRegistry.claim_prize(day7_draw)
+
+            if not selected_prize:
                 # Fallback if no prizes available (shouldn't happen in config usually, but safety net)
                 points_to_add = 5
                 prize_description = "Day 7 Consolation Bonus"
             else:
-                # 2. Weighted Random Selection
-                total_weight = sum(p.probability_weight for p in available_prizes)
-                rand_val = random.randint(1, total_weight)
-                
-                selected_prize = None
-                current_weight = 0
-                for prize in available_prizes:
-                    current_weight += prize.probability_weight
-                    if rand_val <= current_weight:
-                        selected_prize = prize
-                        break
-                
-                # Default to first if something goes wrong with random logic
-                if not selected_prize:
-                    selected_prize = available_prizes[0]
-
                 # 3. Create Lucky Draw History Record
                 history_record = LuckyDrawHistory(
                     user_id=user.id,
@@ -166,20 +206,14 @@ def check_in():
                 db.session.add(history_record)
                 db.session.flush()
 
-                # 4. Award the Prize
+                # 4. Award the Prize (stock was already reserved by claim_prize)
                 points_to_add = 0
                 prize_description = selected_prize.name
-                stock_decremented = False
 
                 if selected_prize.prize_type == 'points':
                     points_to_add = selected_prize.points_amount or 0
-                    selected_prize.decrement_stock()
-                    stock_decremented = True
                     
                 elif selected_prize.prize_type in ['reward', 'voucher']:
-                    selected_prize.decrement_stock()
-                    stock_decremented = True
-
                     # Create UserReward record if linked to a reward
                     if selected_prize.reward_id:
                         reward = Reward.query.get(selected_prize.reward_id)
@@ -204,21 +238,13 @@ def check_in():
                             # Link back to history
                             history_record.user_reward_id = user_reward.id
 
-                # Decrement draw spins if limited
-                day7_draw.decrement_spins()
-
             # Add Points to User Account
             user.add_points(points_to_add)
 
-            # Record check-in
-            check_in_record = DailyCheckIn(
-                user_id=user.id,
-                check_in_date=today,
-                streak_day_count=cycle_day,
-                points_earned=points_to_add
-            )
-            
-            db.session.add(check_in_record)
+            # Record check-in (the unique constraint backs up the streak claim)
+            if not CheckInService.record(user.id, today, cycle_day, points_to_add):
+                db.session.rollback()
+                return jsonify({'error': 'Already checked in today', 'can_check_in': False}), 400
 
             try:
                 db.session.commit()
@@ -232,12 +258,10 @@ def check_in():
                 'success': True,
                 'is_day7': True,
                 'points_added': points_to_add,
-                'new_total_points': (user.points_balance or 0.0) + points_to_add, # Add here since we add to user object later in shared code? 
-                # Wait, we need to explicitly add points to user object if we return here!
-                # Logic below 'user.add_points(points_to_add)' is skipped if we return early.
-                # So we must add points here.
-                'points_balance': (user.points_balance or 0.0) + points_to_add,
-                'points_lifetime': (user.points_lifetime or 0.0) + points_to_add,
+                # Points were already added to the user above
+                'new_total_points': user.points_balance or 0.0,
+                'points_balance': user.points_balance or 0.0,
+                'points_lifetime': user.points_lifetime or 0.0,
                 'streak': user.total_streak,
                 'cycle_day': cycle_day,
                 'prize': prize_description,
@@ -268,13 +292,9 @@ def check_in():
     user.add_points(points_to_add)
     
     # Record Check In
-    check_in_record = DailyCheckIn(
-        user_id=user.id,
-        check_in_date=today,
-        streak_day_count=cycle_day,
-        points_earned=points_to_add
-    )
-    db.session.add(check_in_record)
+    if not CheckInService.record(user.id, today, cycle_day, points_to_add):
+        db.session.rollback()
+        return jsonify({'error': 'Already checked in today', 'can_check_in': False}), 400
     
     try:
         db.session.commit()
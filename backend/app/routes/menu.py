@@ -3,6 +3,7 @@ from app import db
 from app.models.merchant import Branch
 from app.models.menu import MenuCategory, Product, ProductOptionGroup, ProductOption, Collection, CollectionItem
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.utils.fields import requested_fields
 
 bp = Blueprint('menu', __name__, url_prefix='/menu')
 
@@ -116,7 +117,9 @@ def get_products():
     if not current_branch: return jsonify({'error': 'Unauthorized'}), 401
 
     target_id = request.args.get('target_branch_id')
-    query = Product.query
+    # ?fields=id,name,price,image_url&expand=options (default: everything, with options)
+    fields = requested_fields(Product.DEFAULT_EXPAND)
+    query = Product.query.options(*Product.load_options(fields))
 
     if current_branch.is_main and target_id == 'ALL':
         # Fetch all products from all branches
@@ -132,7 +135,7 @@ def get_products():
 
     # Sort: Active products first (True=1, False=0, so desc() puts True first), then by name
     products = query.order_by(Product.is_active.desc(), Product.name).all()
-    return jsonify([p.to_dict() for p in products]), 200
+    return jsonify([p.to_dict(fields) for p in products]), 200
 
 @bp.route('/products', methods=['POST'])
 @jwt_required()
@@ -348,8 +351,8 @@ def update_collection(id):
     if 'description' in data: collection.description = data['description'] # if model has description
     
     if 'product_ids' in data:
-        # Replace items
-        CollectionItem.query.filter_by(collection_id=id).delete()
+        # Replace items (through the session, so the menu change log sees the edit)
+        collection.items.clear()
         for idx, pid in enumerate(data['product_ids']):
              item = CollectionItem(collection_id=collection.id, product_id=pid, sort_order=idx)
              db.session.add(item)
@@ -1,13 +1,18 @@
-from flask import Blueprint, request, jsonify
-from app import db
+import json
+from flask import Blueprint, request, jsonify, current_app
+from app import db, limiter
 from app.models.merchant import Branch
 from app.models.transaction import Transaction
 from app.models.reward import UserReward, Reward
 from app.models.user import User
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import func, and_, desc
+from sqlalchemy import func, and_, desc, select
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
+from app.models.segment import MemberSegment, SegmentRun, SEGMENTS
+from app.utils.exports import ExportError, export_response, parse_date_range
+from app.utils.read_only import read_only
 
 bp = Blueprint('merchant', __name__, url_prefix='/merchant')
 
@@ -248,6 +253,7 @@ def update_password():
 
 @bp.route('/stats', methods=['GET'])
 @jwt_required()
+@read_only
 def get_merchant_stats():
     current_branch = get_current_branch()
     if not current_branch:
@@ -332,6 +338,7 @@ def get_merchant_stats():
 
 @bp.route('/stats/details', methods=['GET'])
 @jwt_required()
+@read_only
 def get_stat_details():
     current_branch = get_current_branch()
     if not current_branch:
@@ -408,3 +415,196 @@ def get_stat_details():
             })
 
     return jsonify(results), 200
+
+
+@bp.route('/stats/cohorts', methods=['GET'])
+@jwt_required()
+@read_only
+def get_cohort_retention():
+    """
+    Monthly cohort retention: members grouped by signup month, and the share of each
+    cohort that transacted 0, 1, 2, ... months later.
+
+    Query params: months (cohorts to show, default 12, max 36), branch_id (main branch only).
+    Computed from a per-merchant daily snapshot, see CohortService.
+    """
+    # NumPy-backed: imported on first use to keep it out of worker boot
+    from app.services.cohort_service import CohortService, DEFAULT_MONTHS, MAX_MONTHS
+
+    current_branch = get_current_branch()
+    if not current_branch:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    months = request.args.get('months', DEFAULT_MONTHS, type=int)
+    if not 1 <= months <= MAX_MONTHS:
+        return jsonify({'error': f'months must be between 1 and {MAX_MONTHS}'}), 400
+
+    branch_filter = request.args.get('branch_id')
+    branch_ids = None
+    if (branch_filter and branch_filter != 'all') or not current_branch.is_main:
+        branch_ids = export_branch_ids(current_branch, branch_filter)
+        if branch_ids is None:
+            return jsonify({'error': 'Branch not found'}), 404
+
+    return jsonify(CohortService.retention(current_branch.merchant_id, branch_ids, months)), 200
+
+
+@bp.route('/segments', methods=['GET'])
+@jwt_required()
+@read_only
+def get_segments():
+    """RFM segment sizes from the last SegmentService run (main branch only)"""
+    current_branch = get_current_branch()
+    if not current_branch or not current_branch.is_main:
+        return jsonify({'error': 'Permission denied'}), 403
+
+    merchant_id = current_branch.merchant_id
+    counts = dict(db.session.query(MemberSegment.segment, func.count(MemberSegment.id)).filter(
+        MemberSegment.merchant_id == merchant_id
+    ).group_by(MemberSegment.segment).all())
+
+    run = db.session.get(SegmentRun, merchant_id)
+    return jsonify({
+        'segments': [{'segment': name, 'members': counts.get(name, 0)} for name in SEGMENTS],
+        'total_members': sum(counts.values()),
+        'thresholds': json.loads(run.thresholds_json) if run and run.thresholds_json else None,
+        'computed_at': run.computed_at.isoformat() if run and run.computed_at else None,
+        'data_through': run.watermark.isoformat() if run and run.members else None
+    }), 200
+
+
+@bp.route('/segments/<segment>/members', methods=['GET'])
+@jwt_required()
+@read_only
+def get_segment_members(segment):
+    """Members of one RFM segment, highest spend first (paginated)"""
+    current_branch = get_current_branch()
+    if not current_branch or not current_branch.is_main:
+        return jsonify({'error': 'Permission denied'}), 403
+
+    if segment not in SEGMENTS:
+        return jsonify({'error': f"Unknown segment. Use one of: {', '.join(SEGMENTS)}"}), 404
+
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 50, type=int), 200)
+
+    pagination = MemberSegment.query.options(joinedload(MemberSegment.user)).filter(
+        MemberSegment.merchant_id == current_branch.merchant_id,
+        MemberSegment.segment == segment
+    ).order_by(MemberSegment.monetary.desc(), MemberSegment.id).paginate(
+        page=page, per_page=per_page, error_out=False
+    )
+
+    return jsonify({
+        'segment': segment,
+        'members': [m.to_dict() for m in pagination.items],
+        'total': pagination.total,
+        'page': page,
+        'per_page': per_page
+    }), 200
+
+
+@bp.route('/segments/refresh', methods=['POST'])
+@limiter.limit("5 per minute")
+@jwt_required()
+def refresh_segments():
+    """
+    Start an RFM run for this merchant now (in its own process) instead of waiting for the next one.
+    409 while the merchant's previous run is still going.
+    """
+    from app.cli import start_segment_refresh
+
+    current_branch = get_current_branch()
+    if not current_branch or not current_branch.is_main:
+        return jsonify({'error': 'Permission denied'}), 403
+
+    if not start_segment_refresh(current_branch.merchant_id):
+        return jsonify({'error': 'Segment refresh already running'}), 409
+    return jsonify({'message': 'Segment refresh started'}), 202
+
+
+def export_branch_ids(current_branch, requested_branch_id=None):
+    """
+    Branch ids an export may cover: main branches see every branch of the merchant (or the
+    one requested), other branches only themselves.
+
+    Returns:
+        List of branch ids, or None if the requested branch is not accessible
+    """
+    if not current_branch.is_main:
+        if requested_branch_id and requested_branch_id not in ('all', current_branch.id):
+            return None
+        return [current_branch.id]
+
+    branch_ids = [b.id for b in Branch.query.filter_by(merchant_id=current_branch.merchant_id).with_entities(Branch.id)]
+    if requested_branch_id and requested_branch_id != 'all':
+        return [requested_branch_id] if requested_branch_id in branch_ids else None
+    return branch_ids
+
+
+@bp.route('/transactions/export', methods=['GET'])
+@jwt_required()
+@read_only
+def export_transactions():
+    """
+    Stream transactions as CSV (default) or NDJSON.
+
+    Query params: format (csv|ndjson), branch_id (main branch only, default all),
+    month=YYYY-MM or from/to=YYYY-MM-DD (inclusive).
+
+    Rows come from a server-side cursor in batches of EXPORT_BATCH_SIZE and are written
+    out as they arrive, so memory stays flat for exports of any size.
+    """
+    current_branch = get_current_branch()
+    if not current_branch:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    branch_ids = export_branch_ids(current_branch, request.args.get('branch_id'))
+    if branch_ids is None:
+        return jsonify({'error': 'Branch not found'}), 404
+
+    fmt = request.args.get('format', 'csv').lower()
+    try:
+        start, end = parse_date_range(request.args)
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Plain column rows (no ORM instances), so nothing accumulates in the identity map
+    stmt = select(
+        Transaction.id,
+        Transaction.timestamp,
+        Branch.id,
+        Branch.name,
+        Transaction.member_id,
+        User.username,
+        Transaction.transaction_type,
+        Transaction.amount_spent,
+        Transaction.points_earned
+    ).join(Branch, Transaction.branch_id == Branch.id)\
+     .join(User, Transaction.member_id == User.id)\
+     .where(Transaction.branch_id.in_(branch_ids))\
+     .order_by(Transaction.timestamp, Transaction.id)
+
+    if start:
+        stmt = stmt.where(Transaction.timestamp >= start)
+    if end:
+        stmt = stmt.where(Transaction.timestamp < end)
+
+    columns = (
+        'transaction_id', 'timestamp', 'branch_id', 'branch_name', 'member_id',
+        'member_username', 'transaction_type', 'amount_spent', 'points_earned'
+    )
+    filename = 'transactions-' + (request.args.get('month') or datetime.utcnow().strftime('%Y%m%d'))
+
+    def rows():
+        # yield_per streams from a server-side cursor (named cursor on PostgreSQL)
+        result = db.session.execute(stmt.execution_options(yield_per=current_app.config['EXPORT_BATCH_SIZE']))
+        try:
+            yield from result
+        finally:
+            result.close()
+
+    try:
+        return export_response(fmt, columns, rows(), filename)
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
@@ -0,0 +1,99 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from app.models.notification import Broadcast
+from app.routes.merchant import get_current_branch
+from app.services.broadcast_service import BroadcastService, BroadcastError
+from app.utils.read_only import read_only
+
+bp = Blueprint('merchant_broadcast', __name__, url_prefix='/merchant/broadcasts')
+
+
+def get_main_branch():
+    branch = get_current_branch()
+    if not branch or not branch.is_main:
+        return None
+    return branch
+
+
+@bp.route('', methods=['POST'])
+@jwt_required()
+def create_broadcast():
+    """
+    Send a notification to an audience from a background job.
+
+    Body: title, body, audience ('all' | 'rank' | 'branch' | 'segment'),
+    audience_value (rank name, branch id or RFM segment), optional type and data.
+    Returns 202 with the broadcast; poll GET /merchant/broadcasts/<id> (or listen for
+    'broadcast_progress' on the merchant room) for progress.
+    """
+    branch = get_main_branch()
+    if not branch:
+        return jsonify({'error': 'Only main branch can send broadcasts'}), 403
+
+    data = request.get_json(silent=True) or {}
+    try:
+        broadcast = BroadcastService.create(
+            branch.merchant_id,
+            branch.id,
+            title=data.get('title'),
+            body=data.get('body'),
+            audience=data.get('audience', 'all'),
+            value=data.get('audience_value'),
+            type=data.get('type'),
+            data=data.get('data')
+        )
+    except BroadcastError as e:
+        return jsonify({'error': str(e)}), 400
+
+    BroadcastService.start(current_app._get_current_object(), broadcast.id)
+    return jsonify(broadcast.to_dict()), 202
+
+
+@bp.route('/audience', methods=['GET'])
+@jwt_required()
+@read_only
+def preview_audience():
+    """Number of members a broadcast would reach (?audience=&audience_value=)"""
+    branch = get_main_branch()
+    if not branch:
+        return jsonify({'error': 'Only main branch can send broadcasts'}), 403
+
+    audience = request.args.get('audience', 'all')
+    value = request.args.get('audience_value')
+    try:
+        BroadcastService.validate_audience(branch.merchant_id, audience, value)
+    except BroadcastError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'audience': audience,
+        'audience_value': value,
+        'recipients': BroadcastService.count(branch.merchant_id, audience, value)
+    }), 200
+
+
+@bp.route('', methods=['GET'])
+@jwt_required()
+@read_only
+def list_broadcasts():
+    branch = get_main_branch()
+    if not branch:
+        return jsonify({'error': 'Only main branch can send broadcasts'}), 403
+
+    broadcasts = Broadcast.query.filter_by(merchant_id=branch.merchant_id)\
+        .order_by(Broadcast.created_at.desc()).limit(50).all()
+    return jsonify({'broadcasts': [b.to_dict() for b in broadcasts]}), 200
+
+
+@bp.route('/<broadcast_id>', methods=['GET'])
+@jwt_required()
+@read_only
+def get_broadcast(broadcast_id):
+    branch = get_main_branch()
+    if not branch:
+        return jsonify({'error': 'Only main branch can send broadcasts'}), 403
+
+    broadcast = Broadcast.query.filter_by(id=broadcast_id, merchant_id=branch.merchant_id).first()
+    if not broadcast:
+        return jsonify({'error': 'Broadcast not found'}), 404
+    return jsonify(broadcast.to_dict()), 200
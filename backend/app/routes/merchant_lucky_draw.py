@@ -1,13 +1,20 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.merchant import Branch
 from app.models.lucky_draw import LuckyDraw
 from app.models.lucky_draw_prize import LuckyDrawPrize
 from app.models.lucky_draw_history import LuckyDrawHistory
-from app.models.reward import Reward
+from app.models.reward import Reward, UserReward
+from app.models.user import User
+from app.services.lucky_draw_registry import LuckyDrawRegistry
+from app.routes.merchant import export_branch_ids
+from app.utils.exports import ExportError, export_response, keyset_rows, parse_date_range
+from app.utils.fields import requested_fields
+from app.utils.read_only import read_only
 from datetime import datetime
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 
 bp = Blueprint('merchant_lucky_draw', __name__, url_prefix='/merchant/lucky-draws')
 
@@ -101,6 +108,7 @@ def create_lucky_draw():
 
     db.session.add(lucky_draw)
     db.session.commit()
+    LuckyDrawRegistry.invalidate()
 
     return jsonify({
         'message': 'Lucky draw created successfully',
@@ -116,12 +124,15 @@ def get_lucky_draws():
     if error:
         return jsonify(error), status
 
+    # ?fields=id,name,image_url,is_active&expand=prizes (default: every attribute, no prizes)
+    fields = requested_fields()
+
     lucky_draws = LuckyDraw.query.filter_by(
         merchant_id=branch.merchant_id
-    ).order_by(LuckyDraw.created_at.desc()).all()
+    ).options(*LuckyDraw.load_options(fields)).order_by(LuckyDraw.created_at.desc()).all()
 
     return jsonify({
-        'lucky_draws': [ld.to_dict() for ld in lucky_draws]
+        'lucky_draws': [ld.to_dict(fields=fields) for ld in lucky_draws]
     }), 200
 
 
@@ -226,6 +237,7 @@ def update_lucky_draw(draw_id):
 
     lucky_draw.updated_at = datetime.utcnow()
     db.session.commit()
+    LuckyDrawRegistry.invalidate()
 
     return jsonify({
         'message': 'Lucky draw updated successfully',
@@ -256,6 +268,7 @@ def delete_lucky_draw(draw_id):
 
     db.session.delete(lucky_draw)
     db.session.commit()
+    LuckyDrawRegistry.invalidate()
 
     return jsonify({'message': 'Lucky draw deleted successfully'}), 200
 
@@ -336,6 +349,7 @@ def add_prize(draw_id):
 
     db.session.add(prize)
     db.session.commit()
+    LuckyDrawRegistry.invalidate()
 
     return jsonify({
         'message': 'Prize added successfully',
@@ -421,6 +435,7 @@ def update_prize(draw_id, prize_id):
             prize.voucher_expiry_days = data['voucher_expiry_days']
 
     db.session.commit()
+    LuckyDrawRegistry.invalidate()
 
     return jsonify({
         'message': 'Prize updated successfully',
@@ -460,12 +475,14 @@ def delete_prize(prize_id, draw_id):
 
     db.session.delete(prize)
     db.session.commit()
+    LuckyDrawRegistry.invalidate()
 
     return jsonify({'message': 'Prize deleted successfully'}), 200
 
 
 @bp.route('/<draw_id>/statistics', methods=['GET'])
 @jwt_required()
+@read_only
 def get_statistics(draw_id):
     """Get statistics for a lucky draw"""
     branch, error, status = get_current_branch()
@@ -557,3 +574,148 @@ def get_statistics(draw_id):
         'remaining_spins': lucky_draw.remaining_spins,
         'is_active': lucky_draw.is_active
     }), 200
+
+
+@bp.route('/<draw_id>/simulate', methods=['POST'])
+@jwt_required()
+@read_only
+def simulate_lucky_draw(draw_id):
+    """
+    Monte Carlo simulation of the draw's prize configuration.
+
+    Body (all optional):
+        spins: Spins per run (default: remaining spins, or 100000 when unlimited)
+        runs: Independent runs used for the confidence intervals (default 10)
+        buckets: Number of spin ranges in the timeline (default 20)
+        seed: RNG seed for reproducible results
+        remaining_spins: What-if override of the draw's remaining spins
+        prizes: What-if overrides, [{'id', 'probability_weight', 'stock_remaining'}]
+    """
+    from app.services.lucky_draw_simulator import LuckyDrawSimulator, SimulationError
+
+    branch, error, status = get_current_branch()
+    if error:
+        return jsonify(error), status
+
+    lucky_draw = LuckyDraw.query.filter_by(
+        id=draw_id,
+        merchant_id=branch.merchant_id
+    ).first()
+
+    if not lucky_draw:
+        return jsonify({'error': 'Lucky draw not found'}), 404
+
+    data = request.get_json(silent=True) or {}
+
+    overrides = {}
+    for item in data.get('prizes') or []:
+        if not isinstance(item, dict) or not item.get('id'):
+            return jsonify({'error': 'Each prize override needs an id'}), 400
+        overrides[item['id']] = {k: item[k] for k in ('probability_weight', 'stock_remaining') if k in item}
+
+    prizes = LuckyDrawPrize.query.options(
+        joinedload(LuckyDrawPrize.reward)
+    ).filter_by(
+        lucky_draw_id=draw_id
+    ).order_by(LuckyDrawPrize.display_order).all()
+
+    try:
+        report = LuckyDrawSimulator.run_for_draw(
+            lucky_draw,
+            prizes,
+            spins=data.get('spins'),
+            runs=data.get('runs', 10),
+            buckets=data.get('buckets', 20),
+            seed=data.get('seed'),
+            overrides=overrides,
+            remaining_spins=data.get('remaining_spins'),
+            max_total_spins=current_app.config['LUCKY_DRAW_SIMULATION_MAX_SPINS']
+        )
+    except SimulationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    report['lucky_draw_id'] = draw_id
+    report['lucky_draw_name'] = lucky_draw.name
+
+    return jsonify(report), 200
+
+
+@bp.route('/spins/export', methods=['GET'])
+@jwt_required()
+@read_only
+def export_spins():
+    """
+    Stream the merchant's lucky draw spin history as CSV (default) or NDJSON, gzipped when accepted.
+
+    Query params: format (csv|ndjson), draw_id, spin_type, prize_type,
+    branch_id (branch where the won reward was used), month=YYYY-MM or from/to=YYYY-MM-DD.
+    """
+    branch, error, status = get_current_branch()
+    if error:
+        return jsonify(error), status
+
+    try:
+        start, end = parse_date_range(request.args)
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+
+    used_branch = db.aliased(Branch)
+    stmt = db.select(
+        LuckyDrawHistory.id,
+        LuckyDrawHistory.created_at,
+        LuckyDrawHistory.lucky_draw_id,
+        LuckyDraw.name,
+        LuckyDrawHistory.spin_type,
+        LuckyDrawHistory.user_id,
+        User.username,
+        LuckyDrawHistory.points_spent,
+        LuckyDrawHistory.prize_won_id,
+        LuckyDrawHistory.prize_type,
+        LuckyDrawHistory.prize_name,
+        LuckyDrawHistory.prize_value_json,
+        LuckyDrawHistory.voucher_code,
+        LuckyDrawHistory.voucher_expiry_date,
+        LuckyDrawHistory.is_claimed,
+        LuckyDrawHistory.claimed_at,
+        LuckyDrawHistory.user_reward_id,
+        UserReward.status,
+        UserReward.used_at,
+        used_branch.name
+    ).join(LuckyDraw, LuckyDrawHistory.lucky_draw_id == LuckyDraw.id)\
+     .join(User, LuckyDrawHistory.user_id == User.id)\
+     .outerjoin(UserReward, LuckyDrawHistory.user_reward_id == UserReward.id)\
+     .outerjoin(used_branch, UserReward.used_by_branch_id == used_branch.id)\
+     .where(LuckyDraw.merchant_id == branch.merchant_id)
+
+    if request.args.get('draw_id'):
+        stmt = stmt.where(LuckyDrawHistory.lucky_draw_id == request.args['draw_id'])
+    if request.args.get('spin_type'):
+        stmt = stmt.where(LuckyDrawHistory.spin_type == request.args['spin_type'])
+    if request.args.get('prize_type'):
+        stmt = stmt.where(LuckyDrawHistory.prize_type == request.args['prize_type'])
+
+    branch_filter = request.args.get('branch_id')
+    if branch_filter and branch_filter != 'all':
+        branch_ids = export_branch_ids(branch, branch_filter)
+        if branch_ids is None:
+            return jsonify({'error': 'Branch not found'}), 404
+        stmt = stmt.where(UserReward.used_by_branch_id.in_(branch_ids))
+
+    if start:
+        stmt = stmt.where(LuckyDrawHistory.created_at >= start)
+    if end:
+        stmt = stmt.where(LuckyDrawHistory.created_at < end)
+
+    columns = (
+        'spin_id', 'created_at', 'lucky_draw_id', 'lucky_draw_name', 'spin_type', 'member_id',
+        'member_username', 'points_spent', 'prize_id', 'prize_type', 'prize_name', 'prize_value',
+        'voucher_code', 'voucher_expiry_date', 'is_claimed', 'claimed_at', 'user_reward_id',
+        'reward_status', 'reward_used_at', 'reward_used_branch_name'
+    )
+    rows = keyset_rows(stmt, (LuckyDrawHistory.created_at, LuckyDrawHistory.id), current_app.config['EXPORT_BATCH_SIZE'])
+    filename = 'lucky-draw-spins-' + (request.args.get('month') or datetime.utcnow().strftime('%Y%m%d'))
+
+    try:
+        return export_response(request.args.get('format', 'csv').lower(), columns, rows, filename)
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
@@ -0,0 +1,17 @@
+import hmac
+from flask import Blueprint, Response, request, current_app, jsonify
+from app.services.metrics_service import MetricsRegistry
+
+bp = Blueprint('metrics', __name__)
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint. Requires 'Authorization: Bearer <METRICS_TOKEN>'."""
+    token = current_app.config.get('METRICS_TOKEN')
+    auth = request.headers.get('Authorization', '')
+
+    # Compared as bytes: compare_digest rejects str with non-ASCII characters (a 500, not a 401)
+    if not token or not hmac.compare_digest(auth.encode('utf-8'), f'Bearer {token}'.encode('utf-8')):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    return Response(MetricsRegistry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app import db
 from app.models.merchant import Branch
 from app.models.reward import Reward, UserReward
@@ -6,6 +6,12 @@ from app.models.user import User
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
 from app.services.notification_service import NotificationService
+from app.services.lucky_draw_registry import LuckyDrawRegistry
+from app.routes.merchant import export_branch_ids
+from app.utils.exports import ExportError, export_response, keyset_rows, parse_date_range
+from app.utils.db_routing import stick_to_primary
+from app.utils.fields import requested_fields
+from app.utils.read_only import read_only
 
 bp = Blueprint('rewards', __name__, url_prefix='/rewards')
 
@@ -48,6 +54,57 @@ RANK_HIERARCHY = {
     'platinum': 3
 }
 
+# Why a reward cannot be redeemed, in the order redeem_reward checks them
+INELIGIBLE_REASONS = ('out_of_stock', 'rank_required', 'insufficient_points', 'redemption_limit_reached')
+
+
+def with_eligibility(query, user):
+    """
+    Add the user's redemption count and an ineligibility reason (NULL = can redeem) to a Reward query.
+    Evaluated in SQL with one grouped user_rewards subquery, so eligible_only can filter and paginate in the DB.
+
+    Returns:
+        Tuple (query yielding (Reward, redemption_count, reason) rows, reason column)
+    """
+    redemptions = db.session.query(
+        UserReward.reward_id,
+        db.func.count().label('redemption_count')  # count(*) keeps it index-only on ix_user_rewards_user_reward
+    ).filter(
+        UserReward.user_id == user.id
+    ).group_by(UserReward.reward_id).subquery()
+
+    redemption_count = db.func.coalesce(redemptions.c.redemption_count, 0)
+    required_rank_level = db.case(
+        *[(Reward.min_rank_required == rank, level) for rank, level in RANK_HIERARCHY.items()],
+        else_=0
+    )
+
+    reason = db.case(
+        (db.and_(Reward.stock_quantity.isnot(None), db.func.coalesce(Reward.available_stock, 0) <= 0), INELIGIBLE_REASONS[0]),
+        (required_rank_level > RANK_HIERARCHY.get(user.rank, 0), INELIGIBLE_REASONS[1]),
+        (Reward.points_cost > (user.points_balance or 0.0), INELIGIBLE_REASONS[2]),
+        # redeem_reward treats a limit of 0 as unlimited
+        (db.and_(Reward.redemption_limit_per_user > 0, redemption_count >= Reward.redemption_limit_per_user), INELIGIBLE_REASONS[3]),
+        else_=None
+    )
+
+    query = query.outerjoin(
+        redemptions, redemptions.c.reward_id == Reward.id
+    ).add_columns(
+        redemption_count.label('user_redemption_count'),
+        reason.label('ineligible_reason')
+    )
+
+    return query, reason
+
+
+def annotated_reward(reward, redemption_count, reason, fields=None):
+    data = reward.to_dict(fields)
+    data['can_redeem'] = reason is None
+    data['ineligible_reason'] = reason
+    data['user_redemption_count'] = redemption_count
+    return fields.filter(data) if fields else data
+
 
 # --- REWARD MANAGEMENT (is_main only) ---
 
@@ -59,8 +116,11 @@ def get_rewards():
     if not current_branch:
         return jsonify({'error': 'Unauthorized'}), 401
 
+    # ?fields=id,title,points_cost,image_url (default: everything, including target/branch names)
+    fields = requested_fields()
+
     # Build query for merchant's rewards
-    query = Reward.query.filter_by(merchant_id=current_branch.merchant_id)
+    query = Reward.query.filter_by(merchant_id=current_branch.merchant_id).options(*Reward.load_options(fields))
 
     # Filter by category if provided
     category = request.args.get('category')
@@ -85,7 +145,7 @@ def get_rewards():
     # Sort by sort_order, then by created_at
     rewards = query.order_by(Reward.sort_order, Reward.created_at.desc()).all()
 
-    return jsonify([r.to_dict() for r in rewards]), 200
+    return jsonify([r.to_dict(fields) for r in rewards]), 200
 
 
 @bp.route('', methods=['POST'])
@@ -241,6 +301,9 @@ def update_reward(id):
 
     db.session.commit()
 
+    # Reward prizes embed the reward in the draw registry snapshot
+    LuckyDrawRegistry.invalidate()
+
     return jsonify(reward.to_dict()), 200
 
 
@@ -277,6 +340,7 @@ def delete_reward(id):
 
     db.session.delete(reward)
     db.session.commit()
+    LuckyDrawRegistry.invalidate()
 
     return jsonify({'message': 'Reward deleted successfully'}), 200
 
@@ -303,20 +367,32 @@ def get_reward_categories():
 
 @bp.route('/available', methods=['GET'])
 @jwt_required()
+@read_only
 def get_available_rewards():
-    """Get all available rewards for customers"""
+    """
+    Get all available rewards for customers.
+    Each reward is annotated with can_redeem / ineligible_reason for the caller;
+    ?eligible_only=true returns only the ones they can redeem right now.
+    """
     # Verify user is a customer
     current_user = get_current_user()
     if not current_user:
         return jsonify({'error': 'Unauthorized'}), 401
 
+    # ?fields=id,title,points_cost,image_url,can_redeem (default: everything)
+    fields = requested_fields()
+
     # Get all active rewards
-    query = Reward.query.filter_by(is_active=True)
+    query = Reward.query.filter(Reward.is_active == True).options(*Reward.load_options(fields))
 
     # Filter by category if provided
     category = request.args.get('category')
     if category:
-        query = query.filter_by(category=category)
+        query = query.filter(Reward.category == category)
+
+    query, reason = with_eligibility(query, current_user)
+    if request.args.get('eligible_only', 'false').lower() == 'true':
+        query = query.filter(reason.is_(None))
 
     # Sort by sort_order, then by points_cost (cheapest first)
     query = query.order_by(Reward.sort_order, Reward.points_cost.asc())
@@ -328,14 +404,14 @@ def get_available_rewards():
     if page:
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         return jsonify({
-            'rewards': [r.to_dict() for r in pagination.items],
+            'rewards': [annotated_reward(*row, fields) for row in pagination.items],
             'total': pagination.total,
             'page': page,
             'pages': pagination.pages
         }), 200
     else:
-        rewards = query.all()
-        return jsonify([r.to_dict() for r in rewards]), 200
+        rows = query.all()
+        return jsonify([annotated_reward(*row, fields) for row in rows]), 200
 
 
 # --- CUSTOMER REDEMPTION ---
@@ -426,30 +502,23 @@ def redeem_reward(id):
 
 @bp.route('/my-rewards', methods=['GET'])
 @jwt_required()
+@read_only
 def get_my_rewards():
     """Get current user's redeemed rewards"""
     current_user = get_current_user()
     if not current_user:
         return jsonify({'error': 'Unauthorized'}), 401
 
-    # Filter by status if provided
+    # Filter by status if provided (expiry is evaluated at read time, the sweeper persists it)
     status = request.args.get('status')
     query = UserReward.query.filter_by(user_id=current_user.id)
 
     if status:
-        query = query.filter_by(status=status)
+        query = query.filter(UserReward.status_filter(status))
 
     # Get rewards ordered by redemption date
     rewards = query.order_by(UserReward.redeemed_at.desc()).all()
 
-    # Auto-expire old rewards
-    now = datetime.utcnow()
-    for reward in rewards:
-        if reward.status == 'active' and reward.is_expired():
-            reward.status = 'expired'
-
-    db.session.commit()
-
     return jsonify([r.to_dict() for r in rewards]), 200
 
 
@@ -587,6 +656,7 @@ def validate_redemption():
     user_reward.used_by_branch_id = current_branch.id
 
     db.session.commit()
+    stick_to_primary(user_reward.user_id)
 
     # Send Notification to User
     NotificationService.send_notification(
@@ -637,3 +707,86 @@ def get_redemptions():
     redemptions = query.order_by(UserReward.redeemed_at.desc()).all()
 
     return jsonify([r.to_dict() for r in redemptions]), 200
+
+
+@bp.route('/redemptions/export', methods=['GET'])
+@jwt_required()
+@read_only
+def export_redemptions():
+    """
+    Stream the merchant's redemptions as CSV (default) or NDJSON, gzipped when accepted.
+
+    Query params: format (csv|ndjson), branch_id (branch where used; main branch only),
+    status, reward_id, month=YYYY-MM or from/to=YYYY-MM-DD on redeemed_at.
+    Non-main branches only get redemptions used at their branch, like /redemptions.
+    """
+    current_branch = get_current_branch()
+    if not current_branch:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    try:
+        start, end = parse_date_range(request.args)
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+
+    used_branch = db.aliased(Branch)
+    valid_branch = db.aliased(Branch)
+    now = datetime.utcnow()
+
+    stmt = db.select(
+        UserReward.id,
+        UserReward.redeemed_at,
+        db.case(
+            (db.and_(UserReward.status == 'active', UserReward.expires_at < now), 'expired'),
+            else_=UserReward.status
+        ),
+        UserReward.source_type,
+        UserReward.reward_id,
+        Reward.title,
+        Reward.reward_type,
+        valid_branch.name,
+        UserReward.user_id,
+        User.username,
+        UserReward.points_spent,
+        UserReward.redemption_code,
+        UserReward.expires_at,
+        UserReward.used_at,
+        UserReward.used_by_branch_id,
+        used_branch.name,
+        UserReward.lucky_draw_history_id
+    ).join(Reward, UserReward.reward_id == Reward.id)\
+     .join(User, UserReward.user_id == User.id)\
+     .outerjoin(valid_branch, Reward.branch_id == valid_branch.id)\
+     .outerjoin(used_branch, UserReward.used_by_branch_id == used_branch.id)\
+     .where(UserReward.merchant_id == current_branch.merchant_id)
+
+    branch_filter = request.args.get('branch_id')
+    if (branch_filter and branch_filter != 'all') or not current_branch.is_main:
+        branch_ids = export_branch_ids(current_branch, branch_filter)
+        if branch_ids is None:
+            return jsonify({'error': 'Branch not found'}), 404
+        stmt = stmt.where(UserReward.used_by_branch_id.in_(branch_ids))
+
+    status = request.args.get('status')
+    if status:
+        stmt = stmt.where(UserReward.status_filter(status, now))
+    if request.args.get('reward_id'):
+        stmt = stmt.where(UserReward.reward_id == request.args['reward_id'])
+    if start:
+        stmt = stmt.where(UserReward.redeemed_at >= start)
+    if end:
+        stmt = stmt.where(UserReward.redeemed_at < end)
+
+    columns = (
+        'redemption_id', 'redeemed_at', 'status', 'source_type', 'reward_id', 'reward_title',
+        'reward_type', 'reward_valid_at_branch', 'member_id', 'member_username', 'points_spent',
+        'redemption_code', 'expires_at', 'used_at', 'used_branch_id', 'used_branch_name',
+        'lucky_draw_history_id'
+    )
+    rows = keyset_rows(stmt, (UserReward.redeemed_at, UserReward.id), current_app.config['EXPORT_BATCH_SIZE'])
+    filename = 'redemptions-' + (request.args.get('month') or now.strftime('%Y%m%d'))
+
+    try:
+        return export_response(request.args.get('format', 'csv').lower(), columns, rows, filename)
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
@@ -5,6 +5,8 @@ from app.models.user import User
 from app.models.merchant import Branch
 from flask_jwt_extended import jwt_required, get_jwt_identity, decode_token
 from app.routes.merchant import get_current_branch
+from app.utils.db_routing import stick_to_primary
+from app.utils.read_only import read_only
 from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
 import json
 
@@ -126,6 +128,7 @@ def award_points():
 
     db.session.add(tx)
     db.session.commit()
+    stick_to_primary(user.id)
 
     # Real-time Notification
     from app.services.notification_service import NotificationService
@@ -153,6 +156,7 @@ def award_points():
 
 @bp.route('/history', methods=['GET'])
 @jwt_required()
+@read_only
 def transaction_history():
     current_identity = get_jwt_identity()
     # Check if user is a member (not a merchant/branch)
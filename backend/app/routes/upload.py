@@ -1,11 +1,19 @@
+import mimetypes
 import os
-import uuid
-from flask import Blueprint, request, jsonify, send_from_directory, current_app
-from werkzeug.utils import secure_filename
+from concurrent.futures import TimeoutError as ProcessTimeout
+from concurrent.futures.process import BrokenProcessPool
+from flask import Blueprint, request, jsonify, send_from_directory, current_app, abort
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import safe_join
+from app.services.image_service import ImageService
+from app.utils.images import ImageError, is_hashed_name, variant_map, url_filename
 
 bp = Blueprint('upload', __name__)
 
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+
+# Cache lifetime for content-hashed files (one year, the conventional "forever")
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
 
 def allowed_file(filename):
     return '.' in filename and \
@@ -13,6 +21,11 @@ def allowed_file(filename):
 
 @bp.route('/upload', methods=['POST'])
 def upload_file():
+    """
+    Upload an image. It is re-encoded into resized WebP/JPEG variants named by content hash
+    (metadata stripped); 'variants' has them all. 'url', for existing clients, is the large JPEG,
+    or for transparent images a PNG and for animated ones the full animation (see url_filename).
+    """
     if 'file' not in request.files:
         return jsonify({'error': 'No file part'}), 400
     file = request.files['file']
@@ -20,24 +33,61 @@ def upload_file():
         return jsonify({'error': 'No selected file'}), 400
     
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        # Generate unique name to prevent overwrite
-        unique_filename = f"{uuid.uuid4().hex}_{filename}"
-        
-        upload_folder = os.path.join(current_app.root_path, '../uploads')
-        if not os.path.exists(upload_folder):
-            os.makedirs(upload_folder)
-            
-        file.save(os.path.join(upload_folder, unique_filename))
-        
-        # Return relative URL
+        try:
+            result = ImageService.process(file.stream)
+        except ImageError as e:
+            return jsonify({'error': str(e)}), 400
+        except (ProcessTimeout, BrokenProcessPool):
+            current_app.logger.error(f"Image processing failed for upload '{file.filename}'")
+            return jsonify({'error': 'Image could not be processed'}), 500
+
+        # Return relative URLs
         # The frontend will prepend the current API_URL
-        file_url = f"/uploads/{unique_filename}"
-        return jsonify({'url': file_url}), 200
+        digest = result['hash']
+        return jsonify({
+            'url': f"/uploads/{url_filename(digest, current_app.config['UPLOAD_FOLDER'])}",
+            'variants': variant_map(digest, result['sizes']),
+            'hash': digest,
+            'deduplicated': result['deduplicated']
+        }), 200
 
     return jsonify({'error': 'File type not allowed'}), 400
 
 @bp.route('/uploads/<filename>')
 def uploaded_file(filename):
-    upload_folder = os.path.join(current_app.root_path, '../uploads')
-    return send_from_directory(upload_folder, filename)
+    """
+    Serve an uploaded file.
+
+    UPLOAD_SERVE_MODE picks who sends the bytes:
+      app               Flask streams the file (Range, ETag/If-None-Match, If-Modified-Since)
+      x-accel-redirect  nginx serves UPLOAD_ACCEL_PREFIX + filename from an `internal` location
+      x-sendfile        Apache/lighttpd mod_xsendfile serves the absolute path
+    Content-hashed names never change content, so they are cached as immutable for a year.
+    """
+    folder = current_app.config['UPLOAD_FOLDER']
+    path = safe_join(folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    mode = current_app.config['UPLOAD_SERVE_MODE']
+    if mode == 'x-accel-redirect':
+        # Empty body: nginx fills it in and handles Range and conditional requests itself,
+        # keeping the Content-Type and Cache-Control set here
+        response = current_app.response_class(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = current_app.config['UPLOAD_ACCEL_PREFIX'].rstrip('/') + '/' + filename
+    else:
+        response = send_from_directory(folder, filename, conditional=True, max_age=0)
+
+    response.cache_control.no_cache = None  # send_file's default for max_age=0
+    response.cache_control.public = True
+    if is_hashed_name(filename):
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = current_app.config['UPLOAD_CACHE_MAX_AGE']
+    return response
+
+
+@bp.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    return jsonify({'error': f"File too large (max {current_app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} MB)"}), 413
@@ -6,7 +6,11 @@ from app.models.lucky_draw import LuckyDraw
 from app.models.lucky_draw_prize import LuckyDrawPrize
 from app.models.lucky_draw_history import LuckyDrawHistory
 from app.models.reward import UserReward
-from app.utils.lucky_draw_utils import select_prize, generate_voucher_code, can_user_spin_today
+from app.services.lucky_draw_registry import LuckyDrawRegistry
+from app.utils.fields import requested_fields
+from app.utils.lucky_draw_utils import (
+    generate_voucher_code, can_user_spin_today, spins_today_by_draw, spin_eligibility
+)
 from datetime import datetime, timedelta
 import json
 
@@ -40,35 +44,36 @@ def get_available_draws():
     if error:
         return jsonify(error), status
 
-    # Get all active draws (Platform-wide or Single Tenant assumption)
-    draws = LuckyDraw.query.filter_by(
-        is_active=True
-    ).all()
+    # ?fields=id,name,image_url,user_can_spin&expand=prizes (default: everything, with prizes)
+    fields = requested_fields(('prizes',))
+
+    # Currently live draws (Platform-wide or Single Tenant assumption), served from the registry
+    # with prizes preloaded, so the only per-user query is the grouped spin count below
+    draws = LuckyDrawRegistry.live_draws()
+
+    # Today's spins for every limited draw in one grouped query
+    limited_ids = [d.id for d in draws if d.max_daily_spins_per_user is not None]
+    spins_by_draw = spins_today_by_draw(user.id, limited_ids) if limited_ids else {}
 
-    # Filter by availability and add user-specific info
+    # Add user-specific info
     available_draws = []
     for draw in draws:
-        # Check standard availability (dates, stock)
-        if not draw.is_available():
-            continue
-
         # For normal list api, usually exclude hidden "Day 7" draws unless we specifically want them
         # User asked to see them, so we include them if active.
         
-        draw_dict = draw.to_dict(include_prizes=True)
+        draw_dict = draw.to_dict(include_prizes=fields.expands('prizes'))
 
         # Add user eligibility info
-        can_spin, spins_today = can_user_spin_today(
-            user.id,
-            draw.id,
-            draw.max_daily_spins_per_user
+        can_spin, spins_today = spin_eligibility(
+            draw.max_daily_spins_per_user,
+            spins_by_draw.get(draw.id, 0)
         )
 
         draw_dict['user_can_spin'] = can_spin
         draw_dict['user_spins_today'] = spins_today
         draw_dict['user_has_enough_points'] = user.points_balance >= draw.points_cost # Use points_balance
 
-        available_draws.append(draw_dict)
+        available_draws.append(fields.filter(draw_dict))
 
     return jsonify({
         'lucky_draws': available_draws,
@@ -122,17 +127,12 @@ def spin_lucky_draw(draw_id):
     if spin_type not in ['day7_checkin', 'points_redemption']:
         return jsonify({'error': 'Invalid spin_type'}), 400
 
-    # Get lucky draw
-    draw = LuckyDraw.query.filter_by(
-        id=draw_id,
-        is_active=True
-    ).first()
+    # Live draw from the registry (active, in its date range, spins left)
+    draw = LuckyDrawRegistry.get(draw_id)
 
     if not draw:
-        return jsonify({'error': 'Lucky draw not found or inactive'}), 404
-
-    # Check availability
-    if not draw.is_available():
+        if not LuckyDraw.query.filter_by(id=draw_id, is_active=True).first():
+            return jsonify({'error': 'Lucky draw not found or inactive'}), 404
         return jsonify({'error': 'Lucky draw is not available'}), 400
 
     # Check daily limit
@@ -161,11 +161,19 @@ def spin_lucky_draw(draw_id):
     if draw.is_day7_draw and spin_type != 'day7_checkin':
         return jsonify({'error': 'This is a Day 7 check-in draw only'}), 400
 
-    # Select prize
-    prize = select_prize(draw_id)
-    if not prize:
+    # Reserve a spin and the prize's stock with the same conditional UPDATEs as the Day 7
+    # check-in, so concurrent spins can never oversell; the registry counts follow on commit
+    if not LuckyDrawRegistry.reserve_spin(draw):
+        return jsonify({'error': 'Lucky draw is not available'}), 400
+
+    selected = LuckyDrawRegistry.claim_prize(draw)
+    if not selected:
+        db.session.rollback()
         return jsonify({'error': 'No prizes available'}), 400
 
+    # Voucher and reward details are not part of the snapshot
+    prize = LuckyDrawPrize.query.get(selected.id)
+
     # Deduct points if needed
     points_spent = 0
     if spin_type == 'points_redemption':
@@ -217,8 +225,8 @@ def spin_lucky_draw(draw_id):
 
         prize_value = {
             'voucher_code': voucher_code,
-            'discount_percent': float(prize.voucher_discount_percent) if prize.voucher_discount_percent else None,
-            'discount_amount': float(prize.voucher_discount_amount) if prize.voucher_discount_amount else None,
+            'discount_percent': float(prize.voucher_discount_percent) if prize.voucher_discount_percent is not None else None,
+            'discount_amount': float(prize.voucher_discount_amount) if prize.voucher_discount_amount is not None else None,
             'description': prize.voucher_description,
             'max_usage': prize.voucher_max_usage,
             'expiry_date': voucher_expiry.isoformat()
@@ -246,14 +254,9 @@ def spin_lucky_draw(draw_id):
     if user_reward_id:
         user_reward.lucky_draw_history_id = history.id
 
-    # Decrement stock
-    prize.decrement_stock()
-    draw.decrement_spins()
-
+    # Stock and spins were reserved above
     db.session.commit()
 
-
-
     return jsonify({
         'message': 'Spin successful!',
         'prize': {
@@ -331,22 +334,13 @@ def get_day7_draw():
     if error:
         return jsonify(error), status
 
-    # Find active Day 7 draw (Assuming single tenant or platform-wide for now)
-    draw = LuckyDraw.query.filter_by(
-        is_day7_draw=True,
-        is_active=True
-    ).first()
+    # Find live Day 7 draw (Assuming single tenant or platform-wide for now)
+    draw = LuckyDrawRegistry.day7_draw()
 
     if not draw:
         return jsonify({
             'has_day7_draw': False,
-            'message': 'No Day 7 lucky draw configured'
-        }), 200
-
-    if not draw.is_available():
-        return jsonify({
-            'has_day7_draw': False,
-            'message': 'Day 7 lucky draw is not available'
+            'message': 'No Day 7 lucky draw available'
         }), 200
 
     draw_dict = draw.to_dict(include_prizes=True)
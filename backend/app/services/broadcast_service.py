@@ -0,0 +1,188 @@
+from datetime import datetime
+import uuid6
+from flask import current_app
+from sqlalchemy import func, select
+from app import db
+from app.models.merchant import Branch
+from app.models.notification import Notification, Broadcast
+from app.models.segment import MemberSegment, SEGMENTS
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.scheduler import run_in_background
+from app.services.socket_service import SocketService, socketio
+
+AUDIENCES = ('all', 'rank', 'branch', 'segment')
+
+# Socket.IO emits sent between two pauses
+EMIT_BATCH_SIZE = 100
+
+
+class BroadcastError(ValueError):
+    """Invalid broadcast request (reported to the caller as a 400)."""
+
+
+class BroadcastService:
+    """
+    Notifications for a whole audience, sent from a background job.
+
+    Recipients are walked in user id order, BROADCAST_CHUNK_SIZE at a time: each chunk is
+    one executemany INSERT into notifications plus the broadcast's progress, committed
+    together, then emitted over Socket.IO in small rate-limited batches that yield to the
+    gevent hub, so API requests keep being served while a broadcast runs.
+    """
+
+    @staticmethod
+    def recipients(merchant_id, audience, value):
+        """select() of the recipient user ids (unordered), always limited to the merchant's own members"""
+        stmt = select(User.id).where(User.deleted_at.is_(None))
+
+        if audience in ('all', 'rank'):
+            # Members who have transacted at any of the merchant's branches
+            stmt = stmt.where(User.id.in_(
+                select(Transaction.member_id)
+                .join(Branch, Transaction.branch_id == Branch.id)
+                .where(Branch.merchant_id == merchant_id)
+            ))
+        if audience == 'rank':
+            stmt = stmt.where(User.rank_filter(value))
+        elif audience == 'branch':
+            # Members who have transacted at the branch
+            stmt = stmt.where(User.id.in_(select(Transaction.member_id).where(Transaction.branch_id == value)))
+        elif audience == 'segment':
+            stmt = stmt.where(User.id.in_(select(MemberSegment.user_id).where(
+                MemberSegment.merchant_id == merchant_id,
+                MemberSegment.segment == value
+            )))
+
+        return stmt
+
+    @staticmethod
+    def validate_audience(merchant_id, audience, value):
+        if audience not in AUDIENCES:
+            raise BroadcastError(f"audience must be one of: {', '.join(AUDIENCES)}")
+        if audience == 'rank' and User.rank_filter(value) is None:
+            raise BroadcastError('audience_value must be a rank: bronze, silver, gold or platinum')
+        if audience == 'segment' and value not in SEGMENTS:
+            raise BroadcastError(f"audience_value must be a segment: {', '.join(SEGMENTS)}")
+        if audience == 'branch' and not Branch.query.filter_by(id=value, merchant_id=merchant_id).first():
+            raise BroadcastError('audience_value must be one of your branch ids')
+
+    @staticmethod
+    def count(merchant_id, audience, value):
+        recipients = BroadcastService.recipients(merchant_id, audience, value).subquery()
+        return db.session.execute(select(func.count()).select_from(recipients)).scalar()
+
+    @staticmethod
+    def create(merchant_id, branch_id, title, body, audience, value=None, type='promotion', data=None):
+        """Validate and queue a broadcast (the caller starts it with start())"""
+        if not title or not body:
+            raise BroadcastError('title and body are required')
+        BroadcastService.validate_audience(merchant_id, audience, value)
+
+        broadcast = Broadcast(
+            merchant_id=merchant_id,
+            created_by_branch_id=branch_id,
+            title=title,
+            body=body,
+            type=type or 'promotion',
+            data=data or {},
+            audience=audience,
+            audience_value=value if audience != 'all' else None,
+            total_recipients=BroadcastService.count(merchant_id, audience, value)
+        )
+        db.session.add(broadcast)
+        db.session.commit()
+        return broadcast
+
+    @staticmethod
+    def start(app, broadcast_id):
+        return run_in_background(app, f'broadcast {broadcast_id}', BroadcastService.run, broadcast_id)
+
+    @staticmethod
+    def resume_pending():
+        """Restart broadcasts left queued or running by a previous process, each in its own background task (startup job)"""
+        pending = [b.id for b in Broadcast.query.filter(Broadcast.status.in_(('queued', 'running'))).order_by(Broadcast.created_at)]
+        db.session.rollback()
+        app = current_app._get_current_object()
+        for broadcast_id in pending:
+            BroadcastService.start(app, broadcast_id)
+
+    @staticmethod
+    def run(broadcast_id):
+        broadcast = db.session.get(Broadcast, broadcast_id)
+        if not broadcast or broadcast.status in ('completed', 'failed'):
+            return
+
+        broadcast.status = 'running'
+        broadcast.started_at = broadcast.started_at or datetime.utcnow()
+        db.session.commit()
+
+        recipients = BroadcastService.recipients(broadcast.merchant_id, broadcast.audience, broadcast.audience_value)
+        chunk_size = current_app.config['BROADCAST_CHUNK_SIZE']
+
+        try:
+            while True:
+                # Re-read the cursor under a row lock: two runners can never send the same chunk
+                db.session.refresh(broadcast, with_for_update=True)
+                if broadcast.status != 'running':
+                    db.session.rollback()
+                    return
+
+                stmt = recipients.order_by(User.id).limit(chunk_size)
+                if broadcast.cursor:
+                    stmt = stmt.where(User.id > broadcast.cursor)
+                user_ids = db.session.execute(stmt).scalars().all()
+                if not user_ids:
+                    break
+
+                now = datetime.utcnow()
+                rows = [
+                    {
+                        'id': str(uuid6.uuid7()),
+                        'user_id': user_id,
+                        'title': broadcast.title,
+                        'body': broadcast.body,
+                        'type': broadcast.type,
+                        'data': broadcast.data,
+                        'is_read': False,
+                        'created_at': now
+                    }
+                    for user_id in user_ids
+                ]
+                db.session.execute(db.insert(Notification), rows)
+                broadcast.cursor = user_ids[-1]
+                broadcast.sent_count += len(rows)
+                db.session.commit()
+
+                _emit(rows)
+                SocketService.emit_to_merchant(broadcast.merchant_id, 'broadcast_progress', broadcast.to_dict())
+
+            broadcast.status = 'completed'
+            broadcast.finished_at = datetime.utcnow()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            broadcast.status = 'failed'
+            broadcast.error = str(e)[:1000]
+            broadcast.finished_at = datetime.utcnow()
+            db.session.commit()
+            raise
+        finally:
+            SocketService.emit_to_merchant(broadcast.merchant_id, 'broadcast_progress', broadcast.to_dict())
+
+
+def _emit(rows):
+    """'new_notification' to each recipient's room, pausing between batches to respect BROADCAST_EMIT_RATE"""
+    pause = EMIT_BATCH_SIZE / current_app.config['BROADCAST_EMIT_RATE']
+    for start in range(0, len(rows), EMIT_BATCH_SIZE):
+        for row in rows[start:start + EMIT_BATCH_SIZE]:
+            SocketService.emit_to_user(row['user_id'], 'new_notification', {
+                'id': row['id'],
+                'title': row['title'],
+                'body': row['body'],
+                'type': row['type'],
+                'data': row['data'],
+                'is_read': False,
+                'created_at': row['created_at'].isoformat()
+            })
+        socketio.sleep(pause)
@@ -0,0 +1,202 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import case, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+from app import db
+from app.models.user import User
+from app.models.check_in import DailyCheckIn, CheckInCalendar
+from app.utils.upsert import dialect_insert
+
+# Columns refreshed from the locked row so add_points() starts from current balances
+POINT_COLUMNS = ('points_balance', 'points_lifetime', 'current_points')
+
+
+class CheckInService:
+    """
+    Exactly-once daily check-in.
+
+    Concurrent taps (or client retries right after midnight UTC) race on the same user row.
+    advance_streak() decides the streak in a single conditional UPDATE, so only one request
+    per user per day gets a row back; the others see the new last_check_in_date and are
+    rejected. record() then inserts the DailyCheckIn with ON CONFLICT DO NOTHING against
+    uq_daily_check_ins_user_date as a second line of defence, and sets the day's bit in the
+    user's CheckInCalendar month.
+    """
+
+    @staticmethod
+    def advance_streak(user, today):
+        """
+        Claim today's check-in for the user and advance the streak atomically.
+
+        The UPDATE locks the user row until commit, and the points columns are re-read from
+        it, so points added afterwards cannot overwrite a concurrent award.
+
+        Returns:
+            The new total_streak, or None if the user already checked in today
+        """
+        yesterday = today - timedelta(days=1)
+
+        row = db.session.execute(
+            update(User)
+            .where(
+                User.id == user.id,
+                or_(User.last_check_in_date.is_(None), User.last_check_in_date != today)
+            )
+            .values(
+                total_streak=case(
+                    (User.last_check_in_date == yesterday, db.func.coalesce(User.total_streak, 0) + 1),
+                    else_=1
+                ),
+                last_check_in_date=today
+            )
+            .returning(User.total_streak, *[getattr(User, c) for c in POINT_COLUMNS])
+            .execution_options(synchronize_session=False)
+        ).first()
+
+        if row is None:
+            return None
+
+        # Sync the loaded instance without marking it dirty
+        set_committed_value(user, 'total_streak', row.total_streak)
+        set_committed_value(user, 'last_check_in_date', today)
+        for column in POINT_COLUMNS:
+            set_committed_value(user, column, getattr(row, column))
+
+        return row.total_streak
+
+    @staticmethod
+    def record(user_id, today, cycle_day, points_earned):
+        """
+        Insert today's DailyCheckIn row unless one already exists, and mark the day in
+        the user's calendar.
+
+        Returns:
+            True if the row was inserted, False if the user already has one for today
+        """
+        # id and created_at come from the column defaults, which Core inserts apply too
+        values = {
+            'user_id': user_id,
+            'check_in_date': today,
+            'streak_day_count': cycle_day,
+            'points_earned': points_earned
+        }
+
+        insert = dialect_insert()
+        if insert:
+            stmt = insert(DailyCheckIn).values(**values).on_conflict_do_nothing(
+                index_elements=['user_id', 'check_in_date']
+            )
+            inserted = db.session.execute(stmt).rowcount == 1
+        else:
+            # Other backends: plain insert inside a savepoint, the unique constraint decides
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(db.insert(DailyCheckIn).values(**values))
+                inserted = True
+            except IntegrityError:
+                inserted = False
+
+        if inserted:
+            CheckInService.mark_calendar_days(user_id, today.year, today.month, 1 << (today.day - 1))
+
+        return inserted
+
+    @staticmethod
+    def mark_calendar_days(user_id, year, month, bits):
+        """OR day bits into the user's month row, creating it if needed (one upsert statement)"""
+        insert = dialect_insert()
+        if insert:
+            stmt = insert(CheckInCalendar).values(user_id=user_id, year=year, month=month, days=bits)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['user_id', 'year', 'month'],
+                set_={'days': CheckInCalendar.days.op('|')(stmt.excluded.days), 'updated_at': db.func.now()}
+            )
+            db.session.execute(stmt)
+            return
+
+        try:
+            with db.session.begin_nested():
+                db.session.execute(db.insert(CheckInCalendar).values(user_id=user_id, year=year, month=month, days=bits))
+        except IntegrityError:
+            db.session.execute(
+                update(CheckInCalendar)
+                .where(
+                    CheckInCalendar.user_id == user_id,
+                    CheckInCalendar.year == year,
+                    CheckInCalendar.month == month
+                )
+                .values(days=CheckInCalendar.days.op('|')(bits))
+                .execution_options(synchronize_session=False)
+            )
+
+    @staticmethod
+    def calendar(user_id, first_month, last_month):
+        """
+        Check-in calendar between two months (inclusive) plus streak statistics.
+
+        Args:
+            first_month, last_month: dates; only year and month are used
+
+        Returns:
+            Dict with 'months' (every month in range, oldest first) and 'stats'
+        """
+        first_index = first_month.year * 12 + first_month.month - 1
+        last_index = last_month.year * 12 + last_month.month - 1
+
+        rows = CheckInCalendar.query.filter(
+            CheckInCalendar.user_id == user_id,
+            CheckInCalendar.year * 12 + CheckInCalendar.month - 1 >= first_index,
+            CheckInCalendar.year * 12 + CheckInCalendar.month - 1 <= last_index
+        ).all()
+        by_month = {(row.year, row.month): row for row in rows}
+
+        months = []
+        history = 0     # bit i = i-th day since the first day of first_month
+        offset = 0
+        for index in range(first_index, last_index + 1):
+            year, month = divmod(index, 12)
+            month += 1
+            row = by_month.get((year, month))
+            bits = row.days if row else 0
+
+            months.append(row.to_dict() if row else {
+                'year': year, 'month': month, 'days': [], 'bitmap': 0, 'count': 0
+            })
+            history |= bits << offset
+            offset += _days_in_month(year, month)
+
+        return {
+            'months': months,
+            'stats': _streak_stats(history, date(first_index // 12, first_index % 12 + 1, 1))
+        }
+
+
+def _days_in_month(year, month):
+    next_month = date(year + (month == 12), month % 12 + 1, 1)
+    return (next_month - date(year, month, 1)).days
+
+
+def _streak_stats(history, start):
+    """Streaks from a day bitmap (bit i = start + i days) using bit operations only"""
+    today_bit = (datetime.utcnow().date() - start).days
+    checked_in_today = bool(history >> today_bit & 1) if today_bit >= 0 else False
+
+    # Longest run of 1s: each x &= x >> 1 shortens every run by one
+    longest, x = 0, history
+    while x:
+        x &= x >> 1
+        longest += 1
+
+    # Current streak: the run ending today, or yesterday if today is still open
+    end = today_bit if checked_in_today else today_bit - 1
+    current = 0
+    if end >= 0 and history >> end & 1:
+        gaps = ~history & ((1 << (end + 1)) - 1)
+        current = end + 1 - gaps.bit_length()
+
+    return {
+        'total_check_ins': bin(history).count('1'),
+        'current_streak': current,
+        'longest_streak': longest,
+        'checked_in_today': checked_in_today
+    }
@@ -0,0 +1,208 @@
+import threading
+from datetime import datetime
+import numpy as np
+from flask import current_app
+from sqlalchemy import extract, func, select
+from app import db
+from app.models.merchant import Branch
+from app.models.transaction import Transaction
+from app.models.user import User
+
+DEFAULT_MONTHS = 12
+MAX_MONTHS = 36
+
+# Bits reserved for the month offset when packing (member, month) into one int64 key
+MONTH_BITS = 20
+
+
+class CohortService:
+    """
+    Signup-month x activity-month retention for a merchant.
+
+    Once per merchant per day, the (member, branch, month) activity of every transaction is
+    pulled with one grouped query, read in yield_per batches and kept as NumPy columns.
+    Only a merchant's first request in a process loads inline; after that the daily reload
+    is done by the cohort_snapshots background job (warm()), and requests keep being served
+    from the previous snapshot (its computed_at says so) until the new one is in.
+    Retention matrices for any branch scope and window are then computed from those
+    columns with vectorised operations (unique / bincount), never with per-cell SQL.
+
+    A member's cohort is the month of their signup (users.created_at, falling back to
+    their first transaction month); they are counted in a cohort only if they transacted
+    in scope. Cell (c, k) is the share of cohort c with a transaction k months later.
+    """
+
+    _lock = threading.Lock()
+    _load_locks = {}    # merchant_id -> Lock held while its snapshot loads
+    _cache = {}         # merchant_id -> (day, (activity columns, computed_at))
+    _used = {}          # merchant_id -> day of its last retention request
+
+    @classmethod
+    def retention(cls, merchant_id, branch_ids=None, months=DEFAULT_MONTHS):
+        """
+        Retention report for the last `months` signup cohorts (current month included).
+
+        Args:
+            branch_ids: Limit activity to these branches (None = every branch of the merchant)
+        """
+        activity, computed_at = cls.activity(merchant_id)
+        now = datetime.utcnow()
+        current = now.year * 12 + now.month - 1
+        first = current - months + 1
+
+        member, month, signup = activity['member'], activity['month'], activity['signup']
+        transactions = activity['transactions']
+        if branch_ids is not None:
+            codes = [activity['branch_codes'][b] for b in branch_ids if b in activity['branch_codes']]
+            mask = np.isin(activity['branch'], codes)
+            member, month, signup, transactions = member[mask], month[mask], signup[mask], transactions[mask]
+
+        sizes = np.zeros(months, dtype=np.int64)
+        active = np.zeros((months, months), dtype=np.int64)
+
+        if member.size:
+            # Members without a signup date join the cohort of their first transaction in scope
+            n_members = int(member.max()) + 1
+            first_month = np.full(n_members, np.iinfo(np.int32).max, dtype=np.int32)
+            np.minimum.at(first_month, member, month)
+            member_signup = np.full(n_members, -1, dtype=np.int32)
+            member_signup[member] = signup
+            member_signup = np.where(member_signup < 0, first_month, member_signup)
+
+            # One (member, month) pair per active month, however many branches or rows it has
+            base = int(month.min())
+            keys = np.unique((member.astype(np.int64) << MONTH_BITS) | (month - base))
+            pair_member = (keys >> MONTH_BITS).astype(np.int32)
+            pair_month = (keys & ((1 << MONTH_BITS) - 1)).astype(np.int32) + base
+
+            cohort = member_signup[pair_member] - first
+            offset = pair_month - member_signup[pair_member]
+            keep = (cohort >= 0) & (offset >= 0) & (offset < months)
+            active = np.bincount(
+                cohort[keep] * months + offset[keep], minlength=months * months
+            ).reshape(months, months)
+
+            in_scope = np.unique(member)
+            member_cohort = member_signup[in_scope] - first
+            sizes = np.bincount(member_cohort[member_cohort >= 0], minlength=months)
+
+        cohorts = []
+        for c in range(months):
+            observed = months - c    # offsets up to the current month
+            size = int(sizes[c])
+            cohorts.append({
+                'month': _month_label(first + c),
+                'size': size,
+                'active': [int(n) for n in active[c, :observed]],
+                'retention': [round(float(n) / size, 4) if size else None for n in active[c, :observed]]
+            })
+
+        # Size-weighted average over the cohorts old enough to have each offset
+        average = []
+        for k in range(months):
+            total = int(sizes[:months - k].sum())
+            average.append(round(float(active[:months - k, k].sum()) / total, 4) if total else None)
+
+        return {
+            'cohorts': cohorts,
+            'average_retention': average,
+            'transactions_in_scope': int(transactions.sum()),
+            'computed_at': computed_at.isoformat()
+        }
+
+    @classmethod
+    def activity(cls, merchant_id):
+        """
+        The merchant's activity snapshot and when it was computed: the cached one, even from
+        a previous day (warm() replaces it), or loaded now on the merchant's first request
+        """
+        cls._used[merchant_id] = datetime.utcnow().date()
+        cached = cls._cache.get(merchant_id)
+        if cached:
+            return cached[1]
+        return cls._reload(merchant_id, datetime.utcnow().date())
+
+    @classmethod
+    def warm(cls):
+        """
+        Daily reload of the cached snapshots (scheduled job, see start_background_jobs).
+        Snapshots of merchants without a retention request since yesterday are dropped instead.
+        """
+        today = datetime.utcnow().date()
+        for merchant_id, (day, _) in list(cls._cache.items()):
+            if day == today:
+                continue
+            if (today - cls._used.get(merchant_id, day)).days > 1:
+                with cls._lock:
+                    cls._cache.pop(merchant_id, None)
+                    cls._used.pop(merchant_id, None)
+                continue
+            cls._reload(merchant_id, today)
+            # Release the connection between merchants
+            db.session.remove()
+
+    @classmethod
+    def _reload(cls, merchant_id, today):
+        # One load per merchant at a time: concurrent callers wait for it instead of repeating
+        # it, while other merchants load (or are served) independently
+        with cls._lock:
+            load_lock = cls._load_locks.setdefault(merchant_id, threading.Lock())
+
+        with load_lock:
+            cached = cls._cache.get(merchant_id)
+            if cached and cached[0] == today:
+                return cached[1]
+
+            entry = (cls._load(merchant_id), datetime.utcnow())
+            with cls._lock:
+                cls._cache[merchant_id] = (today, entry)
+            return entry
+
+    @classmethod
+    def _load(cls, merchant_id):
+        activity_month = _month_index(Transaction.timestamp)
+        signup_month = _month_index(User.created_at)
+
+        stmt = select(
+            Transaction.member_id,
+            Transaction.branch_id,
+            activity_month,
+            signup_month,
+            func.count()
+        ).join(Branch, Transaction.branch_id == Branch.id)\
+         .join(User, Transaction.member_id == User.id)\
+         .where(Branch.merchant_id == merchant_id)\
+         .group_by(Transaction.member_id, Transaction.branch_id, activity_month, signup_month)
+
+        member_codes, branch_codes = {}, {}
+        columns = {'member': [], 'branch': [], 'month': [], 'signup': [], 'transactions': []}
+
+        result = db.session.execute(stmt.execution_options(yield_per=current_app.config['COHORT_BATCH_SIZE']))
+        for rows in result.partitions():
+            member_ids, branches, months, signups, counts = zip(*rows)
+            columns['member'].append(np.fromiter(
+                (member_codes.setdefault(m, len(member_codes)) for m in member_ids), np.int32, len(rows)
+            ))
+            columns['branch'].append(np.fromiter(
+                (branch_codes.setdefault(b, len(branch_codes)) for b in branches), np.int32, len(rows)
+            ))
+            columns['month'].append(np.array(months, dtype=np.int32))
+            columns['signup'].append(np.array([-1 if s is None else s for s in signups], dtype=np.int32))
+            columns['transactions'].append(np.array(counts, dtype=np.int64))
+
+        activity = {
+            name: np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64 if name == 'transactions' else np.int32)
+            for name, parts in columns.items()
+        }
+        activity['branch_codes'] = branch_codes
+        return activity
+
+
+def _month_index(column):
+    """year * 12 + month - 1, as an integer SQL expression"""
+    return db.cast(extract('year', column) * 12 + extract('month', column) - 1, db.Integer)
+
+
+def _month_label(index):
+    year, month = divmod(index, 12)
+    return f'{year:04d}-{month + 1:02d}'
@@ -0,0 +1,205 @@
+import re
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import Integer, String, cast
+from app import db
+from app.models.config import AppConfig, DEFAULT_CONFIG
+from app.utils.json_provider import PreSerialized
+from app.utils.upsert import dialect_insert
+
+# Reserved app_config row holding a counter bumped on every config write
+VERSION_KEY = 'config_version'
+
+TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+FALSE_VALUES = {'0', 'false', 'no', 'off'}
+
+VERSION_PATTERN = re.compile(r'^\d+(\.\d+){0,3}$')
+URL_PATTERN = re.compile(r'^https?://\S+$')
+
+# Value type of each writable DEFAULT_CONFIG key (see ConfigService.normalize)
+CONFIG_TYPES = {
+    'min_version_ios': 'version',
+    'min_version_android': 'version',
+    'store_url_ios': 'url',
+    'store_url_android': 'url',
+    'maintenance_mode': 'bool',
+}
+
+
+class InvalidConfig(ValueError):
+    """A config write with an unknown key or a value of the wrong type (reported as a 400)."""
+
+
+class ConfigService:
+    """
+    Process-local cache of the app_config table.
+
+    The table is loaded once per process and served from memory. At most once every
+    CONFIG_CACHE_POLL_INTERVAL seconds a single primary-key lookup of VERSION_KEY checks
+    whether another process changed the config; writes through set() bump the version
+    and reload locally right away.
+    """
+
+    _lock = threading.Lock()
+    _values = None
+    _version = None
+    _checked_at = 0.0
+    _serialized = None   # (values it was built from, PreSerialized version_config)
+
+    # --- Typed accessors ---
+
+    @classmethod
+    def get(cls, key, default=None):
+        values = cls._current()
+        if key in values:
+            return values[key]
+        return DEFAULT_CONFIG.get(key, default)
+
+    @classmethod
+    def get_bool(cls, key, default=False):
+        value = cls.get(key)
+        if value is None:
+            return default
+        return str(value).strip().lower() in TRUE_VALUES
+
+    @classmethod
+    def get_int(cls, key, default=0):
+        try:
+            return int(cls.get(key))
+        except (TypeError, ValueError):
+            return default
+
+    @classmethod
+    def maintenance_mode(cls):
+        return cls.get_bool('maintenance_mode')
+
+    @classmethod
+    def version_config(cls):
+        """Client-facing config for /config/version: every DEFAULT_CONFIG key, DB values winning"""
+        values = cls._current()
+        return {key: values.get(key, default_val) for key, default_val in DEFAULT_CONFIG.items()}
+
+    @classmethod
+    def version_config_json(cls):
+        """version_config() encoded once per config load, so /config/version never re-encodes it"""
+        values = cls._current()
+        cached = cls._serialized
+        if cached is None or cached[0] is not values:
+            cached = (values, PreSerialized(current_app.json.dumps_bytes(cls.version_config())))
+            cls._serialized = cached
+        return cached[1]
+
+    @classmethod
+    def version(cls):
+        cls._current()
+        return cls._version
+
+    # --- Writes ---
+
+    @staticmethod
+    def normalize(key, value):
+        """
+        The stored string for a config write.
+
+        Raises:
+            InvalidConfig: key is not a DEFAULT_CONFIG key, or value does not fit its type
+        """
+        kind = CONFIG_TYPES.get(key) if key in DEFAULT_CONFIG else None
+        if kind is None:
+            raise InvalidConfig(f'Unknown config key: {key}')
+
+        if kind == 'bool':
+            if isinstance(value, bool):
+                return 'true' if value else 'false'
+            if isinstance(value, str) and value.strip().lower() in TRUE_VALUES | FALSE_VALUES:
+                return 'true' if value.strip().lower() in TRUE_VALUES else 'false'
+            raise InvalidConfig(f'{key} must be true or false')
+
+        if not isinstance(value, str):
+            raise InvalidConfig(f'{key} must be a string')
+        value = value.strip()
+        if kind == 'version' and not VERSION_PATTERN.match(value):
+            raise InvalidConfig(f'{key} must be a version like 1.2.3')
+        if kind == 'url' and not URL_PATTERN.match(value):
+            raise InvalidConfig(f'{key} must be an http(s) URL')
+        if len(value) > AppConfig.value.type.length:
+            raise InvalidConfig(f'{key} is too long')
+        return value
+
+    @classmethod
+    def set_many(cls, updates):
+        """Upsert several keys in one transaction and bump the config version"""
+        for key, value in updates.items():
+            row = AppConfig.query.get(key)
+            if row:
+                row.value = str(value)
+            else:
+                db.session.add(AppConfig(key=key, value=str(value)))
+
+        cls._bump_version()
+        db.session.commit()
+        cls.invalidate()
+
+    @classmethod
+    def set(cls, key, value):
+        cls.set_many({key: value})
+
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            cls._values = None
+            cls._version = None
+            cls._checked_at = 0.0
+
+    # --- Internals ---
+
+    @classmethod
+    def _bump_version(cls):
+        """
+        Increment the version row in one statement, so concurrent writers never lose a bump
+        (an upsert creates the row, where two first writers would otherwise both insert it).
+        """
+        bumped = cast(cast(AppConfig.value, Integer) + 1, String)
+        insert = dialect_insert()
+        if insert:
+            stmt = insert(AppConfig).values(
+                key=VERSION_KEY, value='1', description='Bumped on every config change'
+            )
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=[AppConfig.key], set_={'value': bumped, 'updated_at': datetime.utcnow()}
+            ))
+            return
+
+        # Other backends: conditional UPDATE, inserting only when there was no row to bump
+        updated = db.session.query(AppConfig).filter(AppConfig.key == VERSION_KEY).update(
+            {AppConfig.value: bumped}, synchronize_session=False
+        )
+        if not updated:
+            db.session.add(AppConfig(key=VERSION_KEY, value='1', description='Bumped on every config change'))
+
+    @staticmethod
+    def _read_version():
+        value = db.session.query(AppConfig.value).filter(AppConfig.key == VERSION_KEY).scalar()
+        return int(value) if value is not None else 0
+
+    @classmethod
+    def _current(cls):
+        now = time.monotonic()
+        poll_interval = current_app.config.get('CONFIG_CACHE_POLL_INTERVAL', 30)
+
+        if cls._values is not None and now - cls._checked_at < poll_interval:
+            return cls._values
+
+        with cls._lock:
+            if cls._values is not None and now - cls._checked_at < poll_interval:
+                return cls._values
+
+            version = cls._read_version()
+            if cls._values is None or version != cls._version:
+                cls._values = {c.key: c.value for c in AppConfig.query.all() if c.key != VERSION_KEY}
+                cls._version = version
+
+            cls._checked_at = now
+            return cls._values
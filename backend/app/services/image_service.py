@@ -0,0 +1,98 @@
+import multiprocessing
+from multiprocessing import resource_tracker
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from app.utils.images import process_image, save_stream, stored_sizes
+
+
+class ImageService:
+    """
+    Runs the upload image pipeline (app.utils.images.process_image) in a process pool,
+    so decoding and resizing multi-megabyte photos never blocks the gevent worker.
+
+    Workers are started with 'spawn' on the first upload: a fresh interpreter that only runs
+    Pillow code. A forked child would inherit the monkey-patched gevent hub and threads of the
+    web worker (and log greenlet KeyErrors on every job). Importing main.py again in the child
+    (`python main.py`) is harmless, since background jobs only start from its __main__ block.
+    IMAGE_PROCESS_WORKERS=0 processes images inline instead (development, scripts).
+    """
+
+    _lock = threading.Lock()
+    _executor = None
+
+    @classmethod
+    def process(cls, stream):
+        """
+        Store an uploaded image stream and generate its variants.
+
+        The body is copied to disk in chunks and hashed on the way; if every variant for
+        that hash already exists the pool is skipped entirely.
+
+        Returns:
+            Dict {'hash', 'sizes', 'deduplicated'}
+
+        Raises:
+            ImageError: the data is not an accepted image
+        """
+        folder = current_app.config['UPLOAD_FOLDER']
+        os.makedirs(folder, exist_ok=True)
+
+        path, digest = save_stream(stream, folder)
+        try:
+            sizes = stored_sizes(digest, folder)
+            if sizes:
+                return {'hash': digest, 'sizes': sizes, 'deduplicated': True}
+
+            workers = current_app.config['IMAGE_PROCESS_WORKERS']
+            if not workers:
+                return process_image(path, folder, digest)
+
+            timeout = current_app.config['IMAGE_PROCESS_TIMEOUT']
+            try:
+                return cls._pool(workers).submit(process_image, path, folder, digest).result(timeout=timeout)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM on a huge image): start a fresh pool for the next upload
+                cls.shutdown()
+                raise
+        finally:
+            os.unlink(path)
+
+    @classmethod
+    def shutdown(cls):
+        with cls._lock:
+            if cls._executor:
+                cls._executor.shutdown(wait=False)
+                cls._executor = None
+
+    @classmethod
+    def close(cls, close=os.close, waitpid=os.waitpid):
+        """
+        Stop the pool and spawn's resource tracker process at worker exit (gunicorn.conf.py).
+
+        The tracker exits once its pipe is closed, and is then reaped. Under gevent, pass the
+        unpatched os functions: gevent's close is deferred to the hub, which no longer runs at
+        worker exit, so the tracker would never see the pipe close and waitpid would hang.
+        """
+        with cls._lock:
+            if cls._executor:
+                cls._executor.shutdown(wait=True)
+                cls._executor = None
+        tracker = resource_tracker._resource_tracker
+        with tracker._lock:
+            if tracker._fd is not None and tracker._pid is not None:
+                close(tracker._fd)
+                waitpid(tracker._pid, 0)
+                tracker._fd = tracker._pid = None
+
+    @classmethod
+    def _pool(cls, workers):
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return cls._executor
@@ -0,0 +1,234 @@
+import bisect
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import case, event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models.user import User
+
+# Lower edges of the points_lifetime histogram buckets (1-1.5-2-3-5-7 per decade).
+# The rank thresholds (500, 2000, 5000) are edges, so rank counts are exact.
+BUCKET_EDGES = [0.0] + [
+    mantissa * 10 ** exponent
+    for exponent in range(0, 8)
+    for mantissa in (1, 1.5, 2, 3, 5, 7)
+]
+
+# Extra entries kept beyond LEADERBOARD_SIZE so incremental updates can reorder the tail
+TOP_BUFFER = 50
+
+
+class LeaderboardService:
+    """
+    Process-local points leaderboard.
+
+    rebuild() loads the top LEADERBOARD_SIZE (+ buffer) members by points_lifetime through
+    ix_users_points_lifetime and a bucket histogram of everyone else with one grouped query.
+    Requests never sort or count the users table: top-N is served from the cached list, and
+    a member's position/percentile is interpolated from the histogram (exact inside the top list).
+
+    Committed points changes are applied incrementally (see the session hooks below), so this
+    process sees its own awards immediately; changes made by other processes show up at the
+    next rebuild (every LEADERBOARD_REFRESH_INTERVAL seconds).
+    """
+
+    _lock = threading.RLock()
+    _top = None          # sorted [(-points, user_id)]
+    _entries = {}        # user_id -> entry dict
+    _counts = None       # members per bucket
+    _total = 0
+    _built_at = None
+
+    # --- Reads ---
+
+    @classmethod
+    def top(cls, limit):
+        """Top `limit` members as API dicts, with ties sharing a position"""
+        cls._state()
+        with cls._lock:
+            rows = cls._top[:limit]
+            result = []
+            for i, (neg_points, user_id) in enumerate(rows):
+                if i and neg_points == rows[i - 1][0]:
+                    position = result[-1]['position']
+                else:
+                    position = i + 1
+                result.append({**cls._entries[user_id], 'position': position})
+            return result
+
+    @classmethod
+    def standing(cls, user):
+        """Position and percentile of a member (1 = most lifetime points)"""
+        cls._state()
+        points = user.points_lifetime or 0.0
+
+        with cls._lock:
+            total = max(cls._total, 1)
+            # Anyone with more points than the top list's minimum is in the list,
+            # and a list shorter than its capacity holds every member
+            exact = bool(cls._top) and (len(cls._top) < cls._capacity() or points >= -cls._top[-1][0])
+            if exact:
+                above = bisect.bisect_left(cls._top, (-points, ''))
+            else:
+                above = cls._estimate_above(points)
+
+        position = int(round(above)) + 1
+        return {
+            'position': position,
+            'percentile': round(100.0 * (total - position) / max(total - 1, 1), 1) if total > 1 else 100.0,
+            'total_members': cls._total,
+            'points_lifetime': points,
+            'rank': user.rank,
+            'exact': exact
+        }
+
+    @classmethod
+    def rank_counts(cls):
+        """Members per rank, straight from the histogram"""
+        cls._state()
+        thresholds = (('bronze', 0.0), ('silver', 500.0), ('gold', 2000.0), ('platinum', 5000.0))
+        with cls._lock:
+            counts = {}
+            for i, (rank, low) in enumerate(thresholds):
+                high = thresholds[i + 1][1] if i + 1 < len(thresholds) else None
+                counts[rank] = sum(
+                    count for edge, count in zip(BUCKET_EDGES, cls._counts)
+                    if edge >= low and (high is None or edge < high)
+                )
+            return counts
+
+    @classmethod
+    def updated_at(cls):
+        return cls._built_at
+
+    # --- Maintenance ---
+
+    @classmethod
+    def rebuild(cls):
+        size = current_app.config['LEADERBOARD_SIZE'] + TOP_BUFFER
+        active = User.deleted_at.is_(None)
+
+        # NULL points sort first in descending PostgreSQL order; they count as 0 in the histogram
+        top_users = User.query.filter(active, User.points_lifetime.isnot(None)).order_by(
+            User.points_lifetime.desc(), User.id
+        ).limit(size).all()
+
+        bucket = _bucket_case(db.func.coalesce(User.points_lifetime, 0.0))
+        counts = [0] * len(BUCKET_EDGES)
+        for index, count in db.session.query(bucket, db.func.count(User.id)).filter(active).group_by(bucket):
+            counts[index] = count
+
+        entries = {u.id: _entry(u) for u in top_users}
+        top = sorted((-(u.points_lifetime or 0.0), u.id) for u in top_users)
+
+        with cls._lock:
+            cls._top = top
+            cls._entries = entries
+            cls._counts = counts
+            cls._total = sum(counts)
+            cls._built_at = datetime.utcnow()
+
+    @classmethod
+    def apply_changes(cls, changes):
+        """Apply committed (user, old_points, new_points) changes; old_points is None for new members"""
+        if cls._top is None:
+            return
+
+        capacity = cls._capacity()
+        with cls._lock:
+            for entry, old_points, new_points in changes:
+                if old_points is None:
+                    cls._total += 1
+                else:
+                    cls._counts[_bucket_index(old_points)] -= 1
+                cls._counts[_bucket_index(new_points)] += 1
+
+                user_id = entry['user_id']
+                if user_id in cls._entries:
+                    cls._top.remove((-(cls._entries.pop(user_id)['points_lifetime']), user_id))
+
+                key = (-new_points, user_id)
+                if len(cls._top) < capacity or key < cls._top[-1]:
+                    bisect.insort(cls._top, key)
+                    cls._entries[user_id] = entry
+                    if len(cls._top) > capacity:
+                        _, dropped = cls._top.pop()
+                        cls._entries.pop(dropped, None)
+
+    @classmethod
+    def _capacity(cls):
+        return current_app.config['LEADERBOARD_SIZE'] + TOP_BUFFER
+
+    @classmethod
+    def _estimate_above(cls, points):
+        """Members with more points, assuming points are spread evenly inside each bucket"""
+        index = _bucket_index(points)
+        above = sum(cls._counts[index + 1:])
+        if index + 1 < len(BUCKET_EDGES):
+            low, high = BUCKET_EDGES[index], BUCKET_EDGES[index + 1]
+            above += cls._counts[index] * (high - points) / (high - low)
+        return above
+
+    @classmethod
+    def _state(cls):
+        built_at = cls._built_at
+        stale = (
+            cls._top is None
+            # Safety net for processes without the background refresh job
+            or datetime.utcnow() - built_at > timedelta(seconds=2 * current_app.config['LEADERBOARD_REFRESH_INTERVAL'])
+        )
+        if stale:
+            cls.rebuild()
+
+
+def _entry(user):
+    return {
+        'user_id': user.id,
+        'username': user.username,
+        'profile_pic_url': user.profile_pic_url,
+        'points_lifetime': user.points_lifetime or 0.0,
+        'rank': user.rank
+    }
+
+
+def _bucket_index(points):
+    return max(0, bisect.bisect_right(BUCKET_EDGES, points or 0.0) - 1)
+
+
+def _bucket_case(points):
+    """SQL expression mapping points to the same bucket index as _bucket_index()"""
+    return case(
+        *[(points < BUCKET_EDGES[i + 1], i) for i in range(len(BUCKET_EDGES) - 1)],
+        else_=len(BUCKET_EDGES) - 1
+    )
+
+
+# --- Session hooks: collect points_lifetime changes per transaction, apply them on commit ---
+
+@event.listens_for(Session, 'after_flush')
+def _collect_points_changes(session, flush_context):
+    changes = session.info.setdefault('leaderboard_changes', [])
+
+    for obj in session.new:
+        if isinstance(obj, User) and obj.deleted_at is None:
+            changes.append((_entry(obj), None, obj.points_lifetime or 0.0))
+
+    for obj in session.dirty:
+        if not isinstance(obj, User) or obj.deleted_at is not None:
+            continue
+        history = inspect(obj).attrs.points_lifetime.history
+        if history.added and history.deleted:
+            changes.append((_entry(obj), history.deleted[0] or 0.0, history.added[0] or 0.0))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_points_changes(session):
+    changes = session.info.pop('leaderboard_changes', None)
+    if changes:
+        LeaderboardService.apply_changes(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_points_changes(session):
+    session.info.pop('leaderboard_changes', None)
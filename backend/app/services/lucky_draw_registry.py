@@ -0,0 +1,290 @@
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload
+from app import db
+from app.models.lucky_draw import LuckyDraw
+from app.models.lucky_draw_prize import LuckyDrawPrize
+from app.services.socket_service import socketio
+from app.utils.lucky_draw_utils import weighted_choice
+
+
+class PrizeSnapshot:
+    """In-memory copy of a LuckyDrawPrize row with its serialized form precomputed"""
+
+    def __init__(self, prize):
+        self.id = prize.id
+        self.lucky_draw_id = prize.lucky_draw_id
+        self.prize_type = prize.prize_type
+        self.name = prize.name
+        self.points_amount = prize.points_amount
+        self.reward_id = prize.reward_id
+        self.probability_weight = prize.probability_weight
+        self.stock_remaining = prize.stock_remaining
+        self.data = prize.to_dict()
+
+    def is_available(self):
+        if self.stock_remaining is not None:
+            return self.stock_remaining > 0
+        return True
+
+    def consume(self):
+        """Track a stock decrement committed to the DB"""
+        if self.stock_remaining is not None:
+            self.stock_remaining = max(0, self.stock_remaining - 1)
+            self.data['stock_remaining'] = self.stock_remaining
+
+    def mark_exhausted(self):
+        self.stock_remaining = 0
+        self.data['stock_remaining'] = 0
+
+    def to_dict(self):
+        return self.data
+
+
+class DrawSnapshot:
+    """In-memory copy of an active LuckyDraw with its prizes preloaded"""
+
+    def __init__(self, draw, prizes):
+        self.id = draw.id
+        self.merchant_id = draw.merchant_id
+        self.name = draw.name
+        self.points_cost = draw.points_cost
+        self.is_day7_draw = draw.is_day7_draw
+        self.max_daily_spins_per_user = draw.max_daily_spins_per_user
+        self.total_available_spins = draw.total_available_spins
+        self.remaining_spins = draw.remaining_spins
+        self.start_date = draw.start_date
+        self.end_date = draw.end_date
+        self.prizes = [PrizeSnapshot(p) for p in prizes]
+
+        self.data = draw.to_dict()
+        self.data['prizes'] = [p.data for p in self.prizes]
+
+    def is_available(self, now=None):
+        """Same rules as LuckyDraw.is_available (the snapshot only ever holds active draws)"""
+        now = now or datetime.utcnow()
+
+        if self.start_date and now < self.start_date:
+            return False
+        if self.end_date and now > self.end_date:
+            return False
+
+        if self.total_available_spins is not None and self.remaining_spins is not None:
+            if self.remaining_spins <= 0:
+                return False
+
+        return True
+
+    def consume_spin(self):
+        """Track a remaining_spins decrement committed to the DB"""
+        if self.remaining_spins is not None:
+            self.remaining_spins = max(0, self.remaining_spins - 1)
+            self.data['remaining_spins'] = self.remaining_spins
+
+    def to_dict(self, include_prizes=False):
+        data = dict(self.data)
+        if not include_prizes:
+            data.pop('prizes', None)
+        return data
+
+
+class LuckyDrawRegistry:
+    """
+    Process-local registry of active lucky draws (including the Day 7 draw) with prizes preloaded.
+
+    Hot paths (draw list, Day 7 lookup, check-in) read from here instead of the draw tables.
+    The registry is rebuilt:
+      - lazily after invalidate(), which merchant edits call after committing
+      - by the watch() timer at the next start_date/end_date boundary
+      - at least every LUCKY_DRAW_REGISTRY_REFRESH_INTERVAL seconds, to pick up changes made by other processes
+    Limited stock and limited spins are still reserved with conditional UPDATEs, so a stale
+    snapshot can never over-award; unlimited prizes need no draw-table writes at all.
+    The snapshot counts follow those UPDATEs only once the request commits (session hooks below).
+    """
+
+    _lock = threading.RLock()
+    _draws = None
+    _next_boundary = None
+    _built_at = None
+
+    # --- Reads ---
+
+    @classmethod
+    def live_draws(cls, now=None):
+        now = now or datetime.utcnow()
+        return [d for d in cls._snapshot(now) if d.is_available(now)]
+
+    @classmethod
+    def get(cls, draw_id, now=None):
+        for draw in cls.live_draws(now):
+            if draw.id == draw_id:
+                return draw
+        return None
+
+    @classmethod
+    def day7_draw(cls, now=None):
+        for draw in cls.live_draws(now):
+            if draw.is_day7_draw:
+                return draw
+        return None
+
+    # --- Awarding ---
+
+    @classmethod
+    def reserve_spin(cls, draw):
+        """
+        Take one spin from a draw with limited total spins.
+        Returns False (and invalidates) when the DB says the draw is exhausted.
+        """
+        if draw.total_available_spins is None or draw.remaining_spins is None:
+            return True
+
+        updated = LuckyDraw.query.filter(
+            LuckyDraw.id == draw.id,
+            LuckyDraw.remaining_spins > 0
+        ).update({'remaining_spins': LuckyDraw.remaining_spins - 1}, synchronize_session=False)
+
+        if not updated:
+            cls.invalidate()
+            return False
+
+        db.session.info.setdefault('lucky_draw_consumed', []).append((draw, None))
+        return True
+
+    @classmethod
+    def claim_prize(cls, draw):
+        """
+        Weighted random prize from the snapshot, reserving limited stock atomically.
+        Prizes whose stock turns out to be gone are dropped and the pick is retried.
+
+        Returns:
+            PrizeSnapshot or None if no prize is available
+        """
+        candidates = [p for p in draw.prizes if p.is_available()]
+
+        while candidates:
+            prize = weighted_choice(candidates)
+            if not prize:
+                return None
+
+            if prize.stock_remaining is None:
+                return prize
+
+            updated = LuckyDrawPrize.query.filter(
+                LuckyDrawPrize.id == prize.id,
+                LuckyDrawPrize.stock_remaining > 0
+            ).update({'stock_remaining': LuckyDrawPrize.stock_remaining - 1}, synchronize_session=False)
+
+            if updated:
+                db.session.info.setdefault('lucky_draw_consumed', []).append((draw, prize))
+                return prize
+
+            prize.mark_exhausted()
+            candidates.remove(prize)
+
+        return None
+
+    # --- Maintenance ---
+
+    @classmethod
+    def apply_consumed(cls, consumed):
+        """Count committed spin/stock reservations against the snapshots they were taken from"""
+        with cls._lock:
+            current = cls._draws or ()
+            for draw, prize in consumed:
+                # A snapshot rebuilt since the reservation already reads the new counts
+                if not any(d is draw for d in current):
+                    continue
+                if prize is None:
+                    draw.consume_spin()
+                else:
+                    prize.consume()
+
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            cls._draws = None
+
+    @classmethod
+    def rebuild(cls, now=None):
+        now = now or datetime.utcnow()
+
+        draws = LuckyDraw.query.filter(
+            LuckyDraw.is_active == True,
+            db.or_(LuckyDraw.end_date.is_(None), LuckyDraw.end_date >= now)
+        ).order_by(LuckyDraw.created_at).all()
+
+        prizes_by_draw = {d.id: [] for d in draws}
+        if draws:
+            prizes = LuckyDrawPrize.query.options(
+                joinedload(LuckyDrawPrize.reward)
+            ).filter(
+                LuckyDrawPrize.lucky_draw_id.in_(list(prizes_by_draw))
+            ).order_by(LuckyDrawPrize.display_order, LuckyDrawPrize.created_at).all()
+
+            for prize in prizes:
+                prizes_by_draw[prize.lucky_draw_id].append(prize)
+
+        snapshots = [DrawSnapshot(d, prizes_by_draw[d.id]) for d in draws]
+
+        # Next moment a draw starts or ends; the snapshot is stale from then on
+        boundaries = [dt for d in draws for dt in (d.start_date, d.end_date) if dt and dt > now]
+
+        with cls._lock:
+            cls._draws = snapshots
+            cls._next_boundary = min(boundaries) if boundaries else None
+            cls._built_at = now
+
+        return snapshots
+
+    @classmethod
+    def watch(cls, app):
+        """
+        Timer loop (run as a background task): rebuild at every start/end boundary,
+        and at least once per refresh interval so timers can never drift far.
+        """
+        while True:
+            with app.app_context():
+                try:
+                    cls.rebuild()
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"Lucky draw registry rebuild failed: {e}")
+                finally:
+                    db.session.remove()
+
+                delay = app.config['LUCKY_DRAW_REGISTRY_REFRESH_INTERVAL']
+                if cls._next_boundary:
+                    until_boundary = (cls._next_boundary - datetime.utcnow()).total_seconds()
+                    delay = max(0.1, min(delay, until_boundary + 0.1))
+
+            socketio.sleep(delay)
+
+    @classmethod
+    def _snapshot(cls, now):
+        draws = cls._draws
+        stale = (
+            draws is None
+            or (cls._next_boundary and now >= cls._next_boundary)
+            # Safety net for processes without the watch() timer
+            or now - cls._built_at > timedelta(seconds=2 * current_app.config['LUCKY_DRAW_REGISTRY_REFRESH_INTERVAL'])
+        )
+        if stale:
+            draws = cls.rebuild(now)
+        return draws
+
+
+# --- Session hooks: snapshot decrements follow the commit of the reserving transaction ---
+
+@event.listens_for(Session, 'after_commit')
+def _apply_consumed(session):
+    consumed = session.info.pop('lucky_draw_consumed', None)
+    if consumed:
+        LuckyDrawRegistry.apply_consumed(consumed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_consumed(session):
+    session.info.pop('lucky_draw_consumed', None)
@@ -0,0 +1,328 @@
+import time
+import numpy as np
+
+# Spin timeline resolution of the report
+DEFAULT_BUCKETS = 20
+MAX_BUCKETS = 100
+
+DEFAULT_RUNS = 10
+MAX_RUNS = 200
+
+# Prizes per simulation (draws are configured with a handful; keeps each batch cheap)
+MAX_PRIZES = 100
+
+# Horizon used when the draw has no remaining_spins limit
+DEFAULT_UNLIMITED_SPINS = 100_000
+
+# Smallest batch of spins sampled at once
+MIN_CHUNK = 4096
+
+# Stock value used in the arrays for "unlimited"
+UNLIMITED = -1
+
+
+class SimulationError(ValueError):
+    """Invalid simulation parameters (reported to the caller as a 400)."""
+
+
+class LuckyDrawSimulator:
+    """
+    Monte Carlo simulation of a lucky draw's prize configuration.
+
+    Replays `spins` spins `runs` times with the same rules as the spin endpoint: weighted
+    choice among in-stock prizes, a prize drops out when its stock hits 0, and the draw
+    ends when remaining_spins runs out or no prize is left. Per-user daily limits are
+    not modelled (they shape who spins, not what is won).
+
+    Each run is vectorised: spins are sampled in large NumPy batches over the prizes in
+    stock, and spins landing on a prize after it ran dry within the batch are dropped
+    (rejection sampling), so every stock-out in a batch is resolved in one pass.
+    """
+
+    @staticmethod
+    def prize_config(prizes, overrides=None):
+        """
+        Arrays describing the prizes, with optional what-if overrides.
+
+        Args:
+            prizes: LuckyDrawPrize rows (reward relationship used for reward prize value)
+            overrides: Optional {prize_id: {'probability_weight': int, 'stock_remaining': int|None}}
+
+        Returns:
+            Tuple (prizes_meta list, weights array, stock array, points_value array)
+        """
+        if len(prizes) > MAX_PRIZES:
+            raise SimulationError(f'Simulation supports at most {MAX_PRIZES} prizes')
+
+        overrides = overrides or {}
+        unknown = set(overrides) - {p.id for p in prizes}
+        if unknown:
+            raise SimulationError(f"Unknown prize id(s): {', '.join(sorted(unknown))}")
+
+        meta, weights, stock, value = [], [], [], []
+        for prize in prizes:
+            override = overrides.get(prize.id, {})
+
+            weight = override.get('probability_weight', prize.probability_weight)
+            remaining = override.get('stock_remaining', prize.stock_remaining)
+            if not isinstance(weight, int) or weight < 0:
+                raise SimulationError('probability_weight must be a non-negative integer')
+            if remaining is not None and (not isinstance(remaining, int) or remaining < 0):
+                raise SimulationError('stock_remaining must be a non-negative integer or null')
+
+            # Points handed out per win: points prizes at face value, rewards at their
+            # points cost, vouchers have no points value
+            if prize.prize_type == 'points':
+                points_value = prize.points_amount or 0
+            elif prize.prize_type == 'reward' and prize.reward:
+                points_value = prize.reward.points_cost or 0
+            else:
+                points_value = 0
+
+            meta.append({
+                'prize_id': prize.id,
+                'prize_name': prize.name,
+                'prize_type': prize.prize_type,
+                'probability_weight': weight,
+                'stock_remaining': remaining,
+                'points_value': points_value
+            })
+            weights.append(weight)
+            stock.append(UNLIMITED if remaining is None else remaining)
+            value.append(points_value)
+
+        return (
+            meta,
+            np.array(weights, dtype=np.float64),
+            np.array(stock, dtype=np.int64),
+            np.array(value, dtype=np.float64)
+        )
+
+    @staticmethod
+    def simulate(weights, stock, points_value, spins, runs=DEFAULT_RUNS, buckets=DEFAULT_BUCKETS, seed=None):
+        """
+        Run the simulation and return raw per-run results.
+
+        Args:
+            weights: Float array of probability weights, one per prize
+            stock: Int array of remaining stock (UNLIMITED for no limit)
+            points_value: Float array of points handed out per win
+            spins: Spins attempted per run (already capped by remaining_spins)
+            runs: Independent replications
+            buckets: Number of equal spin ranges in the timeline
+            seed: Optional RNG seed for reproducible results
+
+        Returns:
+            Dict of NumPy arrays:
+                wins (runs, prizes), timeline (runs, buckets, prizes),
+                stockout_at (runs, prizes; 0 = never), completed (runs,), points (runs,)
+        """
+        rng = np.random.default_rng(seed)
+        n_prizes = len(weights)
+        buckets = max(1, min(buckets, spins))
+
+        timeline = np.zeros((runs, buckets, n_prizes), dtype=np.int64)
+        stockout_at = np.zeros((runs, n_prizes), dtype=np.int64)
+        completed = np.zeros(runs, dtype=np.int64)
+
+        for r in range(runs):
+            timeline[r], stockout_at[r], completed[r] = LuckyDrawSimulator._run(
+                rng, weights, stock.copy(), spins, buckets
+            )
+
+        wins = timeline.sum(axis=1)
+        return {
+            'wins': wins,
+            'timeline': timeline,
+            'stockout_at': stockout_at,
+            'completed': completed,
+            'points': wins @ points_value
+        }
+
+    @staticmethod
+    def _run(rng, weights, stock, spins, buckets):
+        n_prizes = len(weights)
+        counts = np.zeros(buckets * n_prizes, dtype=np.int64)
+        stockout_at = np.zeros(n_prizes, dtype=np.int64)
+        active = (weights > 0) & (stock != 0)
+        pos = 0
+
+        while pos < spins:
+            candidates = np.flatnonzero(active)
+            if candidates.size == 0:
+                break  # every prize is out of stock: the spin endpoint refuses further spins
+
+            cumulative = np.cumsum(weights[candidates])
+            n = spins - pos
+            limited = candidates[stock[candidates] > 0]
+
+            if limited.size == 0:
+                # Nothing left to run dry: the rest of the run is one multinomial per bucket
+                probs = np.zeros(n_prizes)
+                probs[candidates] = weights[candidates] / cumulative[-1]
+                edges = LuckyDrawSimulator._bucket_edges(spins, buckets)
+                for b in range(buckets):
+                    size = max(0, edges[b + 1] - max(edges[b], pos))
+                    if size:
+                        counts[b * n_prizes:(b + 1) * n_prizes] += rng.multinomial(size, probs)
+                pos = spins
+                break
+
+            # Sample about twice the expected distance to the next stock-out, not the whole
+            # horizon: small stocks would otherwise throw away nearly all of a huge sample
+            expected = np.min(stock[limited] * cumulative[-1] / weights[limited])
+            n = min(n, max(MIN_CHUNK, int(2 * expected)))
+            draws = candidates[np.searchsorted(cumulative, rng.random(n) * cumulative[-1], side='right')]
+
+            # Every limited prize whose last unit is handed out within the chunk, in one pass:
+            # a stable sort groups each prize's hits in spin order, so its stock[p]-th hit is
+            # found by index instead of scanning the chunk once per prize
+            # Prize indexes fit in int16 (MAX_PRIZES), for which numpy's stable sort is a linear radix sort
+            order = np.argsort(draws.astype(np.int16), kind='stable')
+            grouped = draws[order]
+            first_hit = np.searchsorted(grouped, limited, side='left')
+            hit_count = np.searchsorted(grouped, limited, side='right') - first_hit
+            runs_dry = hit_count >= stock[limited]
+            dry = limited[runs_dry]
+            last_unit = order[first_hit[runs_dry] + stock[dry] - 1]
+
+            # Spins that land on a prize after it ran dry are rejected: conditioned on not being
+            # that prize, a sample is a spin over the remaining prizes, so the rest of the chunk
+            # stays valid instead of being resampled after every stock-out
+            cutoff = np.full(n_prizes, n)
+            cutoff[dry] = last_unit
+            kept = np.arange(n) <= cutoff[draws]
+            taken = draws[kept]
+            accepted = np.cumsum(kept)
+
+            bucket_of = (np.arange(pos, pos + taken.size) * buckets) // spins
+            counts += np.bincount(bucket_of * n_prizes + taken, minlength=buckets * n_prizes)
+            won = np.bincount(taken, minlength=n_prizes)
+            stock[limited] -= won[limited]
+            stockout_at[dry] = pos + accepted[last_unit]
+            active[dry] = False
+            pos += taken.size
+
+        return counts.reshape(buckets, n_prizes), stockout_at, pos
+
+    @staticmethod
+    def _bucket_edges(spins, buckets):
+        # Same split as the (i * buckets) // spins bucket index used for sampled spins
+        return [-(-b * spins // buckets) for b in range(buckets + 1)]
+
+    @staticmethod
+    def report(meta, result, spins, points_cost, remaining_spins):
+        """
+        Summarise raw simulation results for the API.
+
+        Every statistic is {'mean', 'ci95': [low, high], 'p05', 'p95'}: ci95 is the 95%
+        confidence interval of the mean, p05/p95 the spread between individual runs.
+        """
+        runs = len(result['completed'])
+        completed = result['completed'].astype(np.float64)
+        safe_completed = np.maximum(completed, 1)
+        buckets = result['timeline'].shape[1]
+        edges = LuckyDrawSimulator._bucket_edges(spins, buckets)
+
+        prizes = []
+        for i, prize in enumerate(meta):
+            stocked_out = result['stockout_at'][:, i] > 0
+            prizes.append({
+                **prize,
+                'wins': _summary(result['wins'][:, i]),
+                'win_rate': _summary(result['wins'][:, i] / safe_completed),
+                'stock_out_probability': round(float(stocked_out.mean()), 4),
+                # Spin number of the stock-out, over the runs where it happened
+                'stock_out_spin': _summary(result['stockout_at'][stocked_out, i]) if stocked_out.any() else None
+            })
+
+        mean_timeline = result['timeline'].mean(axis=0)
+        timeline = [
+            {
+                'from_spin': edges[b] + 1,
+                'to_spin': edges[b + 1],
+                'expected_wins': {
+                    prize['prize_id']: round(float(mean_timeline[b, i]), 3)
+                    for i, prize in enumerate(meta)
+                }
+            }
+            for b in range(buckets)
+        ]
+
+        points_per_spin = result['points'] / safe_completed
+        ended_early = completed < spins
+
+        return {
+            'runs': runs,
+            'spins_per_run': spins,
+            'remaining_spins': remaining_spins,
+            'spins_completed': _summary(completed),
+            # Runs where every prize ran out before the horizon
+            'prizes_exhausted_probability': round(float(ended_early.mean()), 4),
+            'points_cost_per_spin': _summary(points_per_spin),
+            'points_revenue_per_spin': points_cost,
+            'net_points_per_spin': _summary(points_cost - points_per_spin),
+            'prizes': prizes,
+            'timeline': timeline
+        }
+
+    @staticmethod
+    def run_for_draw(draw, prizes, spins=None, runs=DEFAULT_RUNS, buckets=DEFAULT_BUCKETS,
+                     seed=None, overrides=None, remaining_spins=None, max_total_spins=None):
+        """
+        Simulate a draw's current (or what-if) configuration and return the API report.
+
+        Args:
+            draw: LuckyDraw row
+            prizes: Its LuckyDrawPrize rows
+            spins: Spins per run (default: the draw's remaining spins, or DEFAULT_UNLIMITED_SPINS)
+            remaining_spins: What-if override of draw.remaining_spins
+            max_total_spins: Cap on spins * runs to keep the request interactive
+        """
+        if not prizes:
+            raise SimulationError('Lucky draw has no prizes to simulate')
+        if remaining_spins is not None and (not isinstance(remaining_spins, int) or remaining_spins < 0):
+            raise SimulationError('remaining_spins must be a non-negative integer')
+        if seed is not None and (not isinstance(seed, int) or seed < 0):
+            raise SimulationError('seed must be a non-negative integer')
+
+        if remaining_spins is None and draw.total_available_spins is not None:
+            remaining_spins = draw.remaining_spins
+
+        if spins is None:
+            spins = remaining_spins if remaining_spins is not None else DEFAULT_UNLIMITED_SPINS
+        if remaining_spins is not None:
+            spins = min(spins, remaining_spins)
+
+        if not isinstance(runs, int) or not 1 <= runs <= MAX_RUNS:
+            raise SimulationError(f'runs must be between 1 and {MAX_RUNS}')
+        if not isinstance(buckets, int) or not 1 <= buckets <= MAX_BUCKETS:
+            raise SimulationError(f'buckets must be between 1 and {MAX_BUCKETS}')
+        if not isinstance(spins, int) or spins < 1:
+            raise SimulationError('Nothing to simulate: spins must be a positive integer and the draw must have spins left')
+        if max_total_spins and spins * runs > max_total_spins:
+            raise SimulationError(f'spins * runs must not exceed {max_total_spins}')
+
+        meta, weights, stock, points_value = LuckyDrawSimulator.prize_config(prizes, overrides)
+
+        started = time.perf_counter()
+        result = LuckyDrawSimulator.simulate(weights, stock, points_value, spins, runs, buckets, seed)
+        report = LuckyDrawSimulator.report(meta, result, spins, draw.points_cost, remaining_spins)
+        report['elapsed_ms'] = round(1000 * (time.perf_counter() - started), 1)
+
+        return report
+
+
+def _summary(values):
+    values = np.asarray(values, dtype=np.float64)
+    mean = float(values.mean())
+    # Normal approximation of the mean's 95% interval; a single run has no spread
+    half_width = 1.96 * float(values.std(ddof=1)) / np.sqrt(values.size) if values.size > 1 else 0.0
+    p05, p95 = np.percentile(values, [5, 95])
+
+    return {
+        'mean': round(mean, 4),
+        'ci95': [round(mean - half_width, 4), round(mean + half_width, 4)],
+        'p05': round(float(p05), 4),
+        'p95': round(float(p95), 4)
+    }
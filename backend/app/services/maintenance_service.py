@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models.reward import UserReward
+from app.models.user import User
+from app.models.check_in import DailyCheckIn
+from app.models.menu import MenuChange
+from app.models.config import AppConfig, DEFAULT_CONFIG
+from app.services.config_service import ConfigService
+from app.services.socket_service import socketio
+
+
+class MaintenanceService:
+    """
+    Writes that used to piggyback on read endpoints.
+    Everything here runs from background jobs (see app.services.scheduler), never from a request.
+    """
+
+    @staticmethod
+    def expire_rewards_batch(batch_size=500, now=None):
+        """
+        Flip one bounded batch of past-due active UserRewards to 'expired'.
+        Walks ix_user_rewards_status_expires_at and skips rows locked by in-flight redemptions.
+
+        Returns:
+            Number of rows expired
+        """
+        now = now or datetime.utcnow()
+
+        ids = [row.id for row in db.session.query(UserReward.id).filter(
+            UserReward.status == 'active',
+            UserReward.expires_at < now
+        ).order_by(
+            UserReward.expires_at
+        ).limit(batch_size).with_for_update(skip_locked=True).all()]
+
+        if not ids:
+            db.session.rollback()
+            return 0
+
+        UserReward.query.filter(
+            UserReward.id.in_(ids),
+            UserReward.status == 'active'
+        ).update({'status': 'expired'}, synchronize_session=False)
+        db.session.commit()
+
+        return len(ids)
+
+    @staticmethod
+    def sweep_expired_rewards(batch_size=None, max_batches=None):
+        """
+        Expire rewards batch by batch until none are left (or max_batches is hit).
+        Each batch commits on its own so no transaction holds locks for long.
+        """
+        batch_size = batch_size or current_app.config['REWARD_EXPIRY_BATCH_SIZE']
+        total = 0
+        batches = 0
+
+        while True:
+            expired = MaintenanceService.expire_rewards_batch(batch_size)
+            total += expired
+            batches += 1
+
+            if expired < batch_size or (max_batches and batches >= max_batches):
+                break
+
+            # Let request greenlets run between batches
+            socketio.sleep(0)
+
+        if total:
+            current_app.logger.info(f"Reward expiry sweep: expired {total} rewards in {batches} batches")
+
+        return total
+
+    @staticmethod
+    def prune_daily_check_ins(retention_days=None, batch_size=1000):
+        """
+        Delete DailyCheckIn rows older than the retention window.
+        History lives on in check_in_calendars; only today's rows matter for the one-per-day constraint.
+        """
+        retention_days = retention_days or current_app.config['CHECK_IN_RETENTION_DAYS']
+        if not retention_days:
+            return 0
+
+        cutoff = datetime.utcnow().date() - timedelta(days=retention_days)
+        total = 0
+
+        while True:
+            ids = [row.id for row in db.session.query(DailyCheckIn.id).filter(
+                DailyCheckIn.check_in_date < cutoff
+            ).limit(batch_size).all()]
+
+            if not ids:
+                db.session.rollback()
+                break
+
+            DailyCheckIn.query.filter(DailyCheckIn.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            total += len(ids)
+
+            socketio.sleep(0)
+
+        if total:
+            current_app.logger.info(f"Check-in prune: deleted {total} rows older than {cutoff}")
+
+        return total
+
+    @staticmethod
+    def prune_menu_changes(retention_days=None, batch_size=1000):
+        """
+        Delete menu change log rows (tombstones included) older than the retention window.
+        Clients whose sync token is older than that get a full menu reset instead of a delta.
+        """
+        retention_days = retention_days or current_app.config['MENU_CHANGES_RETENTION_DAYS']
+        if not retention_days:
+            return 0
+
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        total = 0
+
+        while True:
+            ids = [row.id for row in db.session.query(MenuChange.id).filter(
+                MenuChange.changed_at < cutoff
+            ).limit(batch_size).all()]
+
+            if not ids:
+                db.session.rollback()
+                break
+
+            MenuChange.query.filter(MenuChange.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            total += len(ids)
+
+            socketio.sleep(0)
+
+        if total:
+            current_app.logger.info(f"Menu change log prune: deleted {total} rows older than {cutoff}")
+
+        return total
+
+    @staticmethod
+    def backfill_referral_codes(batch_size=500):
+        """Give legacy users without a referral code one (previously done lazily on /auth/login and /auth/me)"""
+        total = 0
+
+        while True:
+            users = User.query.filter(User.referral_code.is_(None)).limit(batch_size).all()
+            if not users:
+                break
+
+            for user in users:
+                code = User.generate_referral_code()
+                while User.query.filter_by(referral_code=code).first():
+                    code = User.generate_referral_code()
+                user.referral_code = code
+
+            db.session.commit()
+            total += len(users)
+
+        return total
+
+    @staticmethod
+    def seed_config_defaults():
+        """Insert any DEFAULT_CONFIG keys missing from app_config so admins can edit them"""
+        existing = {key for (key,) in db.session.query(AppConfig.key).all()}
+        missing = [key for key in DEFAULT_CONFIG if key not in existing]
+
+        for key in missing:
+            db.session.add(AppConfig(key=key, value=DEFAULT_CONFIG[key], description=f"Auto-seeded {key}"))
+
+        if missing:
+            db.session.commit()
+            ConfigService.invalidate()
+
+        return len(missing)
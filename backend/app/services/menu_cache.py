@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.menu import MenuCategory, Product, ProductOptionGroup, ProductOption
+from app.utils.json_provider import PreSerialized
+
+# Every branch's entries (changes that cannot be tied to one branch)
+ALL_BRANCHES = '*'
+
+
+class MenuCache:
+    """
+    Process-local cache of the public /customer/menu responses, already JSON-encoded.
+
+    Entries are PreSerialized, so a hit costs neither a query nor an encode, and the
+    compression middleware keeps its gzip/brotli copies on the entry: a hot menu is
+    compressed once per MENU_CACHE_TTL. Menu writes committed by this process drop the
+    branch's entries immediately (session hooks below); other processes pick them up
+    when their entries expire.
+
+    Keys come from public query parameters, so the cache is an LRU of at most
+    MENU_CACHE_MAX_ENTRIES entries, and empty results (e.g. an unknown branch id) are
+    never stored.
+    """
+
+    _lock = threading.Lock()
+    _entries = OrderedDict()   # (kind, branch_id, *params) -> (expires_at, PreSerialized), least recent first
+
+    @classmethod
+    def get(cls, key, build):
+        """The cached payload for key, or build() encoded and stored (key[1] must be the branch id)"""
+        ttl = current_app.config['MENU_CACHE_TTL']
+        if not ttl:
+            return build()
+
+        now = time.monotonic()
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry and entry[0] > now:
+                cls._entries.move_to_end(key)
+                return entry[1]
+
+        data = build()
+        if not data:
+            return data
+
+        payload = PreSerialized(current_app.json.dumps_bytes(data))
+        max_entries = current_app.config['MENU_CACHE_MAX_ENTRIES']
+        with cls._lock:
+            cls._entries[key] = (now + ttl, payload)
+            cls._entries.move_to_end(key)
+            while len(cls._entries) > max_entries:
+                cls._entries.popitem(last=False)
+        return payload
+
+    @classmethod
+    def invalidate(cls, branch_ids):
+        with cls._lock:
+            if ALL_BRANCHES in branch_ids:
+                cls._entries.clear()
+            else:
+                for key in [k for k in cls._entries if k[1] in branch_ids]:
+                    del cls._entries[key]
+
+
+# --- Session hooks: collect the branches whose menu changed, invalidate on commit ---
+
+@event.listens_for(Session, 'after_flush')
+def _collect_menu_changes(session, flush_context):
+    branches = None
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (MenuCategory, Product, ProductOptionGroup)):
+            branch_id = obj.branch_id
+        elif isinstance(obj, ProductOption):
+            branch_id = ALL_BRANCHES
+        else:
+            continue
+        if branches is None:
+            branches = session.info.setdefault('menu_cache_branches', set())
+        branches.add(branch_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_menu_cache(session):
+    branches = session.info.pop('menu_cache_branches', None)
+    if branches:
+        MenuCache.invalidate(branches)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_menu_changes(session):
+    session.info.pop('menu_cache_branches', None)
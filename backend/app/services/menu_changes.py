@@ -0,0 +1,208 @@
+import re
+import time
+from datetime import datetime
+import uuid6
+from flask import current_app
+from sqlalchemy import event, or_, and_
+from sqlalchemy.orm import Session, selectinload
+from app import db
+from app.models.menu import (
+    MenuCategory, Product, ProductOptionGroup, ProductOption, Collection, CollectionItem, MenuChange,
+    product_options_association
+)
+
+# Logged entities and their keys in the /customer/menu/changes response
+ENTITY_KEYS = {
+    'category': 'categories',
+    'product': 'products',
+    'option_group': 'option_groups',
+    'collection': 'collections',
+}
+
+# Tokens have the shape of the uuid7 change ids they are compared with
+TOKEN_PATTERN = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
+
+
+class InvalidChangeToken(ValueError):
+    """A ?since= token this server did not issue (reported to the caller as a 400)."""
+
+
+class MenuChangeLog:
+    """
+    Delta sync of a branch's menu: products, categories, option groups and collections.
+
+    Every menu write is logged to menu_changes in its own transaction (session hooks below),
+    deletes as tombstones. A client keeps a local copy and asks for the changes since the token
+    of its last sync. Tokens are points in time, set MENU_CHANGES_SETTLE_SECONDS in the past,
+    so a change committed a moment after a sync (but with an earlier id) is not skipped: the
+    next sync sees it again instead. Upserts are idempotent, so re-sent changes are harmless.
+    A token older than MENU_CHANGES_RETENTION_DAYS (tombstones may be pruned) gets a reset.
+    """
+
+    @staticmethod
+    def token_at(epoch_seconds):
+        """The token sorting before every change id generated from epoch_seconds on"""
+        ms = f'{int(epoch_seconds * 1000):012x}'
+        return f'{ms[:8]}-{ms[8:]}-0000-0000-000000000000'
+
+    @staticmethod
+    def token_time(token):
+        """Epoch seconds a token (or change id) stands for"""
+        if not TOKEN_PATTERN.match(token):
+            raise InvalidChangeToken('Invalid since token')
+        return int(token[:8] + token[9:13], 16) / 1000
+
+    @classmethod
+    def changes(cls, branch, since=None, fields=None):
+        """
+        What changed in the branch's menu since a token (None: the whole menu).
+
+        Returns:
+            Dict with the next token, reset (True: replace the local copy), the upserted rows
+            per entity and the ids of deleted ones under 'deleted'
+        """
+        now = time.time()
+        token = cls.token_at(now - current_app.config['MENU_CHANGES_SETTLE_SECONDS'])
+
+        reset = since is None
+        if since is not None:
+            retention_days = current_app.config['MENU_CHANGES_RETENTION_DAYS']
+            reset = bool(retention_days) and cls.token_time(since) < now - retention_days * 86400
+
+        if reset:
+            upserts = {entity: None for entity in ENTITY_KEYS}
+            deleted = {entity: set() for entity in ENTITY_KEYS}
+        else:
+            upserts, deleted = cls._changed_ids(branch, since, fields)
+
+        data = {'token': token, 'reset': reset}
+        for entity, key in ENTITY_KEYS.items():
+            rows = cls._load(entity, branch, upserts[entity], fields)
+            if upserts[entity] is not None:
+                # Changed, then deleted or moved to another branch: gone as far as this branch is concerned
+                deleted[entity].update(upserts[entity] - {row['id'] for row in rows})
+            data[key] = rows
+        data['deleted'] = {ENTITY_KEYS[entity]: sorted(ids) for entity, ids in deleted.items()}
+        return data
+
+    @classmethod
+    def _changed_ids(cls, branch, since, fields):
+        rows = db.session.query(MenuChange.entity, MenuChange.entity_id, MenuChange.action).filter(
+            or_(
+                MenuChange.branch_id == branch.id,
+                and_(MenuChange.branch_id.is_(None), MenuChange.merchant_id == branch.merchant_id)
+            ),
+            MenuChange.id > since
+        ).order_by(MenuChange.id).all()
+
+        # The latest action per row wins
+        latest = {}
+        for entity, entity_id, action in rows:
+            latest[(entity, entity_id)] = action
+
+        upserts = {entity: set() for entity in ENTITY_KEYS}
+        deleted = {entity: set() for entity in ENTITY_KEYS}
+        for (entity, entity_id), action in latest.items():
+            if entity in ENTITY_KEYS:
+                (deleted if action == 'delete' else upserts)[entity].add(entity_id)
+
+        # Products embed their option groups, so the products using a changed group are re-sent too
+        if upserts['option_group'] and (fields is None or fields.expands('options')):
+            upserts['product'].update(product_id for (product_id,) in db.session.query(
+                product_options_association.c.product_id
+            ).filter(
+                product_options_association.c.option_group_id.in_(upserts['option_group'])
+            ).distinct())
+
+        return upserts, deleted
+
+    @staticmethod
+    def _load(entity, branch, ids, fields):
+        """Serialized rows of the branch (all of them when ids is None)"""
+        if ids is not None and not ids:
+            return []
+
+        if entity == 'category':
+            query = MenuCategory.query.filter_by(branch_id=branch.id).order_by(MenuCategory.sort_order)
+            model = MenuCategory
+        elif entity == 'product':
+            query = Product.query.filter_by(branch_id=branch.id)
+            if fields is not None:
+                query = query.options(*Product.load_options(fields))
+            query = query.order_by(Product.is_active.desc(), Product.name)
+            model = Product
+        elif entity == 'option_group':
+            query = ProductOptionGroup.query.filter_by(branch_id=branch.id).options(
+                selectinload(ProductOptionGroup.options)
+            ).order_by(ProductOptionGroup.name)
+            model = ProductOptionGroup
+        else:
+            query = Collection.query.filter(
+                (Collection.branch_id == branch.id) | (Collection.branch_id == None),
+                Collection.merchant_id == branch.merchant_id
+            ).options(selectinload(Collection.items)).order_by(Collection.name)
+            model = Collection
+
+        if ids is not None:
+            query = query.filter(model.id.in_(ids))
+
+        if entity == 'product':
+            return [row.to_dict(fields) for row in query.all()]
+        return [row.to_dict() for row in query.all()]
+
+
+# --- Session hooks: log the menu rows each flush changed, in the same transaction ---
+
+def _describe(session, obj):
+    """(entity, entity_id, branch_id, merchant_id) of a menu row, or None"""
+    if isinstance(obj, MenuCategory):
+        return 'category', obj.id, obj.branch_id, None
+    if isinstance(obj, Product):
+        return 'product', obj.id, obj.branch_id, None
+    if isinstance(obj, ProductOptionGroup):
+        return 'option_group', obj.id, obj.branch_id, None
+    if isinstance(obj, Collection):
+        return 'collection', obj.id, obj.branch_id, obj.merchant_id
+
+    # Rows serialized inside their parent: the parent changed
+    if isinstance(obj, ProductOption):
+        parent = session.get(ProductOptionGroup, obj.group_id) if obj.group_id else None
+    elif isinstance(obj, CollectionItem):
+        parent = session.get(Collection, obj.collection_id) if obj.collection_id else None
+    else:
+        return None
+    return _describe(session, parent) if parent is not None else None
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_menu_changes(session, flush_context):
+    changes = {}
+    for obj in (*session.new, *session.dirty):
+        described = _describe(session, obj)
+        if described:
+            changes.setdefault(described[:2], (described, 'upsert'))
+
+    for obj in session.deleted:
+        described = _describe(session, obj)
+        if described:
+            # A deleted row's tombstone wins over upserts from its children; a deleted child only updates its parent
+            is_child = isinstance(obj, (ProductOption, CollectionItem))
+            if not is_child or described[:2] not in changes:
+                changes[described[:2]] = (described, 'upsert' if is_child else 'delete')
+
+    if not changes:
+        return
+
+    now = datetime.utcnow()
+    session.connection().execute(MenuChange.__table__.insert(), [
+        {
+            'id': str(uuid6.uuid7()),
+            'entity': entity,
+            'entity_id': entity_id,
+            'branch_id': branch_id,
+            'merchant_id': merchant_id,
+            'action': action,
+            'changed_at': now,
+        }
+        for (entity, entity_id, branch_id, merchant_id), action in changes.values()
+    ])
@@ -0,0 +1,184 @@
+import threading
+import time
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Histogram bucket upper bounds (Prometheus convention, +Inf is implicit)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Endpoints never recorded (the scrape itself, static files)
+EXCLUDED_ENDPOINTS = {'metrics.metrics', 'static'}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class MetricsRegistry:
+    """
+    Process-local request/SQL metrics, rendered in Prometheus text format.
+    Hooks are installed by init_metrics(); everything here is cheap enough to leave on in production.
+    """
+
+    _lock = threading.Lock()
+    requests_total = {}     # (endpoint, method, status) -> count
+    latency = {}            # (endpoint, method) -> Histogram
+    queries = {}            # endpoint -> Histogram (queries per request)
+    db_time = {}            # endpoint -> Histogram (DB seconds per request)
+    response_size = {}      # endpoint -> Histogram (bytes)
+
+    @classmethod
+    def record(cls, endpoint, method, status, duration, query_count, db_seconds, size):
+        with cls._lock:
+            key = (endpoint, method, str(status))
+            cls.requests_total[key] = cls.requests_total.get(key, 0) + 1
+            cls._histogram(cls.latency, (endpoint, method), LATENCY_BUCKETS).observe(duration)
+            cls._histogram(cls.queries, endpoint, QUERY_COUNT_BUCKETS).observe(query_count)
+            cls._histogram(cls.db_time, endpoint, LATENCY_BUCKETS).observe(db_seconds)
+            if size is not None:
+                cls._histogram(cls.response_size, endpoint, SIZE_BUCKETS).observe(size)
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls.requests_total = {}
+            cls.latency = {}
+            cls.queries = {}
+            cls.db_time = {}
+            cls.response_size = {}
+
+    @classmethod
+    def render(cls):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with cls._lock:
+            lines.append('# HELP lakeview_http_requests_total HTTP requests handled, by endpoint, method and status.')
+            lines.append('# TYPE lakeview_http_requests_total counter')
+            for (endpoint, method, status), value in sorted(cls.requests_total.items()):
+                lines.append(f'lakeview_http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {value}')
+
+            cls._render_histograms(
+                lines, 'lakeview_http_request_duration_seconds', 'Request latency in seconds.',
+                {_labels(endpoint=e, method=m): h for (e, m), h in cls.latency.items()}
+            )
+            cls._render_histograms(
+                lines, 'lakeview_db_queries_per_request', 'SQL statements issued per request.',
+                {_labels(endpoint=e): h for e, h in cls.queries.items()}
+            )
+            cls._render_histograms(
+                lines, 'lakeview_db_time_seconds', 'Time spent in SQL per request, in seconds.',
+                {_labels(endpoint=e): h for e, h in cls.db_time.items()}
+            )
+            cls._render_histograms(
+                lines, 'lakeview_http_response_size_bytes', 'Response body size in bytes.',
+                {_labels(endpoint=e): h for e, h in cls.response_size.items()}
+            )
+
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _histogram(store, key, buckets):
+        hist = store.get(key)
+        if hist is None:
+            hist = store[key] = Histogram(buckets)
+        return hist
+
+    @staticmethod
+    def _render_histograms(lines, name, help_text, histograms):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for labels, hist in sorted(histograms.items()):
+            inner = labels[1:-1]
+            cumulative = 0
+            for bound, count in zip(hist.buckets, hist.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{inner},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{inner},le="+Inf"}} {hist.count}')
+            lines.append(f'{name}_sum{labels} {hist.sum}')
+            lines.append(f'{name}_count{labels} {hist.count}')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+# --- SQLAlchemy hooks (all engines, so replicas are counted too) ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's execution context: a statement that fails leaves nothing behind
+    if context is not None and has_request_context() and 'sql_query_count' in g:
+        context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_start', None)
+    if started is not None and has_request_context() and 'sql_query_count' in g:
+        g.sql_query_count += 1
+        g.sql_time += time.perf_counter() - started
+
+
+# --- Flask hooks ---
+
+def _start_request():
+    g.request_started_at = time.perf_counter()
+    g.sql_query_count = 0
+    g.sql_time = 0.0
+
+
+def _finish_request(response):
+    if 'request_started_at' not in g:
+        return response
+
+    from flask import current_app
+
+    if current_app.config.get('METRICS_DEBUG_HEADERS'):
+        response.headers['X-Query-Count'] = str(g.sql_query_count)
+        response.headers['X-DB-Time-Ms'] = f'{g.sql_time * 1000:.2f}'
+
+    endpoint = request.endpoint or 'unmatched'
+    if current_app.config.get('METRICS_ENABLED') and endpoint not in EXCLUDED_ENDPOINTS:
+        # Streamed responses have no known length up front
+        size = None if response.is_streamed else response.calculate_content_length()
+        MetricsRegistry.record(
+            endpoint=endpoint,
+            method=request.method,
+            status=response.status_code,
+            duration=time.perf_counter() - g.request_started_at,
+            query_count=g.sql_query_count,
+            db_seconds=g.sql_time,
+            size=size
+        )
+
+    return response
+
+
+def init_metrics(app):
+    """Install request/SQL profiling hooks when metrics or debug headers are enabled"""
+    if not (app.config.get('METRICS_ENABLED') or app.config.get('METRICS_DEBUG_HEADERS')):
+        return
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
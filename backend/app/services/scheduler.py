@@ -0,0 +1,91 @@
+import sys
+from app import db
+from app.services.socket_service import socketio
+
+# Old daily_check_ins rows only need removing once a day
+CHECK_IN_PRUNE_INTERVAL = 24 * 60 * 60
+MENU_CHANGES_PRUNE_INTERVAL = 24 * 60 * 60
+# Cohort snapshots are daily; checking every 15 minutes reloads them shortly after midnight UTC
+COHORT_WARM_INTERVAL = 15 * 60
+
+
+def run_in_background(app, name, func, *args, **kwargs):
+    """
+    Run func once in a background greenlet inside an app context.
+    Uses the Socket.IO async backend so it cooperates with the gevent worker.
+    """
+    def task():
+        with app.app_context():
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f"Background job '{name}' failed: {e}")
+            finally:
+                db.session.remove()
+
+    return socketio.start_background_task(task)
+
+
+def run_periodically(app, name, interval, func, *args, **kwargs):
+    """Run func every `interval` seconds in a background greenlet. Failures are logged, never fatal."""
+    def loop():
+        while True:
+            with app.app_context():
+                try:
+                    func(*args, **kwargs)
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"Background job '{name}' failed: {e}")
+                finally:
+                    db.session.remove()
+            socketio.sleep(interval)
+
+    return socketio.start_background_task(loop)
+
+
+def _warm_cohort_snapshots():
+    # NumPy-backed and imported by the first retention request: until then there is nothing to warm
+    cohort_service = sys.modules.get('app.services.cohort_service')
+    if cohort_service:
+        cohort_service.CohortService.warm()
+
+
+def start_background_jobs(app):
+    """Start the recurring jobs for a serving process (gunicorn.conf.py post_worker_init or `python main.py`, never on import)"""
+    if not app.config.get('BACKGROUND_JOBS_ENABLED'):
+        return
+
+    from app.services.maintenance_service import MaintenanceService
+    from app.services.lucky_draw_registry import LuckyDrawRegistry
+    from app.services.leaderboard_service import LeaderboardService
+    from app.services.broadcast_service import BroadcastService
+
+    # One-off startup housekeeping
+    run_in_background(app, 'seed_config_defaults', MaintenanceService.seed_config_defaults)
+    run_in_background(app, 'backfill_referral_codes', MaintenanceService.backfill_referral_codes)
+    run_in_background(app, 'resume_broadcasts', BroadcastService.resume_pending)
+
+    # Recurring jobs
+    run_periodically(
+        app, 'reward_expiry',
+        app.config['REWARD_EXPIRY_SWEEP_INTERVAL'],
+        MaintenanceService.sweep_expired_rewards
+    )
+
+    run_periodically(
+        app, 'leaderboard_rebuild',
+        app.config['LEADERBOARD_REFRESH_INTERVAL'],
+        LeaderboardService.rebuild
+    )
+
+    run_periodically(app, 'cohort_snapshots', COHORT_WARM_INTERVAL, _warm_cohort_snapshots)
+
+    if app.config['CHECK_IN_RETENTION_DAYS']:
+        run_periodically(app, 'check_in_prune', CHECK_IN_PRUNE_INTERVAL, MaintenanceService.prune_daily_check_ins)
+
+    if app.config['MENU_CHANGES_RETENTION_DAYS']:
+        run_periodically(app, 'menu_changes_prune', MENU_CHANGES_PRUNE_INTERVAL, MaintenanceService.prune_menu_changes)
+
+    # Lucky draw registry timer (rebuilds at each draw start/end boundary)
+    socketio.start_background_task(LuckyDrawRegistry.watch, app)
@@ -0,0 +1,242 @@
+import json
+from datetime import datetime, timedelta
+import numpy as np
+from flask import current_app
+from sqlalchemy import func, select
+from app import db
+from app.models.merchant import Merchant, Branch
+from app.models.segment import MemberSegment, SegmentRun
+from app.models.transaction import Transaction
+from app.utils.upsert import dialect_insert
+
+# Transactions newer than this are left for the next run, so rows still being committed
+# with an earlier timestamp are never skipped by the watermark
+SETTLE_DELAY = timedelta(minutes=5)
+
+# Watermark of a merchant that has never been processed
+EPOCH = datetime(1970, 1, 1)
+
+QUINTILES = [0.2, 0.4, 0.6, 0.8]
+
+UPDATE_COLUMNS = (
+    'frequency', 'monetary', 'points_earned', 'last_transaction_at', 'recency_days',
+    'r_score', 'f_score', 'm_score', 'segment', 'computed_at'
+)
+
+
+class SegmentService:
+    """
+    Offline RFM (recency / frequency / monetary) segmentation, run outside the web worker by
+    `flask segments refresh` (see app/cli.py).
+
+    Each run only reads the transactions added since the merchant's watermark (grouped per
+    member in SQL, streamed in yield_per batches), adds them to the stored running totals,
+    then re-scores every member with vectorised quintile binning over the whole merchant
+    population and writes back, in chunked bulk upserts, only the members whose totals, scores
+    or segment changed (recency_days and computed_at of the others stay as of their last write).
+    The totals, scores and new watermark are committed together, so a failed run is simply
+    retried from the old one.
+    """
+
+    @staticmethod
+    def refresh_all():
+        """Refresh every merchant; returns {merchant_id: refresh() result}"""
+        return {
+            merchant_id: SegmentService.refresh(merchant_id)
+            for merchant_id, in db.session.query(Merchant.id).all()
+        }
+
+    @staticmethod
+    def refresh(merchant_id, now=None):
+        """
+        Bring one merchant's member_segments up to date.
+
+        Returns:
+            Dict with 'members', 'transactions' (new transactions folded in) and 'written' (rows upserted)
+        """
+        now = now or datetime.utcnow()
+        cutoff = now - SETTLE_DELAY
+        run = _lock_run(merchant_id)
+
+        codes = {}
+        totals = _Totals()
+        existing = select(
+            MemberSegment.user_id, MemberSegment.frequency, MemberSegment.monetary,
+            MemberSegment.points_earned, MemberSegment.last_transaction_at
+        ).where(MemberSegment.merchant_id == merchant_id)
+        totals.merge(codes, _partitions(existing))
+
+        # Stored scores, to skip members whose scores and segment come out the same
+        previous = {}
+        stored = select(
+            MemberSegment.user_id, MemberSegment.r_score, MemberSegment.f_score,
+            MemberSegment.m_score, MemberSegment.segment
+        ).where(MemberSegment.merchant_id == merchant_id)
+        for rows in _partitions(stored):
+            for user_id, r, f, m, segment in rows:
+                previous[codes[user_id]] = (r, f, m, segment)
+
+        delta = select(
+            Transaction.member_id,
+            func.count(),
+            func.sum(Transaction.amount_spent),
+            func.sum(Transaction.points_earned),
+            func.max(Transaction.timestamp)
+        ).join(Branch, Transaction.branch_id == Branch.id)\
+         .where(
+            Branch.merchant_id == merchant_id,
+            Transaction.timestamp >= run.watermark,
+            Transaction.timestamp < cutoff
+        ).group_by(Transaction.member_id)
+        touched = set()
+        processed = totals.merge(codes, _partitions(delta), touched)
+
+        members = len(codes)
+        written = 0
+        if members:
+            recency_days = ((np.datetime64(now, 'us') - totals.last) // np.timedelta64(1, 'D')).astype(np.int64)
+            r_edges, r_score = _quintile_scores(recency_days, higher_is_better=False)
+            f_edges, f_score = _quintile_scores(totals.frequency, higher_is_better=True)
+            m_edges, m_score = _quintile_scores(totals.monetary, higher_is_better=True)
+            segments = _segments(r_score, f_score, m_score)
+
+            user_ids = list(codes)
+            last = totals.last.astype(object)  # datetime64 -> datetime
+            rows = [
+                {
+                    'merchant_id': merchant_id,
+                    'user_id': user_ids[i],
+                    'frequency': int(totals.frequency[i]),
+                    'monetary': float(totals.monetary[i]),
+                    'points_earned': float(totals.points[i]),
+                    'last_transaction_at': last[i],
+                    'recency_days': int(recency_days[i]),
+                    'r_score': int(r_score[i]),
+                    'f_score': int(f_score[i]),
+                    'm_score': int(m_score[i]),
+                    'segment': segments[i],
+                    'computed_at': now
+                }
+                for i in range(members)
+                if i in touched or previous.get(i) != (int(r_score[i]), int(f_score[i]), int(m_score[i]), segments[i])
+            ]
+            chunk = current_app.config['RFM_UPSERT_CHUNK_SIZE']
+            for start in range(0, len(rows), chunk):
+                _upsert(rows[start:start + chunk])
+            written = len(rows)
+
+            run.thresholds_json = json.dumps({
+                'recency_days': r_edges, 'frequency': f_edges, 'monetary': m_edges
+            })
+
+        run.watermark = cutoff
+        run.members = members
+        run.transactions_processed = processed
+        run.computed_at = now
+        db.session.commit()
+
+        return {'members': members, 'transactions': processed, 'written': written}
+
+
+class _Totals:
+    """Per-member running totals as NumPy columns, indexed by the shared member code"""
+
+    def __init__(self):
+        self.frequency = np.zeros(0, dtype=np.int64)
+        self.monetary = np.zeros(0, dtype=np.float64)
+        self.points = np.zeros(0, dtype=np.float64)
+        self.last = np.zeros(0, dtype='datetime64[us]')
+
+    def merge(self, codes, partitions, touched=None):
+        """
+        Add (user_id, count, amount, points, last_at) batches; returns the transactions added.
+        The codes of the members added to are collected in `touched` when given.
+        """
+        added = 0
+        for rows in partitions:
+            user_ids, counts, amounts, points, last = zip(*rows)
+            index = np.fromiter((codes.setdefault(u, len(codes)) for u in user_ids), np.int64, len(rows))
+            if touched is not None:
+                touched.update(index.tolist())
+            self._grow(len(codes))
+
+            counts = np.array(counts, dtype=np.int64)
+            np.add.at(self.frequency, index, counts)
+            np.add.at(self.monetary, index, np.array([a or 0.0 for a in amounts], dtype=np.float64))
+            np.add.at(self.points, index, np.array([p or 0.0 for p in points], dtype=np.float64))
+            np.maximum.at(self.last, index, np.array(last, dtype='datetime64[us]'))
+            added += int(counts.sum())
+        return added
+
+    def _grow(self, size):
+        extra = size - self.frequency.size
+        if extra > 0:
+            self.frequency = np.concatenate([self.frequency, np.zeros(extra, dtype=np.int64)])
+            self.monetary = np.concatenate([self.monetary, np.zeros(extra, dtype=np.float64)])
+            self.points = np.concatenate([self.points, np.zeros(extra, dtype=np.float64)])
+            self.last = np.concatenate([self.last, np.full(extra, np.datetime64(EPOCH, 'us'))])
+
+
+def _partitions(stmt):
+    result = db.session.execute(stmt.execution_options(yield_per=current_app.config['RFM_BATCH_SIZE']))
+    return result.partitions()
+
+
+def _lock_run(merchant_id):
+    """The merchant's SegmentRun row, created on first use and locked for this transaction"""
+    insert = dialect_insert()
+    if insert:
+        db.session.execute(
+            insert(SegmentRun).values(merchant_id=merchant_id, watermark=EPOCH).on_conflict_do_nothing()
+        )
+    elif not db.session.get(SegmentRun, merchant_id):
+        db.session.add(SegmentRun(merchant_id=merchant_id, watermark=EPOCH))
+        db.session.flush()
+
+    # Serialises concurrent runs for the same merchant (no-op on SQLite)
+    return SegmentRun.query.filter_by(merchant_id=merchant_id).with_for_update().one()
+
+
+def _quintile_scores(values, higher_is_better):
+    """
+    1-5 scores from the population's quintile edges. A value equal to an edge falls in the
+    lower bin, so heavy ties (e.g. most members with 1 transaction) all score 1 instead of
+    being spread over several bins.
+    """
+    edges = np.quantile(values, QUINTILES)
+    below = np.searchsorted(edges, values, side='left')   # edges strictly below the value
+    scores = below + 1 if higher_is_better else 5 - below
+    return [round(float(e), 2) for e in edges], scores
+
+
+def _segments(r, f, m):
+    conditions = [
+        (r >= 4) & (f >= 4) & (m >= 4),
+        (r >= 3) & (f >= 4),
+        (r >= 4) & (f >= 2),
+        (r >= 4),
+        (r <= 2) & (f >= 3),
+        (r <= 2),
+    ]
+    choices = ['champions', 'loyal', 'promising', 'new', 'at_risk', 'hibernating']
+    return np.select(conditions, choices, default='need_attention').tolist()
+
+
+def _upsert(rows):
+    """Insert or update a chunk of member_segments rows in one executemany"""
+    insert = dialect_insert()
+    if insert:
+        stmt = insert(MemberSegment)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['merchant_id', 'user_id'],
+            set_={column: stmt.excluded[column] for column in UPDATE_COLUMNS}
+        )
+        db.session.execute(stmt, rows)
+        return
+
+    # Other backends: replace the chunk's rows
+    db.session.query(MemberSegment).filter(
+        MemberSegment.merchant_id == rows[0]['merchant_id'],
+        MemberSegment.user_id.in_([row['user_id'] for row in rows])
+    ).delete(synchronize_session=False)
+    db.session.execute(db.insert(MemberSegment), rows)
@@ -0,0 +1,90 @@
+import gzip
+from flask import current_app, request
+from app.utils.json_provider import PreSerialized
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:   # Optional: gzip only
+        brotli = None
+
+# Content-Encodings offered, most preferred first when the client's q-values tie
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+# Bodies cached for reuse (PreSerialized) are compressed once, so they get a stronger level.
+# Not brotli 11: it takes ~0.5 s on the menu and would stall the gevent hub.
+CACHED_LEVELS = {'br': 9, 'gzip': 9}
+
+
+def init_compression(app):
+    """Compress eligible responses according to Accept-Encoding (COMPRESS_* config)"""
+    if app.config['COMPRESS_ENABLED']:
+        app.after_request(compress_response)
+
+
+def compress_response(response):
+    """
+    gzip or brotli the body of a buffered text/JSON response of at least COMPRESS_MIN_SIZE bytes.
+
+    Left alone: streamed and file responses (exports gzip themselves, uploads are sent by
+    send_file/X-Sendfile), bodies that already have a Content-Encoding, and anything
+    marked Cache-Control: no-transform. A body that came from a PreSerialized cache entry
+    reuses the compressed copy kept on that entry.
+    """
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or not _compressible(response.mimetype)
+    ):
+        return response
+
+    # The representation depends on Accept-Encoding from here on, compressed or not
+    response.vary.add('Accept-Encoding')
+
+    if 'no-transform' in response.headers.get('Cache-Control', ''):
+        return response
+
+    body = response.get_data()
+    if len(body) < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if not encoding:
+        return response
+
+    cached = getattr(response, 'pre_serialized', None)
+    if isinstance(cached, PreSerialized):
+        compressed = cached.compressed.get(encoding)
+        if compressed is None:
+            compressed = cached.compressed[encoding] = compress(body, encoding, CACHED_LEVELS[encoding])
+    else:
+        compressed = compress(body, encoding, current_app.config[f'COMPRESS_LEVEL_{encoding.upper()}'])
+
+    if len(compressed) >= len(body):
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _compressible(mimetype):
+    return bool(mimetype) and (
+        mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES or mimetype.endswith('+json')
+    )
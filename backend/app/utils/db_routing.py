@@ -0,0 +1,78 @@
+import threading
+import time
+from flask import current_app, g, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from app.utils.read_only import is_read_only_request
+
+# SQLALCHEMY_BINDS key of the read replica
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(Session):
+    """
+    db.session class that sends @read_only views to the read replica.
+
+    Everything else (writes, background jobs, socket handlers, views without the decorator)
+    uses the primary. A caller that has just committed is pinned to the primary for
+    REPLICA_STICKY_SECONDS so it always reads its own writes despite replication lag.
+    Without a DATABASE_REPLICA_URL this behaves exactly like the default session.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is None and use_replica():
+            engines = self._db.engines
+            if engine is engines.get(None) and REPLICA_BIND in engines:
+                return engines[REPLICA_BIND]
+        return engine
+
+
+class _Sticky:
+    """Identities pinned to the primary, with the monotonic time their pin expires (per process)"""
+
+    _lock = threading.Lock()
+    _until = {}
+
+    @classmethod
+    def pin(cls, identity, seconds):
+        now = time.monotonic()
+        with cls._lock:
+            if len(cls._until) > 10000:
+                cls._until = {k: v for k, v in cls._until.items() if v > now}
+            cls._until[identity] = now + seconds
+
+    @classmethod
+    def is_pinned(cls, identity):
+        return cls._until.get(identity, 0) > time.monotonic()
+
+
+def use_replica():
+    """True when the current request may read from the replica"""
+    if not is_read_only_request() or not g.get('read_replica', True):
+        return False
+    identity = _identity()
+    return identity is None or not _Sticky.is_pinned(identity)
+
+
+def stick_to_primary(identity):
+    """
+    Pin another identity to the primary, e.g. the member whose points a branch just awarded,
+    so their next reads see the change. The committing caller is pinned automatically.
+    """
+    if identity:
+        _Sticky.pin(identity, current_app.config['REPLICA_STICKY_SECONDS'])
+
+
+def _identity():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:   # No @jwt_required() on this view
+        return None
+
+
+@event.listens_for(Session, 'after_commit')
+def _pin_writer(session):
+    if has_request_context() and current_app.config.get('SQLALCHEMY_BINDS', {}).get(REPLICA_BIND):
+        stick_to_primary(_identity())
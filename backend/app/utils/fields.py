@@ -0,0 +1,75 @@
+from flask import request
+from sqlalchemy.orm import load_only
+
+# Always serialized, so list items stay addressable whatever ?fields= asks for
+ALWAYS_INCLUDED = frozenset({'id'})
+
+
+class FieldSelection:
+    """
+    The attributes (?fields=) and relations (?expand=) a list response serializes.
+
+    fields=None means every attribute (the full to_dict). A relation is embedded when it
+    is expanded, or named in ?fields= itself (e.g. ?fields=id,name,options). Models use the
+    same selection to decide what to load: see Product.load_options and friends.
+    """
+    __slots__ = ('fields', 'expand')
+
+    def __init__(self, fields=None, expand=()):
+        self.fields = frozenset(fields) | ALWAYS_INCLUDED if fields is not None else None
+        self.expand = frozenset(expand)
+
+    def __contains__(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, relation):
+        return relation in self.expand or (self.fields is not None and relation in self.fields)
+
+    @property
+    def key(self):
+        """Hashable form, for cache keys"""
+        return (self.fields and tuple(sorted(self.fields)), tuple(sorted(self.expand)))
+
+    def pick(self, obj, names):
+        """{name: obj.name} for the selected names, in the given order"""
+        return {name: getattr(obj, name) for name in names if name in self}
+
+    def filter(self, data):
+        """A prebuilt dict (e.g. a registry snapshot) cut down to the selection"""
+        if self.fields is None:
+            return data
+        return {k: v for k, v in data.items() if k in self.fields or k in self.expand}
+
+    def load_only(self, model, columns, **derived):
+        """
+        Loader options that skip unselected columns. `derived` maps computed output fields
+        to the columns they are computed from (image_variants='image_url', or a tuple).
+        """
+        if self.fields is None:
+            return []
+        wanted = {name for name in columns if name in self.fields}
+        for name, source in derived.items():
+            if name in self.fields:
+                wanted.update((source,) if isinstance(source, str) else source)
+        return [load_only(*(getattr(model, name) for name in columns if name in wanted))]
+
+
+def requested_fields(default_expand=()):
+    """
+    FieldSelection from the query string: ?fields=id,name,image_url&expand=options
+
+    Without ?fields= every attribute is returned. Without ?expand= the endpoint's
+    default_expand applies, unless ?fields= is given (a list screen asking for
+    specific fields gets no relations it did not name); ?expand= (empty) expands nothing.
+    """
+    fields = _split(request.args.get('fields'))
+    expand = _split(request.args.get('expand'))
+    if expand is None:
+        expand = default_expand if fields is None else ()
+    return FieldSelection(fields, expand)
+
+
+def _split(value):
+    if value is None:
+        return None
+    return [part.strip() for part in value.split(',') if part.strip()]
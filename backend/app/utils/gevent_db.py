@@ -0,0 +1,37 @@
+"""
+Make psycopg2 cooperative under gevent.
+
+psycopg2 talks to PostgreSQL from C, so gevent's monkey patching never sees its socket
+I/O: without this every query blocks the whole hub (all requests and WebSockets on the
+worker) until PostgreSQL answers. With a wait callback installed, libpq runs in
+non-blocking mode and psycopg2 calls back into Python whenever it would block; the
+callback waits on the socket through gevent, so other greenlets run meanwhile.
+Same approach as psycogreen.gevent, without the extra dependency.
+"""
+
+
+def make_psycopg_green():
+    """Install the gevent wait callback. Call once, right after monkey.patch_all()."""
+    from psycopg2 import extensions
+
+    if not hasattr(extensions, 'set_wait_callback'):
+        raise ImportError('psycopg2 >= 2.2 with wait callback support is required')
+
+    extensions.set_wait_callback(gevent_wait_callback)
+
+
+def gevent_wait_callback(conn, timeout=None):
+    """Poll the connection until the current operation completes, yielding to the hub while waiting"""
+    from gevent.socket import wait_read, wait_write
+    from psycopg2 import OperationalError, extensions
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise OperationalError(f'Bad result from poll: {state!r}')
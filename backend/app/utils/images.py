@@ -0,0 +1,217 @@
+import hashlib
+import os
+import re
+import tempfile
+
+# Resized variants generated for every uploaded image: name -> longest side in pixels
+VARIANTS = {
+    'thumb': 200,
+    'small': 480,
+    'medium': 960,
+    'large': 1600,
+}
+
+# Encoders per output format (Pillow format name, save options)
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Variant returned as the plain 'url' for clients that predate variants
+DEFAULT_VARIANT = 'large'
+DEFAULT_FORMAT = 'jpg'
+
+# The JPEG variants flatten transparency and keep only the first frame, so the plain 'url' of
+# such images points to one of these instead (checked in this order, see url_filename):
+#   <hash>-original.gif/.webp  animated upload, every frame re-encoded at full size
+#   <hash>-large.png           transparent upload, the 'large' variant with its alpha channel
+ANIMATED_FORMATS = {'GIF': 'gif', 'WEBP': 'webp'}
+ALPHA_FORMAT = ('png', 'PNG', {'optimize': True})
+
+# Refuse images that would decode to more than this many pixels (decompression bombs)
+MAX_PIXELS = 40_000_000
+
+ACCEPTED_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+
+# Read size when copying an upload body to disk
+CHUNK_SIZE = 64 * 1024
+
+# <64 hex content hash>-<variant>.<ext>
+HASHED_NAME = re.compile(r'^([0-9a-f]{64})-([a-z]+)\.(webp|jpg|png|gif)$')
+
+
+class ImageError(ValueError):
+    """The upload is not an image we accept."""
+
+
+def save_stream(stream, folder, chunk_size=CHUNK_SIZE):
+    """
+    Copy an upload stream to a temporary file in folder chunk by chunk, hashing as it goes,
+    so the body is never held in memory as a whole.
+
+    Returns:
+        Tuple (temporary file path, SHA-256 hex digest); the caller removes the file
+    """
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.upload')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                f.write(chunk)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest()
+
+
+def stored_sizes(digest, folder):
+    """{variant: (width, height)} read from the file headers if every variant exists, else None"""
+    from PIL import Image
+
+    if not all(os.path.exists(os.path.join(folder, variant_filename(digest, v, ext))) for v in VARIANTS for ext in FORMATS):
+        return None
+    sizes = {}
+    for variant in VARIANTS:
+        with Image.open(os.path.join(folder, variant_filename(digest, variant, DEFAULT_FORMAT))) as stored:
+            sizes[variant] = stored.size
+    return sizes
+
+
+def variant_filename(digest, variant, ext):
+    return f'{digest}-{variant}.{ext}'
+
+
+def url_filename(digest, folder):
+    """File behind an upload's plain 'url': the animated or transparent copy if one was made, else the large JPEG"""
+    candidates = [variant_filename(digest, 'original', ext) for ext in ANIMATED_FORMATS.values()]
+    candidates.append(variant_filename(digest, DEFAULT_VARIANT, ALPHA_FORMAT[0]))
+    for filename in candidates:
+        if os.path.exists(os.path.join(folder, filename)):
+            return filename
+    return variant_filename(digest, DEFAULT_VARIANT, DEFAULT_FORMAT)
+
+
+def is_hashed_name(filename):
+    return HASHED_NAME.match(filename) is not None
+
+
+def variant_map(digest, sizes=None, url_prefix='/uploads'):
+    """
+    {variant: {'webp': url, 'jpg': url[, 'width', 'height']}} for a processed upload.
+    sizes (from process_image) adds the pixel dimensions when known.
+    """
+    result = {}
+    for variant in VARIANTS:
+        entry = {ext: f'{url_prefix}/{variant_filename(digest, variant, ext)}' for ext in FORMATS}
+        if sizes and variant in sizes:
+            entry['width'], entry['height'] = sizes[variant]
+        result[variant] = entry
+    return result
+
+
+def variants_for_url(url):
+    """Variant map for a stored image URL, or None when it is not a processed (content-hashed) upload"""
+    if not url:
+        return None
+    prefix, _, filename = url.rpartition('/')
+    match = HASHED_NAME.match(filename)
+    if not match:
+        return None
+    return variant_map(match.group(1), url_prefix=prefix)
+
+
+def process_image(path, folder, digest):
+    """
+    Decode an uploaded image file and write its resized WebP/JPEG variants to folder.
+
+    Runs in a worker process (see ImageService). EXIF orientation is applied and then all
+    metadata (EXIF, GPS, ICC, comments) is dropped. Files are named by digest, the SHA-256
+    of the uploaded bytes, so re-uploading the same image reuses the existing files.
+    Animated and transparent uploads also get the copy their plain 'url' points to (see
+    ANIMATED_FORMATS); it is written first, so it exists whenever all the variants do.
+
+    Returns:
+        Dict {'hash': digest, 'sizes': {variant: (width, height)}, 'deduplicated': False}
+    """
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    try:
+        with Image.open(path) as source:
+            if source.format not in ACCEPTED_FORMATS:
+                raise ImageError(f'Unsupported image format: {source.format}')
+            if getattr(source, 'is_animated', False) and source.format in ANIMATED_FORMATS:
+                _save_animated(source, folder, digest)
+                source.seek(0)
+            # JPEGs decode straight at a reduced scale (still >= the largest variant)
+            largest = max(VARIANTS.values())
+            source.draft('RGB', (largest, largest))
+            source.load()  # Animated GIFs keep their first frame
+            image = ImageOps.exif_transpose(source)
+    except ImageError:
+        raise
+    except Exception as e:
+        # Pillow's message names the temporary file; keep it out of the API response
+        raise ImageError('Could not read image: not a valid image file') from e
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    sizes = {}
+    resized = image
+    # Largest first, each variant resized from the previous one (never upscaled)
+    for variant, longest in sorted(VARIANTS.items(), key=lambda item: -item[1]):
+        resized = resized.copy()
+        resized.thumbnail((longest, longest), Image.LANCZOS)
+        sizes[variant] = resized.size
+
+        if variant == DEFAULT_VARIANT and resized.mode == 'RGBA':
+            ext, pil_format, options = ALPHA_FORMAT
+            path = os.path.join(folder, variant_filename(digest, variant, ext))
+            if not os.path.exists(path):
+                _atomic_save(resized, path, pil_format, options)
+
+        for ext, (pil_format, options) in FORMATS.items():
+            path = os.path.join(folder, variant_filename(digest, variant, ext))
+            if os.path.exists(path):
+                continue
+
+            output = resized
+            if pil_format == 'JPEG' and resized.mode == 'RGBA':
+                # JPEG has no alpha: flatten onto white
+                output = Image.new('RGB', resized.size, (255, 255, 255))
+                output.paste(resized, mask=resized.getchannel('A'))
+
+            _atomic_save(output, path, pil_format, options)
+
+    return {'hash': digest, 'sizes': sizes, 'deduplicated': False}
+
+
+def _save_animated(source, folder, digest):
+    """Every frame of an animated GIF/WebP, in its own format, without the comment/EXIF/XMP/ICC metadata"""
+    ext = ANIMATED_FORMATS[source.format]
+    path = os.path.join(folder, variant_filename(digest, 'original', ext))
+    if os.path.exists(path):
+        return
+    options = {'save_all': True, 'loop': source.info.get('loop', 0)}
+    if source.format == 'GIF':
+        options['comment'] = b''
+    else:
+        options.update(exif=b'', xmp=b'', icc_profile=None, lossless=False, quality=80)
+    _atomic_save(source, path, source.format, options)
+
+
+def _atomic_save(image, path, pil_format, options):
+    # Write to a temp file in the same folder and rename, so readers never see partial files
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, pil_format, **options)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,138 @@
+import dataclasses
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:   # Optional: the provider falls back to the stdlib encoder
+    orjson = None
+
+# PASSTHROUGH_DATETIME: dates go through _common_default, so they keep Flask's RFC 822 format
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+) if orjson else 0
+
+
+class PreSerialized:
+    """
+    JSON that was encoded earlier, e.g. kept in a cache, emitted verbatim by FastJSONProvider:
+    `jsonify(payload)` sends the bytes as the body, and a PreSerialized nested in a larger
+    structure is spliced in without being decoded.
+
+    `compressed` keeps the gzip/brotli encodings of the response body (see app/utils/compression.py),
+    so a cached payload is also compressed only once.
+    """
+    __slots__ = ('data', 'compressed')
+
+    def __init__(self, data):
+        self.data = data if isinstance(data, bytes) else data.encode('utf-8')
+        self.compressed = {}
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    app.json provider backed by orjson when it is installed (stdlib json otherwise).
+
+    Differences from Flask's default provider, identical for both encoders:
+      - datetime/date stay RFC 822 (http_date) like Flask's; to_dict() methods emit their
+        own ISO 8601 strings, so only raw values reach this. time (unsupported by Flask) is ISO 8601
+      - Decimal (e.g. voucher_discount_percent) as a JSON number, not a string
+      - PreSerialized values passed through without re-encoding
+      - keys keep insertion order instead of being sorted
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        option = _orjson_option(kwargs)
+        if option is None:
+            kwargs.setdefault('default', _default)
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_orjson_default, option=option).decode('utf-8')
+
+    def dumps_bytes(self, obj, indent=False):
+        """UTF-8 JSON for a response body or a cache (wrap it in PreSerialized to send it later)"""
+        if isinstance(obj, PreSerialized):
+            return obj.data
+        if orjson:
+            option = ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0)
+            return orjson.dumps(obj, default=_orjson_default, option=option)
+        if indent:
+            return json.dumps(obj, default=_default, indent=2).encode('utf-8')
+        return json.dumps(obj, default=_default, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        response = self._app.response_class(self.dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
+        if isinstance(obj, PreSerialized):
+            response.pre_serialized = obj
+        return response
+
+
+def _orjson_option(kwargs):
+    """orjson options equivalent to json.dumps kwargs, or None when only the stdlib can honour them"""
+    if not orjson:
+        return None
+    option = ORJSON_OPTIONS
+    for key, value in kwargs.items():
+        if key == 'indent' and value in (2, None):
+            option |= orjson.OPT_INDENT_2 if value else 0
+        elif key == 'sort_keys':
+            option |= orjson.OPT_SORT_KEYS if value else 0
+        elif key == 'separators' and value in ((',', ':'), (', ', ': ')):
+            continue
+        elif key == 'ensure_ascii':
+            continue   # The output is UTF-8 either way
+        else:
+            return None
+    return option
+
+
+def _orjson_default(value):
+    if isinstance(value, Decimal):
+        return orjson.Fragment(_decimal_literal(value))
+    if isinstance(value, PreSerialized):
+        return orjson.Fragment(value.data)
+    return _common_default(value)
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(_decimal_literal(value))
+    if isinstance(value, PreSerialized):
+        return json.loads(value.data)
+    return _common_default(value)
+
+
+def _common_default(value):
+    if isinstance(value, (datetime, date)):
+        return http_date(value)
+    if isinstance(value, time):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    if hasattr(value, 'tolist'):   # NumPy scalars
+        return value.tolist()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def _decimal_literal(value):
+    if not value.is_finite():
+        raise TypeError(f'{value} is not JSON serializable')
+    return str(value)
@@ -1,6 +1,6 @@
 import random
 import string
-from datetime import datetime
+from datetime import datetime, timedelta
 from app import db
 
 
@@ -27,6 +27,20 @@ def select_prize(lucky_draw_id):
         )
     ).all()
 
+    return weighted_choice(prizes)
+
+
+def weighted_choice(prizes):
+    """
+    Pick one prize with probability proportional to probability_weight.
+    Works on anything with a probability_weight attribute (ORM rows or registry snapshots).
+
+    Args:
+        prizes: List of candidate prizes
+
+    Returns:
+        The selected prize, or None if there are no prizes or all weights are zero
+    """
     if not prizes:
         return None
 
@@ -84,14 +98,60 @@ def can_user_spin_today(user_id, lucky_draw_id, max_daily_spins):
     if max_daily_spins is None:
         return True, 0
 
-    # Count spins today
-    today = datetime.utcnow().date()
+    # Count spins today (range filter so ix_lucky_draw_history_user_created applies)
+    today_start, tomorrow_start = _today_bounds()
     spins_today = LuckyDrawHistory.query.filter(
         LuckyDrawHistory.user_id == user_id,
         LuckyDrawHistory.lucky_draw_id == lucky_draw_id,
-        db.func.date(LuckyDrawHistory.created_at) == today
+        LuckyDrawHistory.created_at >= today_start,
+        LuckyDrawHistory.created_at < tomorrow_start
     ).count()
 
-    can_spin = spins_today < max_daily_spins
+    return spin_eligibility(max_daily_spins, spins_today)
+
+
+def spins_today_by_draw(user_id, lucky_draw_ids=None):
+    """
+    Count the user's spins today for many draws in one grouped query.
+
+    Args:
+        user_id: ID of the user
+        lucky_draw_ids: Optional list of draw IDs to restrict the count to
+
+    Returns:
+        Dict {lucky_draw_id: spins_today}; draws without spins today are absent
+    """
+    from app.models.lucky_draw_history import LuckyDrawHistory
+
+    today_start, tomorrow_start = _today_bounds()
+    query = db.session.query(
+        LuckyDrawHistory.lucky_draw_id,
+        db.func.count(LuckyDrawHistory.id)
+    ).filter(
+        LuckyDrawHistory.user_id == user_id,
+        LuckyDrawHistory.created_at >= today_start,
+        LuckyDrawHistory.created_at < tomorrow_start
+    )
+
+    if lucky_draw_ids is not None:
+        query = query.filter(LuckyDrawHistory.lucky_draw_id.in_(lucky_draw_ids))
+
+    return dict(query.group_by(LuckyDrawHistory.lucky_draw_id).all())
+
+
+def spin_eligibility(max_daily_spins, spins_today):
+    """
+    Same result shape as can_user_spin_today, from an already-known spin count.
+
+    Returns:
+        Tuple (can_spin: bool, spins_today: int)
+    """
+    if max_daily_spins is None:
+        return True, 0
+
+    return spins_today < max_daily_spins, spins_today
+
 
-    return can_spin, spins_today
+def _today_bounds():
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today_start, today_start + timedelta(days=1)
@@ -0,0 +1,43 @@
+from functools import wraps
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class ReadOnlyViolation(RuntimeError):
+    """Raised when a view marked @read_only tries to commit."""
+
+
+def read_only(view=None, replica=True):
+    """
+    Mark a view as read-only.
+
+    Any session commit issued while the view is handling the request raises
+    ReadOnlyViolation, so GET endpoints can never take write locks or generate WAL.
+    The view's queries go to the read replica when one is configured; use
+    @read_only(replica=False) for views that must see writes made by other callers
+    immediately (e.g. login right after verification).
+    Place it below @jwt_required() so it wraps the view body directly.
+    """
+    if view is None:
+        return lambda v: read_only(v, replica=replica)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_only = True
+        g.read_replica = replica
+        return view(*args, **kwargs)
+
+    wrapper.read_only = True
+    return wrapper
+
+
+def is_read_only_request():
+    """True when the current request is being served by a @read_only view."""
+    return has_request_context() and g.get('read_only', False)
+
+
+@event.listens_for(Session, 'before_commit')
+def _block_commit_in_read_only_view(session):
+    if is_read_only_request():
+        raise ReadOnlyViolation(f"Endpoint '{request.endpoint}' is read-only and must not commit")
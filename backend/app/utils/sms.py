@@ -1,5 +1,4 @@
 import os
-import requests
 
 # Toggle this for real SMS vs Dev Mode
 SMS_PROVIDER = os.environ.get('SMS_PROVIDER', 'MOCK') # Options: MOCK, TWILIO, ISMS
@@ -43,6 +42,8 @@ def send_sms(phone_number, message):
         }
         
         try:
+            import requests
+
             # iSMS Documentation says GET request
             response = requests.get(url, params=params)
             
@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import click
+from flask import current_app
+
+# Optional providers / heavy libraries that must not be imported while a worker boots
+LAZY_MODULES = ('numpy', 'PIL', 'resend', 'twilio', 'alembic')
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Boots the app exactly like the gunicorn worker does (importing main.py), without the background jobs
+_BOOT = """
+import json, sys, time
+started = time.perf_counter()
+import main
+report = {
+    'boot_ms': (time.perf_counter() - started) * 1000,
+    'phases': main.app.extensions['startup_phases'],
+    'eager_modules': [m for m in %r if m in sys.modules],
+}
+print(json.dumps(report))
+""" % (LAZY_MODULES,)
+
+
+class PhaseTimer:
+    """Milliseconds spent in each create_app phase, stored in app.extensions['startup_phases']"""
+
+    def __init__(self):
+        self.phases = {}
+        self._last = time.perf_counter()
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases[name] = round((now - self._last) * 1000, 2)
+        self._last = now
+
+
+class LazyMigrateGroup(click.Group):
+    """
+    The `flask db ...` command group, importing Flask-Migrate (and alembic, mako, pygments)
+    only when a migration command runs instead of in every worker boot.
+    """
+
+    def __init__(self, db, name='db'):
+        super().__init__(name, help='Perform database migrations.')
+        self.db = db
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        # Hand the command line to Flask-Migrate's own group (the Flask CLI has pushed an app context)
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as commands
+        if 'migrate' not in current_app.extensions:
+            Migrate(current_app._get_current_object(), self.db)
+        return commands.make_context(info_name, args, parent=parent, **extra)
+
+
+def measure_cold_start(import_times=False):
+    """
+    Boot the app in a fresh interpreter and report how long it took.
+
+    Returns:
+        Dict with wall_ms (whole process), boot_ms (importing main.py), phases, eager_modules
+        and, with import_times, the parsed `python -X importtime` output
+    """
+    env = dict(os.environ, BACKGROUND_JOBS_ENABLED='false')
+    command = [sys.executable] + (['-X', 'importtime'] if import_times else []) + ['-c', _BOOT]
+
+    started = time.perf_counter()
+    proc = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode:
+        raise RuntimeError(f'App failed to boot:\n{proc.stderr[-4000:]}')
+
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    report['wall_ms'] = wall_ms
+    if import_times:
+        report['imports'] = _parse_import_times(proc.stderr)
+    return report
+
+
+def profile_startup(argv=None):
+    """
+    `python main.py --profile-startup`: import and create_app timings of one cold boot.
+    Exits 1 when a LAZY_MODULES provider was imported at boot (benchmarks.cold_start also checks the time budget).
+    """
+    parser = argparse.ArgumentParser(prog='main.py --profile-startup')
+    parser.add_argument('--top', type=int, default=25, help='Modules to list')
+    parser.add_argument('--json', action='store_true', help='Print the raw report')
+    args = parser.parse_args(argv)
+
+    report = measure_cold_start(import_times=True)
+    imports = report.pop('imports')
+    slowest = sorted(imports, key=lambda i: i['cumulative_ms'], reverse=True)[:args.top]
+    packages = {}
+    for item in imports:
+        package = item['module'].split('.')[0]
+        packages[package] = packages.get(package, 0.0) + item['self_ms']
+    packages = sorted(packages.items(), key=lambda p: p[1], reverse=True)[:args.top]
+
+    if args.json:
+        print(json.dumps(dict(report, slowest_imports=slowest, packages=dict(packages)), indent=2))
+        return 1 if report['eager_modules'] else 0
+
+    print(f"Cold start: {report['wall_ms']:.0f} ms process wall, {report['boot_ms']:.0f} ms importing main.py "
+          f"(timed under -X importtime, which adds overhead)")
+    print('\ncreate_app phases (ms):')
+    for name, ms in report['phases'].items():
+        print(f'  {name:<14}{ms:>9.1f}')
+    print('\nSlowest imports (cumulative ms, including their own imports):')
+    for item in slowest:
+        print(f"  {item['cumulative_ms']:>9.1f}  {item['module']}")
+    print('\nImport time per top-level package (self ms):')
+    for package, ms in packages:
+        print(f'  {ms:>9.1f}  {package}')
+    if report['eager_modules']:
+        print(f"\nERROR: imported at boot, expected lazily: {', '.join(report['eager_modules'])}")
+        return 1
+    return 0
+
+
+def _parse_import_times(stderr):
+    """Lines of `-X importtime`: 'import time: <self us> | <cumulative us> | <indent><module>'"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue   # Header line
+        imports.append({
+            'module': parts[2].strip(),
+            'self_ms': int(parts[0]) / 1000,
+            'cumulative_ms': int(parts[1]) / 1000
+        })
+    return imports
@@ -0,0 +1,12 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+
+def dialect_insert():
+    """INSERT construct with ON CONFLICT support for the bound dialect, or None"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert
+    if dialect == 'sqlite':
+        return sqlite.insert
+    return None
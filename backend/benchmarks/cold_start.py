@@ -0,0 +1,67 @@
+"""
+Cold-start budget check: fails when booting a worker gets slower or pulls in a lazy module.
+
+Boots main.py in a fresh interpreter --runs times (background jobs off, nothing is written
+to the database) and compares the median time to import main.py against --budget-ms.
+It also fails when one of the lazily imported providers (LAZY_MODULES: numpy, Pillow, resend,
+twilio, alembic) gets imported during boot again.
+
+Exit code 1 on a regression (over budget, an eager import, or a boot that fails), so it can
+gate CI or a deploy; CI runs it in .github/workflows/backend-checks.yml. For the breakdown of
+a slow boot (also exits 1 on an eager import):
+    python main.py --profile-startup
+
+Usage (from backend/):
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --runs 10 --budget-ms 1200
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+
+from app.utils.startup import LAZY_MODULES, measure_cold_start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the worker cold start against a time budget.')
+    parser.add_argument('--runs', type=int, default=5, help='Cold boots to measure (the median is compared)')
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('STARTUP_BUDGET_MS', 1500)),
+                        help='Allowed median time to import main.py (default: STARTUP_BUDGET_MS or 1500)')
+    args = parser.parse_args(argv)
+
+    try:
+        reports = [measure_cold_start() for _ in range(args.runs)]
+    except RuntimeError as e:
+        print(json.dumps({'runs': args.runs, 'budget_ms': args.budget_ms, 'failures': [str(e)], 'passed': False},
+                         indent=2))
+        return 1
+
+    boot = statistics.median(r['boot_ms'] for r in reports)
+    eager = sorted({m for r in reports for m in r['eager_modules']})
+    phases = {name: statistics.median(r['phases'][name] for r in reports) for name in reports[0]['phases']}
+
+    failures = []
+    if boot > args.budget_ms:
+        failures.append(f'median boot {boot:.1f} ms is over the {args.budget_ms} ms budget')
+    if eager:
+        failures.append(f"imported at boot, expected lazily: {', '.join(eager)}")
+
+    print(json.dumps({
+        'runs': args.runs,
+        'budget_ms': args.budget_ms,
+        'boot_ms_median': round(boot, 1),
+        'boot_ms_max': round(max(r['boot_ms'] for r in reports), 1),
+        'process_wall_ms_median': round(statistics.median(r['wall_ms'] for r in reports), 1),
+        'create_app_phases_ms_median': phases,
+        'lazy_modules': list(LAZY_MODULES),
+        'eagerly_imported': eager,
+        'failures': failures,
+        'passed': not failures
+    }, indent=2))
+    return 0 if not failures else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+JSON encoding cost of the largest API payloads: Flask's default provider vs FastJSONProvider.
+
+The payloads are the real responses of GET /customer/menu/products, /rewards/available and
+/lucky-draws, fetched through the test client, so their shape always matches the current
+to_dict()s. Each is then encoded repeatedly into a response by:
+    flask_default   Flask's DefaultJSONProvider (stdlib json, sorted keys, ASCII escapes)
+    fast_stdlib     FastJSONProvider on a deploy without orjson
+    fast_orjson     FastJSONProvider with orjson
+    pre_serialized  jsonify(PreSerialized(...)) of bytes kept in a cache
+
+Usage (from backend/):
+    python -m benchmarks.json_encoding                     # synthetic catalogue in a temp SQLite DB
+    python -m benchmarks.json_encoding --products 1000 --rewards 200
+    python -m benchmarks.json_encoding --database-url postgresql://... --branch-id B --user-id U
+        (real data; only GET requests are made)
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark JSON encoding of the largest API payloads.')
+    parser.add_argument('--database-url', help='Read payloads from this database instead of a synthetic one')
+    parser.add_argument('--branch-id', help='Menu branch (with --database-url; default: branch with most products)')
+    parser.add_argument('--user-id', help='Member for the reward/draw lists (with --database-url; default: any)')
+    parser.add_argument('--products', type=int, default=400, help='Synthetic menu size')
+    parser.add_argument('--rewards', type=int, default=150, help='Synthetic reward catalogue size')
+    parser.add_argument('--draws', type=int, default=20, help='Synthetic live lucky draws')
+    parser.add_argument('--seconds', type=float, default=0.5, help='Time spent per encoder and payload')
+    args = parser.parse_args(argv)
+
+    os.environ['BACKGROUND_JOBS_ENABLED'] = 'false'
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'json_bench.db')
+
+    from flask.json.provider import DefaultJSONProvider
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db
+    from app.utils import json_provider
+    from app.utils.json_provider import PreSerialized
+
+    app = create_app()
+    with app.app_context():
+        if args.database_url:
+            branch_id, user_id = _real_ids(args.branch_id, args.user_id)
+        else:
+            branch_id, user_id = _seed(db, args.products, args.rewards, args.draws)
+        token = create_access_token(identity=user_id)
+
+    client = app.test_client()
+    auth = {'Authorization': f'Bearer {token}'}
+    payloads = {}
+    for name, url, headers in (
+        ('menu_products', f'/customer/menu/products?branch_id={branch_id}', {}),
+        ('rewards_available', '/rewards/available', auth),
+        ('lucky_draws', '/lucky-draws', auth),
+    ):
+        response = client.get(url, headers=headers)
+        if response.status_code != 200:
+            sys.exit(f'GET {url} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+        payloads[name] = response.get_json()
+
+    default = DefaultJSONProvider(app)
+    fast = app.json
+    results = {}
+    with app.app_context():
+        for name, payload in payloads.items():
+            cached = PreSerialized(fast.dumps_bytes(payload))
+            timings = {
+                'flask_default': _time(lambda: default.response(payload), args.seconds),
+                'fast_stdlib': _time_without_orjson(json_provider, lambda: fast.response(payload), args.seconds),
+                'fast_orjson': _time(lambda: fast.response(payload), args.seconds) if json_provider.orjson else None,
+                'pre_serialized': _time(lambda: fast.response(cached), args.seconds),
+            }
+            results[name] = {
+                'bytes': len(cached.data),
+                'us_per_response': {k: round(v, 1) for k, v in timings.items() if v is not None},
+                'speedup_vs_flask_default': {
+                    k: round(timings['flask_default'] / v, 1) for k, v in timings.items() if v and k != 'flask_default'
+                }
+            }
+
+    print(json.dumps({'orjson_installed': json_provider.orjson is not None, 'payloads': results}, indent=2))
+    return 0
+
+
+def _time(func, seconds):
+    """Mean microseconds per call over about `seconds` of repeated calls"""
+    func()
+    calls, started = 0, time.perf_counter()
+    deadline = started + seconds
+    while True:
+        for _ in range(10):
+            func()
+        calls += 10
+        now = time.perf_counter()
+        if now >= deadline:
+            return (now - started) / calls * 1e6
+
+
+def _time_without_orjson(module, func, seconds):
+    # Same provider as a deploy where orjson is not installed
+    orjson, module.orjson = module.orjson, None
+    try:
+        return _time(func, seconds)
+    finally:
+        module.orjson = orjson
+
+
+def _real_ids(branch_id, user_id):
+    from sqlalchemy import func
+    from app import db
+    from app.models.menu import Product
+    from app.models.user import User
+
+    if not branch_id:
+        branch_id = db.session.query(Product.branch_id).group_by(Product.branch_id)\
+            .order_by(func.count().desc()).limit(1).scalar()
+    if not user_id:
+        user_id = db.session.query(User.id).filter(User.deleted_at.is_(None)).limit(1).scalar()
+    if not branch_id or not user_id:
+        sys.exit('The database needs at least one product and one member')
+    return branch_id, user_id
+
+
+def _seed(db, products, rewards, draws):
+    """Catalogue shaped like production: categories, option groups, rewards, draws with prizes"""
+    from decimal import Decimal
+    from werkzeug.security import generate_password_hash
+    from app.models.lucky_draw import LuckyDraw
+    from app.models.lucky_draw_prize import LuckyDrawPrize
+    from app.models.menu import MenuCategory, Product, ProductOptionGroup, ProductOption
+    from app.models.merchant import Merchant, Branch
+    from app.models.reward import Reward
+    from app.models.user import User
+
+    db.create_all()
+    merchant = Merchant(name='Lakeview Haus')
+    db.session.add(merchant)
+    db.session.flush()
+    branch = Branch(merchant_id=merchant.id, name='Main', username='bench', password_hash='x', is_main=True)
+    user = User(username='bench', email='bench@example.com', phone='0', password_hash=generate_password_hash('x'),
+                is_verified=True, points_balance=5000, points_lifetime=5000)
+    db.session.add_all([branch, user])
+    db.session.flush()
+
+    categories = [MenuCategory(branch_id=branch.id, name=f'Category {i}', sort_order=i) for i in range(12)]
+    groups = [ProductOptionGroup(branch_id=branch.id, name=name) for name in ('Size', 'Sugar', 'Ice', 'Milk', 'Add-ons')]
+    db.session.add_all(categories + groups)
+    db.session.flush()
+    for group in groups:
+        for j in range(4):
+            db.session.add(ProductOption(group_id=group.id, name=f'{group.name} {j}', price_adjustment=0.5 * j))
+
+    for i in range(products):
+        product = Product(
+            branch_id=branch.id, category_id=categories[i % len(categories)].id, name=f'Product {i}',
+            description='House-made with seasonal ingredients, served hot or iced. ' * 2,
+            price=8.9 + i % 20, image_url=f'/uploads/{i:032x}.webp', is_recommended=i % 7 == 0
+        )
+        product.option_groups.extend(groups[:1 + i % len(groups)])
+        db.session.add(product)
+
+    for i in range(rewards):
+        db.session.add(Reward(
+            merchant_id=merchant.id, title=f'Reward {i}', description='Redeem at any branch. ' * 3,
+            category='beverage', points_cost=100 + 10 * i, image_url=f'/uploads/r{i:031x}.webp',
+            terms_and_conditions='Valid for 30 days. Not exchangeable for cash. ' * 2, sort_order=i
+        ))
+
+    for i in range(draws):
+        draw = LuckyDraw(merchant_id=merchant.id, name=f'Draw {i}', points_cost=50, max_daily_spins_per_user=3)
+        db.session.add(draw)
+        db.session.flush()
+        for j in range(8):
+            db.session.add(LuckyDrawPrize(
+                lucky_draw_id=draw.id, prize_type='voucher' if j % 2 else 'points', name=f'Prize {j}',
+                points_amount=10 * j, voucher_discount_percent=Decimal('12.50'), voucher_expiry_days=30,
+                probability_weight=j + 1, display_order=j
+            ))
+
+    db.session.commit()
+    return branch.id, user.id
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Benchmark scenarios: one per loyalty hot path.
+
+Each scenario turns (ctx, i) into a request for the i-th iteration. Scenarios that
+consume per-user state (check-in is once per user per day) cap their request
+count with max_requests. Optional hooks run inside an app context: setup(ctx)
+before the scenario (its return value is handed to verify), verify(ctx, state)
+after it, returning a list of failed invariants.
+"""
+from datetime import datetime, timedelta
+from app import db
+from app.models.user import User
+from app.models.check_in import DailyCheckIn
+
+# Duplicate taps per member in the midnight burst
+BURST_TAPS = 3
+
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+class Scenario:
+    def __init__(self, name, build, warmup=10, max_requests=None, setup=None, verify=None, expected_statuses=()):
+        self.name = name
+        self.build = build
+        self.warmup = warmup
+        self.max_requests = max_requests
+        self.setup = setup
+        self.verify = verify
+        # Error statuses that are part of the scenario (not counted as errors)
+        self.expected_statuses = set(expected_statuses)
+
+    def request_limit(self, ctx, requested):
+        if self.max_requests is None:
+            return requested
+        return min(requested, self.max_requests(ctx) - self.warmup)
+
+
+def _user(ctx, i):
+    return i % len(ctx.user_ids)
+
+
+def award_points(ctx, i):
+    return 'POST', '/transaction/award', {
+        'headers': bearer(ctx.branch_token),
+        'json': {'qr_token': ctx.qr_tokens[_user(ctx, i)], 'amount': 12.5}
+    }
+
+
+def redeem_reward(ctx, i):
+    reward_id = ctx.reward_ids[i % len(ctx.reward_ids)]
+    return 'POST', f'/rewards/{reward_id}/redeem', {
+        'headers': bearer(ctx.user_tokens[_user(ctx, i)])
+    }
+
+
+def spin_lucky_draw(ctx, i):
+    return 'POST', f'/lucky-draws/{ctx.draw_id}/spin', {
+        'headers': bearer(ctx.user_tokens[_user(ctx, i)]),
+        'json': {'spin_type': 'points_redemption'}
+    }
+
+
+def check_in(ctx, i):
+    # Each iteration is a different member: a member can only check in once per day
+    return 'POST', '/gamification/check-in', {
+        'headers': bearer(ctx.user_tokens[i])
+    }
+
+
+def burst_check_in(ctx, i):
+    # Consecutive iterations are the same member, so duplicate taps land on different workers at once
+    return 'POST', '/gamification/check-in', {
+        'headers': bearer(ctx.user_tokens[i // BURST_TAPS])
+    }
+
+
+def reset_check_ins(ctx):
+    """Put every member just past midnight: streaks 0-6 with the last check-in yesterday"""
+    today = datetime.utcnow().date()
+    yesterday = today - timedelta(days=1)
+
+    DailyCheckIn.query.delete(synchronize_session=False)
+    for i, user in enumerate(User.query.filter(User.id.in_(ctx.user_ids))):
+        user.total_streak = i % 7
+        user.last_check_in_date = yesterday if user.total_streak else None
+    db.session.commit()
+
+    return {
+        'today': today,
+        'users': {
+            u.id: (u.total_streak, u.points_balance, u.points_lifetime)
+            for u in User.query.filter(User.id.in_(ctx.user_ids))
+        }
+    }
+
+
+def verify_check_ins(ctx, state):
+    """Every member that was hit has exactly one check-in, one streak step and one award"""
+    failures = []
+    rows = {}
+    for row in DailyCheckIn.query.filter(DailyCheckIn.check_in_date == state['today']):
+        rows.setdefault(row.user_id, []).append(row)
+
+    if not rows:
+        return ['no check-ins recorded']
+
+    for user in User.query.filter(User.id.in_(list(rows))):
+        streak, balance, lifetime = state['users'][user.id]
+        user_rows = rows[user.id]
+        if len(user_rows) != 1:
+            failures.append(f'{user.username}: {len(user_rows)} check-in rows')
+            continue
+        if user.total_streak != streak + 1:
+            failures.append(f'{user.username}: streak {streak} -> {user.total_streak}')
+        if abs((user.points_lifetime or 0) - lifetime - user_rows[0].points_earned) > 0.001:
+            failures.append(f'{user.username}: lifetime points {lifetime} -> {user.points_lifetime}, '
+                            f'check-in awarded {user_rows[0].points_earned}')
+
+    return failures
+
+
+def menu_products(ctx, i):
+    return 'GET', f'/customer/menu/products?branch_id={ctx.branch_id}', {}
+
+
+def available_rewards(ctx, i):
+    return 'GET', '/rewards/available', {
+        'headers': bearer(ctx.user_tokens[_user(ctx, i)])
+    }
+
+
+SCENARIOS = {
+    s.name: s for s in [
+        Scenario('transaction_award', award_points),
+        Scenario('reward_redeem', redeem_reward),
+        Scenario('lucky_draw_spin', spin_lucky_draw),
+        Scenario('gamification_check_in', check_in, warmup=0, max_requests=lambda ctx: len(ctx.user_ids),
+                 setup=reset_check_ins, verify=verify_check_ins),
+        # Midnight herd: every member taps BURST_TAPS times at once; exactly one tap may award.
+        # For the 5k check-in burst: python -m benchmarks.run -s check_in_burst --users 5000 -n 15000 -c 32
+        # Threads on SQLite serialize the writes; benchmarks.check_in_concurrency races them on PostgreSQL.
+        Scenario('check_in_burst', burst_check_in, warmup=0, max_requests=lambda ctx: BURST_TAPS * len(ctx.user_ids),
+                 setup=reset_check_ins, verify=verify_check_ins, expected_statuses={400}),
+        Scenario('menu_products', menu_products),
+        Scenario('rewards_available', available_rewards),
+    ]
+}
@@ -0,0 +1,166 @@
+"""
+Deterministic dataset for the endpoint benchmarks.
+
+Everything is created through the models so the data has the same shape the API
+produces. Call seed_database() inside an app context on a dedicated database.
+"""
+import random
+from datetime import timedelta
+from flask_jwt_extended import create_access_token
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models.merchant import Merchant, Branch
+from app.models.user import User
+from app.models.reward import Reward
+from app.models.menu import MenuCategory, Product, ProductOptionGroup, ProductOption
+from app.models.lucky_draw import LuckyDraw
+from app.models.lucky_draw_prize import LuckyDrawPrize
+
+TOKEN_LIFETIME = timedelta(hours=2)
+
+
+class BenchContext:
+    """IDs and tokens the scenarios need to build requests"""
+
+    def __init__(self):
+        self.merchant_id = None
+        self.branch_id = None
+        self.branch_token = None
+        self.user_ids = []
+        self.user_tokens = []
+        self.qr_tokens = []
+        self.reward_ids = []
+        self.draw_id = None
+
+
+def seed_database(users=1000, categories=8, products=80, rewards=30, prizes=6, seed=42):
+    rng = random.Random(seed)
+    ctx = BenchContext()
+
+    # Cheap hash: password checks are not what we benchmark
+    password_hash = generate_password_hash('bench', method='pbkdf2:sha256:1')
+
+    merchant = Merchant(name='Bench Merchant')
+    db.session.add(merchant)
+    db.session.flush()
+
+    branch = Branch(
+        merchant_id=merchant.id,
+        name='Bench Main',
+        username='bench_main',
+        password_hash=password_hash,
+        is_main=True,
+        location='HQ'
+    )
+    db.session.add(branch)
+    db.session.flush()
+
+    # --- Members ---
+    member_rows = []
+    for i in range(users):
+        member_rows.append(User(
+            username=f'bench_user_{i}',
+            email=f'bench_user_{i}@bench.local',
+            phone=f'+6000{i:07d}',
+            password_hash=password_hash,
+            is_verified=True,
+            referral_code=f'B{i:05d}',
+            # Enough points to redeem and spin for the whole run
+            points_balance=1_000_000.0,
+            points_lifetime=rng.choice([0.0, 600.0, 2500.0, 6000.0])
+        ))
+    db.session.add_all(member_rows)
+    db.session.flush()
+
+    # --- Menu ---
+    option_groups = []
+    for g in range(4):
+        group = ProductOptionGroup(branch_id=branch.id, name=f'Option Group {g}', min_selection=0, max_selection=2)
+        db.session.add(group)
+        db.session.flush()
+        for o in range(5):
+            db.session.add(ProductOption(group_id=group.id, name=f'Option {g}.{o}', price_adjustment=0.5 * o))
+        option_groups.append(group)
+
+    category_rows = []
+    for c in range(categories):
+        category = MenuCategory(branch_id=branch.id, name=f'Category {c}', sort_order=c)
+        db.session.add(category)
+        category_rows.append(category)
+    db.session.flush()
+
+    for p in range(products):
+        product = Product(
+            branch_id=branch.id,
+            category_id=category_rows[p % categories].id,
+            name=f'Product {p:03d}',
+            description='Benchmark product with a realistic length description for payload sizing.',
+            price=round(rng.uniform(5, 30), 2),
+            image_url=f'/uploads/product_{p}.jpg',
+            is_active=True,
+            is_recommended=p % 7 == 0,
+            is_new=p % 11 == 0
+        )
+        product.option_groups = rng.sample(option_groups, 2)
+        db.session.add(product)
+    db.session.flush()
+
+    # --- Rewards (unlimited stock, no per-user limit so redeem never runs dry) ---
+    reward_rows = []
+    for r in range(rewards):
+        reward = Reward(
+            merchant_id=merchant.id,
+            title=f'Reward {r}',
+            description='Benchmark reward',
+            category=rng.choice(['food', 'beverage', 'merchandise', 'discount']),
+            points_cost=rng.choice([10, 50, 100, 250]),
+            min_rank_required='bronze',
+            is_active=True,
+            validity_days=30,
+            sort_order=r
+        )
+        db.session.add(reward)
+        reward_rows.append(reward)
+    db.session.flush()
+
+    # --- Lucky draw (unlimited spins, unlimited prize stock) ---
+    draw = LuckyDraw(
+        merchant_id=merchant.id,
+        name='Bench Wheel',
+        points_cost=5,
+        is_active=True
+    )
+    db.session.add(draw)
+    db.session.flush()
+
+    for i in range(prizes):
+        if i % 3 == 0:
+            prize = LuckyDrawPrize(lucky_draw_id=draw.id, prize_type='points', points_amount=5 * (i + 1))
+        elif i % 3 == 1:
+            prize = LuckyDrawPrize(lucky_draw_id=draw.id, prize_type='reward', reward_id=reward_rows[i].id)
+        else:
+            prize = LuckyDrawPrize(lucky_draw_id=draw.id, prize_type='voucher', voucher_discount_percent=10)
+        prize.name = f'Prize {i}'
+        prize.probability_weight = i + 1
+        prize.display_order = i
+        db.session.add(prize)
+
+    db.session.commit()
+
+    ctx.merchant_id = merchant.id
+    ctx.branch_id = branch.id
+    ctx.branch_token = create_access_token(identity=f'm_{merchant.id}_b_{branch.id}', expires_delta=TOKEN_LIFETIME)
+    ctx.user_ids = [u.id for u in member_rows]
+    ctx.user_tokens = [create_access_token(identity=u.id, expires_delta=TOKEN_LIFETIME) for u in member_rows]
+    ctx.qr_tokens = [
+        create_access_token(
+            identity=u.id,
+            expires_delta=TOKEN_LIFETIME,
+            additional_claims={'type': 'qr_scan', 'username': u.username}
+        )
+        for u in member_rows
+    ]
+    ctx.reward_ids = [r.id for r in reward_rows]
+    ctx.draw_id = draw.id
+
+    return ctx
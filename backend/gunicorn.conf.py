@@ -0,0 +1,14 @@
+# Gunicorn settings for `gunicorn main:app` (read from the working directory automatically)
+
+
+def post_worker_init(worker):
+    """Start the background jobs in each serving worker, once its app is loaded"""
+    from app.services.scheduler import start_background_jobs
+    start_background_jobs(worker.wsgi)
+
+
+def worker_exit(server, worker):
+    """Stop the image process pool and its resource tracker (see ImageService.close)"""
+    from gevent import monkey
+    from app.services.image_service import ImageService
+    ImageService.close(close=monkey.get_original('os', 'close'), waitpid=monkey.get_original('os', 'waitpid'))
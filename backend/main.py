@@ -1,11 +1,27 @@
+import sys
+
+if __name__ == '__main__' and '--profile-startup' in sys.argv:
+    # Cold-start report (times a boot of this file in a fresh interpreter), no server
+    from app.utils.startup import profile_startup
+    sys.exit(profile_startup([arg for arg in sys.argv[1:] if arg != '--profile-startup']))
+
 from gevent import monkey
 monkey.patch_all()
 
+# psycopg2's C socket I/O is not covered by monkey patching: make it yield to the hub too
+from app.utils.gevent_db import make_psycopg_green
+make_psycopg_green()
+
 from app import create_app
 from app.services.socket_service import socketio
+from app.services.scheduler import start_background_jobs
 
 app = create_app()
 
+# Background jobs are started by the server entry points only (here and gunicorn.conf.py's
+# post_worker_init), not on import: `flask db upgrade` and other CLI commands import this file too
+
 if __name__ == '__main__':
+    start_background_jobs(app)
     # usage of socketio.run is required for websocket support
     socketio.run(app, host='0.0.0.0', port=5002)
@@ -0,0 +1,26 @@
+"""Add user_rewards (status, expires_at) index for expiry sweeper
+
+Revision ID: 7d2f9a4c1e85
+Revises: 463b0def497b
+Create Date: 2026-10-19 10:12:31.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2f9a4c1e85'
+down_revision = '463b0def497b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_rewards', schema=None) as batch_op:
+        batch_op.create_index('ix_user_rewards_status_expires_at', ['status', 'expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_rewards', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_rewards_status_expires_at')
@@ -0,0 +1,40 @@
+"""Add menu_changes (menu change log with tombstones for delta sync)
+
+Revision ID: a4c8e2f6b9d1
+Revises: f7b1d3e5a9c4
+Create Date: 2026-10-19 23:18:05.412390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c8e2f6b9d1'
+down_revision = 'f7b1d3e5a9c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('menu_changes',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('branch_id', sa.String(length=36), nullable=True),
+    sa.Column('merchant_id', sa.String(length=36), nullable=True),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.String(length=36), nullable=False),
+    sa.Column('action', sa.String(length=10), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['branch_id'], ['branches.id'], ),
+    sa.ForeignKeyConstraint(['merchant_id'], ['merchants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('menu_changes', schema=None) as batch_op:
+        batch_op.create_index('ix_menu_changes_branch_id', ['branch_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('menu_changes', schema=None) as batch_op:
+        batch_op.drop_index('ix_menu_changes_branch_id')
+
+    op.drop_table('menu_changes')
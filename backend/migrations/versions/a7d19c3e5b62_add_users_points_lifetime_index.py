@@ -0,0 +1,26 @@
+"""Add users.points_lifetime index for the leaderboard top-N query
+
+Revision ID: a7d19c3e5b62
+Revises: f2b6c8e4a913
+Create Date: 2026-10-19 17:48:12.530927
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d19c3e5b62'
+down_revision = 'f2b6c8e4a913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_points_lifetime'), ['points_lifetime'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_points_lifetime'))
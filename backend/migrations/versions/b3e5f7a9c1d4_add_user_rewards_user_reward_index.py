@@ -0,0 +1,26 @@
+"""Add user_rewards (user_id, reward_id) index for per-user redemption counts
+
+Revision ID: b3e5f7a9c1d4
+Revises: a7d19c3e5b62
+Create Date: 2026-10-19 19:12:40.268113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e5f7a9c1d4'
+down_revision = 'a7d19c3e5b62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_rewards', schema=None) as batch_op:
+        batch_op.create_index('ix_user_rewards_user_reward', ['user_id', 'reward_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_rewards', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_rewards_user_reward')
@@ -0,0 +1,26 @@
+"""Add lucky_draw_history (user_id, created_at) index for daily spin counts
+
+Revision ID: c41e8b2d6f03
+Revises: 7d2f9a4c1e85
+Create Date: 2026-10-19 11:02:47.918230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e8b2d6f03'
+down_revision = '7d2f9a4c1e85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('lucky_draw_history', schema=None) as batch_op:
+        batch_op.create_index('ix_lucky_draw_history_user_created', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('lucky_draw_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_lucky_draw_history_user_created')
@@ -0,0 +1,26 @@
+"""Add transactions (branch_id, timestamp) index for date-range exports
+
+Revision ID: c9d2e4f6a8b1
+Revises: b3e5f7a9c1d4
+Create Date: 2026-10-19 20:05:12.481930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9d2e4f6a8b1'
+down_revision = 'b3e5f7a9c1d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_transactions_branch_timestamp', ['branch_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_branch_timestamp')
@@ -0,0 +1,32 @@
+"""Add keyset indexes for redemption and spin exports
+
+Revision ID: d5f8a1b3c7e2
+Revises: c9d2e4f6a8b1
+Create Date: 2026-10-19 20:41:37.905164
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f8a1b3c7e2'
+down_revision = 'c9d2e4f6a8b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_rewards', schema=None) as batch_op:
+        batch_op.create_index('ix_user_rewards_merchant_redeemed', ['merchant_id', 'redeemed_at', 'id'], unique=False)
+
+    with op.batch_alter_table('lucky_draw_history', schema=None) as batch_op:
+        batch_op.create_index('ix_lucky_draw_history_draw_created', ['lucky_draw_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('lucky_draw_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_lucky_draw_history_draw_created')
+
+    with op.batch_alter_table('user_rewards', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_rewards_merchant_redeemed')
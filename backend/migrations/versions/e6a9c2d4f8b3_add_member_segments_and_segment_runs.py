@@ -0,0 +1,58 @@
+"""Add member_segments (RFM scores) and segment_runs (pipeline watermarks)
+
+Revision ID: e6a9c2d4f8b3
+Revises: d5f8a1b3c7e2
+Create Date: 2026-10-19 21:14:08.552716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a9c2d4f8b3'
+down_revision = 'd5f8a1b3c7e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('member_segments',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('merchant_id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('frequency', sa.Integer(), nullable=False),
+    sa.Column('monetary', sa.Float(), nullable=False),
+    sa.Column('points_earned', sa.Float(), nullable=False),
+    sa.Column('last_transaction_at', sa.DateTime(), nullable=False),
+    sa.Column('recency_days', sa.Integer(), nullable=False),
+    sa.Column('r_score', sa.Integer(), nullable=False),
+    sa.Column('f_score', sa.Integer(), nullable=False),
+    sa.Column('m_score', sa.Integer(), nullable=False),
+    sa.Column('segment', sa.String(length=20), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['merchant_id'], ['merchants.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('merchant_id', 'user_id', name='uq_member_segments_merchant_user')
+    )
+    with op.batch_alter_table('member_segments', schema=None) as batch_op:
+        batch_op.create_index('ix_member_segments_merchant_segment', ['merchant_id', 'segment', 'monetary'], unique=False)
+
+    op.create_table('segment_runs',
+    sa.Column('merchant_id', sa.String(length=36), nullable=False),
+    sa.Column('watermark', sa.DateTime(), nullable=False),
+    sa.Column('members', sa.Integer(), nullable=False),
+    sa.Column('transactions_processed', sa.Integer(), nullable=False),
+    sa.Column('thresholds_json', sa.Text(), nullable=True),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['merchant_id'], ['merchants.id'], ),
+    sa.PrimaryKeyConstraint('merchant_id')
+    )
+
+
+def downgrade():
+    op.drop_table('segment_runs')
+    with op.batch_alter_table('member_segments', schema=None) as batch_op:
+        batch_op.drop_index('ix_member_segments_merchant_segment')
+    op.drop_table('member_segments')
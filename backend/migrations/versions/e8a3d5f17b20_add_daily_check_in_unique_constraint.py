@@ -0,0 +1,32 @@
+"""Add (user_id, check_in_date) unique constraint to daily_check_ins
+
+Revision ID: e8a3d5f17b20
+Revises: c41e8b2d6f03
+Create Date: 2026-10-19 14:21:09.604518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8a3d5f17b20'
+down_revision = 'c41e8b2d6f03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Drop double check-ins left by concurrent taps, keeping the first one (ids are UUIDv7, time ordered)
+    op.execute(
+        "DELETE FROM daily_check_ins WHERE id NOT IN ("
+        "SELECT keep_id FROM (SELECT MIN(id) AS keep_id FROM daily_check_ins GROUP BY user_id, check_in_date) AS firsts)"
+    )
+
+    with op.batch_alter_table('daily_check_ins', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_daily_check_ins_user_date', ['user_id', 'check_in_date'])
+
+
+def downgrade():
+    with op.batch_alter_table('daily_check_ins', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_daily_check_ins_user_date', type_='unique')
@@ -0,0 +1,55 @@
+"""Add check_in_calendars (per-user monthly check-in bitmaps) and backfill it
+
+Revision ID: f2b6c8e4a913
+Revises: e8a3d5f17b20
+Create Date: 2026-10-19 16:05:33.172840
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+import uuid6
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b6c8e4a913'
+down_revision = 'e8a3d5f17b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    calendars = op.create_table('check_in_calendars',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('days', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'year', 'month', name='uq_check_in_calendars_user_month')
+    )
+
+    # Fold the existing daily_check_ins rows into month bitmaps
+    bitmaps = {}
+    result = op.get_bind().execution_options(stream_results=True).execute(
+        sa.text("SELECT user_id, check_in_date FROM daily_check_ins")
+    )
+    for user_id, check_in_date in result:
+        if isinstance(check_in_date, str):  # SQLite returns plain strings for text SQL
+            check_in_date = datetime.strptime(check_in_date[:10], '%Y-%m-%d').date()
+        key = (user_id, check_in_date.year, check_in_date.month)
+        bitmaps[key] = bitmaps.get(key, 0) | 1 << (check_in_date.day - 1)
+
+    now = datetime.utcnow()
+    rows = [
+        {'id': str(uuid6.uuid7()), 'user_id': user_id, 'year': year, 'month': month, 'days': days, 'updated_at': now}
+        for (user_id, year, month), days in bitmaps.items()
+    ]
+    for start in range(0, len(rows), 1000):
+        op.bulk_insert(calendars, rows[start:start + 1000])
+
+
+def downgrade():
+    op.drop_table('check_in_calendars')
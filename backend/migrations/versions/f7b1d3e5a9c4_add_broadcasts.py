@@ -0,0 +1,45 @@
+"""Add broadcasts (audience notifications with resumable progress)
+
+Revision ID: f7b1d3e5a9c4
+Revises: e6a9c2d4f8b3
+Create Date: 2026-10-19 21:52:44.107385
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7b1d3e5a9c4'
+down_revision = 'e6a9c2d4f8b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('broadcasts',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('merchant_id', sa.String(length=36), nullable=False),
+    sa.Column('created_by_branch_id', sa.String(length=36), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=True),
+    sa.Column('audience', sa.String(length=20), nullable=False),
+    sa.Column('audience_value', sa.String(length=36), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('total_recipients', sa.Integer(), nullable=True),
+    sa.Column('sent_count', sa.Integer(), nullable=False),
+    sa.Column('cursor', sa.String(length=36), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by_branch_id'], ['branches.id'], ),
+    sa.ForeignKeyConstraint(['merchant_id'], ['merchants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('broadcasts')